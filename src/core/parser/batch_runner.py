@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量解析多个运行目录（nightly 回归）
+usage:
+    python log_parser.py batch 'runs/*' run_x/ -o out_root/ [-j 8] [--list runs.txt] [--force] [--no-export] [--top 50]
+                               [--cores 0,1] [--cycle-range LO:HI] [--sections ...] [--ops ...]
+
+  - 所有运行目录的主日志解析、各 core 的 profile 解析作为独立任务投递到同一个进程池
+  - bmodel.json 按内容 sha1 去重：相同 bmodel 的 LayerExtractor 在进程内复用，
+    并以 pickle 缓存到 out_root/.batch/bmodel/v<LayerExtractor.CACHE_VERSION>-<sha1>.pkl，其他 worker / 下次运行直接加载
+  - 每个运行写 out_root/<run>/result.json（及 core_*.csv），完成后写 batch_done.json（输入指纹 + 汇总）；
+    再次运行时指纹一致的目录直接跳过（--force 全部重跑），中断后可续跑
+  - out_root/batch_index.json：所有运行的 profile 尾部汇总（每完成一个运行即刷新）
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from hotspots import build_hotspots
+from log_parser import (
+    LayerExtractor, ParseSelection, ProfileParser,
+    open_main_log, parse_log_file, glob_inputs, list_profiles, open_input, empty_result, empty_profile,
+    assemble_result, profiles_by_core, index_profile, write_result_json, export_tables, add_selection_args, selection_from_args, check_compress_arg, _file_key,
+)
+
+BATCH_DIR = '.batch'
+DONE_NAME = 'batch_done.json'
+INDEX_NAME = 'batch_index.json'
+# profile settings 中汇总进 batch_index 的尾部字段
+FOOTER_KEYS = ('totalCycle', 'tcyc', 'ddrBwUsage', 'flops', 'runtime_Ms', 'computationAbility_T',
+               'spanCycle', 'tiuBusyCycle', 'gdmaBusyCycle', 'overlapCycle', 'parallelism',
+               'tiuWorkingRatio', 'gdmaDdrAvgBandwidth')
+
+
+# ---------- 1. 运行目录与指纹 ----------
+def expand_runs(patterns: List[str], list_file: Optional[Path] = None) -> List[Path]:
+    """路径 / glob / 列表文件（每行一个）-> 去重后的目录列表（保持给出顺序）"""
+    items = list(patterns)
+    if list_file:
+        items += [ln.strip() for ln in list_file.read_text(encoding='utf-8').splitlines()
+                  if ln.strip() and not ln.startswith('#')]
+    runs, seen = [], set()
+    for item in items:
+        for p in (sorted(glob.glob(item)) if glob.has_magic(item) else [item]):
+            path = Path(p)
+            key = path.resolve()
+            if path.is_dir() and key not in seen:
+                seen.add(key)
+                runs.append(path)
+    return runs
+
+
+def output_names(runs: List[Path]) -> List[str]:
+    """输出子目录名：默认取运行目录名，重名时追加序号"""
+    names, used = [], {}
+    for run in runs:
+        name = run.resolve().name
+        k = used.get(name, 0)
+        used[name] = k + 1
+        names.append(name if k == 0 else f'{name}_{k}')
+    return names
+
+
+def fingerprint(run: Path, selection: ParseSelection, top: int = 0) -> Dict[str, Any]:
+    files = {p.name: _file_key(p) for p in sorted(run.iterdir()) if p.is_file()}
+    fp = {'files': files, 'selection': selection.to_json()}
+    if top > 0:   # 输出内容随 --top 变化
+        fp['top'] = top
+    return fp
+
+
+def load_done(out: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads((out / DONE_NAME).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+# ---------- 2. bmodel 缓存（按内容 hash） ----------
+_extractors: Dict[str, LayerExtractor] = {}   # 每个进程内的缓存
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha1()
+    with path.open('rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cached_extractor(bmodel: Path, digest: str, cache_dir: Path,
+                     selection: ParseSelection) -> LayerExtractor:
+    """同版本 + 同 hash + 同过滤条件只解析一次：进程内缓存 -> 磁盘 pickle -> 重新解析"""
+    key = f'v{LayerExtractor.CACHE_VERSION}-{digest}'
+    if selection.active:
+        key += '-' + hashlib.sha1(json.dumps(selection.to_json(), sort_keys=True).encode()).hexdigest()[:8]
+    ext = _extractors.get(key)
+    if ext is not None:
+        return ext
+    pkl = cache_dir / f'{key}.pkl'
+    try:
+        with pkl.open('rb') as f:
+            ext = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        ext = LayerExtractor(bmodel, selection)
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = pkl.with_suffix(f'.{os.getpid()}.tmp')
+            with tmp.open('wb') as f:
+                pickle.dump(ext, f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp.replace(pkl)
+        except OSError:
+            pass
+    _extractors[key] = ext
+    return ext
+
+
+# ---------- 3. 进程池任务 ----------
+def _main_job(run: Path, selection: ParseSelection) -> Dict[str, Any]:
+    if not (selection.want('lmem') or selection.want('timestep')):
+        return empty_result()
+    reader = open_main_log(run)
+    return parse_log_file(reader, selection) if reader else empty_result()
+
+
+def _core_job(prof_path: Path, core_id: int, bmodel: Optional[Path], digest: Optional[str],
+              cache_dir: Path, selection: ParseSelection) -> Dict[str, Any]:
+    layer_ext = cached_extractor(bmodel, digest, cache_dir, selection) if bmodel else None
+    with open_input(prof_path) as fp:
+        parsed = ProfileParser(selection).parse_lines(fp, core_id=core_id, layer_ext=layer_ext)
+    return index_profile(parsed[0] if parsed else empty_profile(), core_id)
+
+
+def _run_job(fn, run_idx: int, part: Any, *args) -> Tuple[int, Any, Any]:
+    """任务异常作为结果返回，保证仍能归属到所属运行"""
+    try:
+        return run_idx, part, fn(*args)
+    except Exception as e:
+        return run_idx, part, e
+
+
+# ---------- 4. 单个运行的组装与汇总 ----------
+class RunState:
+    def __init__(self, idx: int, run: Path, out: Path, fp: Dict[str, Any]):
+        self.idx, self.run, self.out, self.fp = idx, run, out, fp
+        self.pending = 0
+        self.main: Optional[Dict[str, Any]] = None
+        self.cores: Dict[int, Dict[str, Any]] = {}
+        self.bmodel: Optional[Path] = None
+        self.digest: Optional[str] = None
+        self.errors: List[str] = []
+        self.t0 = time.perf_counter()
+
+
+def assemble(state: RunState, cache_dir: Path, selection: ParseSelection, top: int = 0) -> Dict[str, Any]:
+    """主日志结果 + 按 core 排列的 profile（与 parse_folder 共用 assemble_result），top > 0 时附带热点汇总"""
+    ext = cached_extractor(state.bmodel, state.digest, cache_dir, selection) if state.bmodel else None
+    result = assemble_result(state.main, ext, profiles_by_core(state.cores), selection)
+    if top > 0:
+        result['hotspots'] = build_hotspots(result['profile'], top)
+    return result
+
+
+def run_summary(state: RunState, result: Optional[Dict[str, Any]], status: str) -> Dict[str, Any]:
+    summary = {
+        'run': state.out.name,
+        'dir': str(state.run),
+        'status': status,
+        'elapsed': round(time.perf_counter() - state.t0, 3),
+        'bmodelHash': state.digest,
+    }
+    if result is not None:
+        summary['valid'] = result['valid']
+        summary['cores'] = [{'core': i, 'entries': len(p['entries']),
+                             **{k: p['settings'][k] for k in FOOTER_KEYS if k in p['settings']}}
+                            for i, p in enumerate(result['profile']) if p['entries']]
+    if state.errors:
+        summary['errors'] = state.errors
+    return summary
+
+
+def write_index(out_root: Path, runs: Dict[str, Dict[str, Any]]):
+    index = {'time': time.strftime('%Y-%m-%d %H:%M:%S'), 'runs': sorted(runs.values(), key=lambda r: r['run'])}
+    tmp = out_root / (INDEX_NAME + '.tmp')
+    tmp.write_text(json.dumps(index, ensure_ascii=False, indent=2), encoding='utf-8')
+    tmp.replace(out_root / INDEX_NAME)
+
+
+def _fmt_eta(seconds: float) -> str:
+    m, s = divmod(int(seconds), 60)
+    return f'{m}m{s:02d}s' if m else f'{s}s'
+
+
+# ---------- 5. 调度 ----------
+def run_batch(runs: List[Path], out_root: Path, jobs: Optional[int] = None,
+              selection: Optional[ParseSelection] = None, force: bool = False,
+              export: bool = True, compress: Optional[str] = None, top: int = 0) -> Dict[str, Dict[str, Any]]:
+    sel = selection or ParseSelection()
+    out_root.mkdir(parents=True, exist_ok=True)
+    cache_dir = out_root / BATCH_DIR / 'bmodel'
+    try:
+        prev = json.loads((out_root / INDEX_NAME).read_text(encoding='utf-8'))
+        summaries = {r['run']: r for r in prev.get('runs', [])}
+    except (OSError, ValueError):
+        summaries = {}
+
+    # 1. 跳过已完成（指纹一致）的运行
+    todo: List[RunState] = []
+    for idx, (run, name) in enumerate(zip(runs, output_names(runs))):
+        out = out_root / name
+        fp = fingerprint(run, sel, top)
+        done = None if force else load_done(out)
+        if done and done.get('fingerprint') == fp:
+            summaries[name] = done['summary']
+            continue
+        todo.append(RunState(idx, run, out, fp))
+    total = len(todo)
+    print(f'[batch] {len(runs)} 个运行目录，待解析 {total}，已完成跳过 {len(runs) - total}')
+    if not total:
+        write_index(out_root, summaries)
+        return summaries
+
+    # 2. 所有运行的主日志 / 各 core profile 任务投递到同一进程池（按运行顺序提交）
+    jobs = jobs or os.cpu_count() or 1
+    digests: Dict[Path, str] = {}
+    states = {s.idx: s for s in todo}
+    finished, t_start = 0, time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = []
+        for st in todo:
+            futures.append(pool.submit(_run_job, _main_job, st.idx, 'main', st.run, sel))
+            if sel.want('profile'):
+                st.bmodel = next(iter(glob_inputs(st.run, '*.bmodel.json')), None)
+                if st.bmodel:
+                    key = st.bmodel.resolve()
+                    st.digest = digests.get(key) or digests.setdefault(key, file_digest(st.bmodel))
+                for n, prof_path in list_profiles(st.run, sel):
+                    futures.append(pool.submit(_run_job, _core_job, st.idx, n, prof_path, n,
+                                               st.bmodel, st.digest, cache_dir, sel))
+                    st.pending += 1
+            st.pending += 1
+
+        # 3. 某个运行的任务全部完成即组装、写出并刷新索引
+        for fut in as_completed(futures):
+            idx, part, value = fut.result()
+            st = states[idx]
+            if isinstance(value, Exception):
+                where = '主日志' if part == 'main' else f'core {part}'
+                st.errors.append(f'{where}: {type(value).__name__}: {value}')
+            elif part == 'main':
+                st.main = value
+            else:
+                st.cores[part] = value
+            st.pending -= 1
+            if st.pending:
+                continue
+            status, result = ('failed' if st.errors else 'ok'), None
+            try:
+                result = assemble(st, cache_dir, sel, top)
+                st.out.mkdir(parents=True, exist_ok=True)
+                write_result_json(result, st.out, compress)
+                if export:
+                    export_tables(result, st.out, compress)
+            except Exception as e:
+                status = 'failed'
+                st.errors.append(f'{type(e).__name__}: {e}')
+            summary = run_summary(st, result, status)
+            summaries[st.out.name] = summary
+            if status == 'ok':
+                (st.out / DONE_NAME).write_text(
+                    json.dumps({'fingerprint': st.fp, 'summary': summary}, ensure_ascii=False),
+                    encoding='utf-8')
+            else:   # 输出已被本次失败结果覆盖，旧的完成标记作废
+                (st.out / DONE_NAME).unlink(missing_ok=True)
+            write_index(out_root, summaries)
+            del states[idx]
+            finished += 1
+            elapsed = time.perf_counter() - t_start
+            eta = elapsed / finished * (total - finished)
+            flag = '✅' if status == 'ok' else '❌'
+            print(f'[batch] [{finished}/{total}] {flag} {st.out.name} {summary["elapsed"]:.2f}s'
+                  f'  已用 {_fmt_eta(elapsed)}  预计剩余 {_fmt_eta(eta)}')
+    return summaries
+
+
+def batch_main(argv: List[str]):
+    ap = argparse.ArgumentParser(prog='log_parser.py batch')
+    ap.add_argument('runs', nargs='*', help='运行目录或 glob（如 "runs/*"）')
+    ap.add_argument('--list', type=Path, help='运行目录列表文件（每行一个，# 开头为注释）')
+    ap.add_argument('-o', '--output', required=True, type=Path, help='输出根目录（每个运行一个子目录）')
+    ap.add_argument('-j', '--jobs', type=int, help='进程数（默认 CPU 核数）')
+    ap.add_argument('--force', action='store_true', help='忽略 batch_done.json，全部重新解析')
+    ap.add_argument('--no-export', action='store_true', help='不导出 core_*.csv/xlsx')
+    ap.add_argument('--compress', choices=('gz', 'zst'), help='压缩输出 result.json 及 csv')
+    ap.add_argument('--top', type=int, default=0, help='热点 layer/op 汇总条数（缺省 0 不生成）')
+    add_selection_args(ap)
+    args = ap.parse_args(argv)
+    check_compress_arg(ap, args.compress)
+
+    runs = expand_runs(args.runs, args.list)
+    if not runs:
+        print('❌ 没有找到运行目录')
+        exit(1)
+    summaries = run_batch(runs, args.output, args.jobs, selection_from_args(args),
+                          args.force, not args.no_export, args.compress, args.top)
+    failed = [r['run'] for r in summaries.values() if r['status'] != 'ok']
+    print(f'✅ batch 完成 -> {args.output / INDEX_NAME}' + (f'（失败 {len(failed)}: {", ".join(failed)}）' if failed else ''))
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解析流水线基准测试：按规模点生成合成日志（synth_logs.py），逐阶段计时并统计内存峰值
+阶段：read_log / extract_valid_sections / LmemParser / MemoryStatistics / TimestepParser /
+      ProfileParser / LayerExtractor / export / convert.py
+usage:
+    python bench.py [--scales xs,s,m] [--repeat 3] [--no-memory] [-o bench.json] [--compare base.json]
+    规模点可以是预设名（见 SCALES），也可以写成 cores:instructions:allocations:timesteps:groups
+每阶段记录 wall（多次取最小）、cpu、tracemalloc 峰值（单独再跑一遍，避免影响计时）、
+进程 maxrss 与处理条目数；结果写入 JSON，--compare 与旧结果逐阶段对比
+"""
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from log_parser import (
+    read_input_text, open_input, extract_valid_sections, LmemParser, MemoryStatistics,
+    TimestepParser, ProfileParser, LayerExtractor, write_result_json, export_tables,
+)
+import convert
+from synth_logs import generate
+from stage_trace import maxrss_kb
+
+# name -> (cores, instructions/core, allocations/group, timesteps/group, groups)
+SCALES = {
+    'xs': (1, 5_000, 200, 16, 2),
+    's': (2, 50_000, 1_000, 32, 4),
+    'm': (4, 200_000, 5_000, 64, 8),
+    'l': (8, 1_000_000, 20_000, 128, 16),
+}
+SCALE_FIELDS = ('cores', 'instructions', 'allocations', 'timesteps', 'groups')
+
+
+# ---------- 1. 规模点与数据 ----------
+def parse_scale(token: str) -> Tuple[str, Dict[str, int]]:
+    if token in SCALES:
+        return token, dict(zip(SCALE_FIELDS, SCALES[token]))
+    values = [int(v) for v in token.split(':')]
+    if len(values) != len(SCALE_FIELDS):
+        raise ValueError(f'规模点格式应为 {":".join(SCALE_FIELDS)}: {token}')
+    return token, dict(zip(SCALE_FIELDS, values))
+
+
+def ensure_data(data_dir: Path, name: str, params: Dict[str, int], seed: int) -> Path:
+    """同一规模 + seed 的数据只生成一次（以 params.json 校验）"""
+    folder = data_dir / name.replace(':', '_')
+    stamp = folder / 'params.json'
+    key = json.dumps({**params, 'seed': seed}, sort_keys=True)
+    if stamp.exists() and stamp.read_text() == key:
+        return folder
+    shutil.rmtree(folder, ignore_errors=True)
+    print(f'[bench] 生成数据 {name}: {params}')
+    generate(folder, seed=seed, **params)
+    stamp.write_text(key)
+    return folder
+
+
+# ---------- 2. 阶段 ----------
+# 每个阶段读写共享的 ctx，返回处理条目数；可重复执行（只依赖前序阶段的输出）
+def st_read_log(ctx):
+    ctx['raw'] = read_input_text(ctx['dir'] / 'LayerGroup.log', errors='ignore')
+    return ctx['raw'].count('\n')
+
+
+def st_sections(ctx):
+    ctx['sections'] = extract_valid_sections(ctx['raw'])
+    return len(ctx['sections']['lmemSections']) + len(ctx['sections']['timestepSections'])
+
+
+def st_lmem(ctx):
+    parser = LmemParser(chip=ctx['sections']['chip'])
+    ctx['lmem'] = parser.parse(ctx['sections']['lmemSections'])
+    ctx['max_ts'] = parser.get_global_max_timestep()
+    return sum(len(g['allocations']) for g in ctx['lmem'])
+
+
+def st_stats(ctx):
+    stats = MemoryStatistics()
+    stats.set_lmem_data(ctx['lmem'], ctx['max_ts'])
+    ctx['summary'] = stats.calculate_all_statistics()
+    return len(ctx['summary'].get('groups') or [])
+
+
+def st_timestep(ctx):
+    ctx['timestep'] = TimestepParser().parse(ctx['sections']['timestepSections'])
+    return sum(len(g['entries']) for g in ctx['timestep'])
+
+
+def st_profile(ctx):
+    ctx['parsers'], n = [], 0
+    for core_id, path in enumerate(ctx['profiles']):
+        p = ProfileParser()
+        p.reset()
+        with open_input(path) as fp:
+            n += p.feed(fp)
+        ctx['parsers'].append(p)
+    return n
+
+
+def st_layer(ctx):
+    ext = LayerExtractor(ctx['dir'] / 'model.bmodel.json')
+    ctx['profile'], n = [], 0
+    for core_id, p in enumerate(ctx['parsers']):
+        built = p.build(ext, core_id)[0]
+        n += sum(1 for e in built['entries'] if e['engine'] == 'LAYER')
+        ctx['profile'].append(built)
+    return n
+
+
+def st_export(ctx):
+    out = ctx['tmp'] / 'export'
+    out.mkdir(exist_ok=True)
+    result = {'lmem': ctx['lmem'], 'summary': ctx['summary'], 'timestep': ctx['timestep'],
+              'profile': ctx['profile'], 'chip': ctx['sections']['chip'], 'valid': {}, 'success': True}
+    write_result_json(result, out)
+    export_tables(result, out)
+    return sum(len(p['entries']) for p in ctx['profile'])
+
+
+def st_convert(ctx):
+    files = convert.collect_profile_files(ctx['profiles'])
+    ops = convert.parse_bmodel(ctx['dir'] / 'model.bmodel.json')
+    cores = convert.convert_profiles(files, ops, ctx['jobs'])
+    convert.write_profile_js(cores, ctx['tmp'] / 'profile_data.js')
+    return sum(len(c.time_data) for c in cores.values())
+
+
+STAGES: List[Tuple[str, Callable[[Dict[str, Any]], int]]] = [
+    ('read_log', st_read_log),
+    ('extract_valid_sections', st_sections),
+    ('LmemParser', st_lmem),
+    ('MemoryStatistics', st_stats),
+    ('TimestepParser', st_timestep),
+    ('ProfileParser', st_profile),
+    ('LayerExtractor', st_layer),
+    ('export', st_export),
+    ('convert.py', st_convert),
+]
+
+
+# ---------- 3. 计时 / 内存 ----------
+def measure(fn, ctx, repeat: int, memory: bool) -> Dict[str, Any]:
+    best_wall = best_cpu = None
+    for _ in range(repeat):
+        w0, c0 = time.perf_counter(), time.process_time()
+        items = fn(ctx)
+        wall, cpu = time.perf_counter() - w0, time.process_time() - c0
+        if best_wall is None or wall < best_wall:
+            best_wall, best_cpu = wall, cpu
+    rec = {'wall': round(best_wall, 4), 'cpu': round(best_cpu, 4), 'items': items}
+    if memory:
+        tracemalloc.start()
+        fn(ctx)
+        rec['peakMB'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        tracemalloc.stop()
+    rec['maxrssKB'] = maxrss_kb()
+    return rec
+
+
+def run_scale(folder: Path, repeat: int, memory: bool, jobs: int) -> Dict[str, Any]:
+    profiles = sorted(folder.glob('compiler_profile_*'),
+                      key=lambda p: int(convert.core_id_from_path(p)))
+    with tempfile.TemporaryDirectory(prefix='letsvis_bench_') as tmp:
+        ctx = {'dir': folder, 'profiles': profiles, 'tmp': Path(tmp), 'jobs': jobs}
+        stages = {}
+        for name, fn in STAGES:
+            stages[name] = rec = measure(fn, ctx, repeat, memory)
+            print(f"  {name:<24} wall={rec['wall']:>8.3f}s cpu={rec['cpu']:>8.3f}s "
+                  f"items={rec['items']:<10}" + (f" peak={rec['peakMB']}MB" if memory else ''))
+    return stages
+
+
+# ---------- 4. 结果与对比 ----------
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(cur: Dict[str, Any], base: Dict[str, Any]):
+    print(f"[bench] 对比基准 {base.get('rev')} ({base.get('time')})")
+    for scale, stages in cur['scales'].items():
+        old = (base.get('scales') or {}).get(scale)
+        if not old:
+            continue
+        print(f'  [{scale}]')
+        for name, rec in stages['stages'].items():
+            o = old['stages'].get(name)
+            if not o or not o['wall']:
+                continue
+            ratio = rec['wall'] / o['wall']
+            flag = '  ⚠️' if ratio > 1.1 else ''
+            print(f"    {name:<24} {o['wall']:>8.3f}s -> {rec['wall']:>8.3f}s  x{ratio:.2f}{flag}")
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description='log_parser / convert.py 分阶段基准测试')
+    ap.add_argument('--scales', default='xs,s', help=f'逗号分隔的规模点，预设: {",".join(SCALES)}')
+    ap.add_argument('--repeat', type=int, default=3, help='每阶段计时次数（取最小值）')
+    ap.add_argument('--no-memory', action='store_true', help='不做 tracemalloc 峰值统计')
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('-j', '--jobs', type=int, default=1, help='convert.py 阶段的进程数')
+    ap.add_argument('--data-dir', type=Path, default=Path(tempfile.gettempdir()) / 'letsvis_bench_data',
+                    help='合成数据目录（按规模点缓存复用）')
+    ap.add_argument('-o', '--output', type=Path, help='写入结果 JSON')
+    ap.add_argument('--compare', type=Path, help='与之前的结果 JSON 对比')
+    args = ap.parse_args(argv)
+
+    report = {
+        'rev': _git_rev(),
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': convert.HAS_NUMPY,
+        'repeat': args.repeat,
+        'scales': {},
+    }
+    for token in args.scales.split(','):
+        name, params = parse_scale(token.strip())
+        folder = ensure_data(args.data_dir, name, params, args.seed)
+        print(f'[bench] {name}: {params}')
+        report['scales'][name] = {'params': params,
+                                  'stages': run_scale(folder, args.repeat, not args.no_memory, args.jobs)}
+
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f'✅ 基准结果 -> {args.output}')
+    if args.compare:
+        compare(report, json.loads(args.compare.read_text(encoding='utf-8')))
+
+
+if __name__ == '__main__':
+    main()
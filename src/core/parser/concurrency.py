@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+BD / GDMA 并发与空闲分析（单 core）
+  - 一次遍历按 start 排序的 entries，得到 BD、GDMA 各自合并后的忙碌段
+  - 两路忙碌段做扫描线，把 [首条指令, 末条指令] 切成 idle / computeOnly / dmaOnly / overlap 四类片段
+  - 每个 LAYER 条目的时间窗口用前缀和 + 二分求四类时长
+  - 最长的空闲间隙附带前后相邻的指令
+结果由 ProfileParser.build 写入 profile[i]['concurrency']（与 index 并列），单位 cycle
+"""
+import heapq
+from bisect import bisect_right
+from operator import itemgetter
+from typing import Any, Dict, List, Optional
+
+# 片段状态下标 = BD 忙碌(1) | GDMA 忙碌(2)
+STATES = ('idle', 'computeOnly', 'dmaOnly', 'overlap')
+ENGINE_BIT = {'BD': 1, 'GDMA': 2}
+GAP_TOP = 10
+
+
+def _brief(e: Dict[str, Any]) -> Dict[str, Any]:
+    """空闲间隙两侧指令的简要信息"""
+    out = {k: e.get(k) for k in ('engine', 'op', 'type', 'start')}
+    out['end'] = e['start'] + e['cost']
+    key = 'bd_id' if e.get('engine') == 'BD' else 'gdma_id'
+    if key in e:
+        out[key] = e[key]
+    return out
+
+
+def merge_engine_segments(entries: List[Dict[str, Any]]) -> Dict[str, List[list]]:
+    """单遍：start 有序的 entries -> {engine: [[start, end, 首条, 到达 end 的那条], ...]}"""
+    segs = {eng: [] for eng in ENGINE_BIT}
+    cur: Dict[str, list] = {}
+    for e in entries:
+        eng = e.get('engine')
+        if eng not in ENGINE_BIT:
+            continue
+        s, end = e['start'], e['start'] + e['cost']
+        c = cur.get(eng)
+        if c is not None and s <= c[1]:
+            if end > c[1]:
+                c[1], c[3] = end, e
+            continue
+        if c is not None:
+            segs[eng].append(c)
+        cur[eng] = [s, end, e, e]
+    for eng, c in cur.items():
+        segs[eng].append(c)
+    return segs
+
+
+def _events(eng: str, segs: List[list]):
+    bit = ENGINE_BIT[eng]
+    for seg in segs:
+        yield seg[0], bit, seg       # 进入
+        yield seg[1], -bit, seg      # 离开（同引擎的段互不相接，事件天然有序）
+
+
+def classify(segs: Dict[str, List[list]]) -> List[tuple]:
+    """扫描两路忙碌段 -> 连续片段 [(t0, t1, state, t0 处离开的段, t1 处进入的段)]"""
+    pieces = []
+    state, prev_t, last_exit = 0, None, None
+    merged = heapq.merge(*(_events(eng, s) for eng, s in segs.items()), key=itemgetter(0))
+    for t, bit, seg in merged:
+        if prev_t is not None and t > prev_t:
+            pieces.append((prev_t, t, state, last_exit, seg if bit > 0 else None))
+        if bit > 0:
+            state |= bit
+        else:
+            state &= ~(-bit)
+            last_exit = seg
+        prev_t = t
+    return pieces
+
+
+def analyze_concurrency(entries: List[Dict[str, Any]], gap_top: int = GAP_TOP) -> Optional[Dict[str, Any]]:
+    """entries 需按 start 排序（ProfileParser.build 的输出）；无指令时返回 None"""
+    pieces = classify(merge_engine_segments(entries))
+    if not pieces:
+        return None
+
+    # 1. 整 core 四类时长 + 前缀和（供 layer 窗口查询）
+    totals = [0, 0, 0, 0]
+    starts, cum = [], [[0] * 4]
+    for t0, t1, st, _, _ in pieces:
+        totals[st] += t1 - t0
+        starts.append(t0)
+        cum.append(list(totals))
+    begin, end = pieces[0][0], pieces[-1][1]
+
+    def upto(t):
+        """[begin, t) 内各状态时长"""
+        t = min(max(t, begin), end)
+        i = bisect_right(starts, t) - 1
+        if i < 0:
+            return cum[0]
+        t0, _, st, _, _ = pieces[i]
+        acc = list(cum[i])
+        acc[st] += t - t0
+        return acc
+
+    # 2. 每个 LAYER 窗口
+    layers = []
+    for e in entries:
+        if e.get('engine') != 'LAYER':
+            continue
+        lo, hi = upto(e['start']), upto(e['start'] + e['cost'])
+        layers.append({'file_line': e.get('file_line'), 'op': e['op'],
+                       'start': e['start'], 'end': e['start'] + e['cost'],
+                       **{name: hi[k] - lo[k] for k, name in enumerate(STATES)}})
+
+    # 3. 最长空闲间隙
+    gaps = heapq.nlargest(gap_top, (p for p in pieces if p[2] == 0), key=lambda p: p[1] - p[0])
+    return {
+        'begin': begin,
+        'end': end,
+        **{name: totals[k] for k, name in enumerate(STATES)},
+        'idleGaps': [{'start': t0, 'end': t1, 'duration': t1 - t0,
+                      'before': _brief(before[3]) if before else None,
+                      'after': _brief(after[2]) if after else None}
+                     for t0, t1, _, before, after in gaps],
+        'layers': layers,
+    }
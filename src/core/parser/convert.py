@@ -2,81 +2,32 @@
 # -*- coding: utf-8 -*-
 """
 usage: 
-  python convert2.py <profile_files_or_dir> <bmodel.json> [output.js]
+  python convert.py <profile_files_or_dir> <bmodel.json> [output.js] [-j N] [--split]
   或
-  python convert2.py <profile_file1> <profile_file2> ... <bmodel.json> [output.js]
-"""
-
-import sys, re, json, math, pathlib, collections
+  python convert.py <profile_file1> <profile_file2> ... <bmodel.json> [output.js] [-j N] [--split]
 
-# ----------------------------------------------------------
-# 1. 命令行参数解析 (修复版)
-# ----------------------------------------------------------
-if len(sys.argv) < 3:
-    print("错误: 需要至少2个参数")
-    print(__doc__)
-    sys.exit(1)
-
-# 自动识别参数类型
-profile_paths = []  # 存储profile文件路径
-bmodel_json = None  # bmodel.json文件
-out_js = pathlib.Path('profile_data.js')  # 默认输出文件
-
-# 从后往前识别参数
-args = sys.argv[1:]
-if args[-1].endswith('.js'):
-    out_js = pathlib.Path(args.pop())
-
-# 识别bmodel.json (最后一个非.js参数)
-if args and args[-1].endswith('.json'):
-    bmodel_json = pathlib.Path(args.pop())
-else:
-    print("错误: 未找到bmodel.json文件")
-    print(__doc__)
-    sys.exit(1)
-
-# 剩余参数为profile文件/目录
-profile_paths = [pathlib.Path(p) for p in args]
-
-if not profile_paths:
-    print("错误: 未提供任何profile文件或目录")
-    print(__doc__)
-    sys.exit(1)
-
-print(f'[info] 输入参数:')
-print(f'  - Profile文件: {[str(p) for p in profile_paths]}')
-print(f'  - bmodel.json: {bmodel_json}')
-print(f'  - 输出文件: {out_js}')
+  -j / --jobs N   并行处理 profile 的进程数（默认 CPU 核数，1 为串行）
+  --split         主文件只写索引，每个 core 单独写 <output>_core<N>.js，页面按需加载
 
-# ----------------------------------------------------------
-# 2. 收集所有profile文件 (支持目录和文件混合)
-# ----------------------------------------------------------
-def collect_profile_files(paths):
-    """收集所有profile文件，支持目录和文件混合输入"""
-    all_files = []
-    for p in paths:
-        if p.is_dir():
-            # 收集目录下所有compiler_profile_*文件
-            files = sorted(p.glob('compiler_profile_*'))
-            if not files:
-                print(f"⚠️ 警告: 目录中无compiler_profile文件: {p}")
-            all_files.extend(files)
-        elif p.is_file():
-            # 直接添加文件
-            all_files.append(p)
-        else:
-            print(f"⚠️ 警告: 路径不存在: {p}")
-    return all_files
-
-profile_files = collect_profile_files(profile_paths)
-
-if not profile_files:
-    print("❌ 错误: 未找到任何有效的profile文件")
-    sys.exit(1)
+也可作为模块调用：
+  >>> import convert
+  >>> ops = convert.parse_bmodel(pathlib.Path('model.bmodel.json'))
+  >>> cores = convert.convert_profiles(convert.collect_profile_files([run_dir]), ops)
+  >>> convert.write_profile_js(cores, pathlib.Path('profile_data.js'))
+"""
 
-print(f'[info] 找到 {len(profile_files)} 个profile文件')
+import os, sys, re, json, math, pathlib, collections
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 
+from log_parser import open_input
+from interval_stats import busy_summary, DDR_DIRECTIONS
 
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
 
 # ----------------------------------------------------------
 # 2. 预定义全局量（与模板保持一致）
@@ -124,13 +75,7 @@ SUMMARY_HEADER= ['CoreId','Parallelism(%)','totalTime(us)','TiuWorkingRatio',
                  'GdmaDdrAvgBandwidth(GB/s)','GdmaL2AvgBandwidth(GB/s)',
                  'GdmaAvgDdrBurstLength','totalSdmaCycle',
                  'SdmaDdrAvgBandwidth(GB/s)','SdmaAvgDdrBurstLength']
-# 这里先写死，有需要可后期统计
-SUMMARY_DATA  = [
-    ['0','128.83%',151877405,'81.33%',154395617,'99.17%',72153345,
-     '24.47',0,'3.20',0,0,0],
-    ['Overall','128.83%','151877.4us','81.33%','123516.49us',
-     '99.17%','72153.35us','24.47',0,'3.20','0.00us',0,'0.00']
-]
+# SUMMARY_DATA 由 build_summary_data() 按各 core 的 BD/GDMA 区间实时统计
 
 TIU_MHZ = 1000          # 1250 MHz 就写 1250，1000 MHz 就写 1000
 
@@ -279,20 +224,11 @@ def parse_bmodel(path):
             
     return ops
 
-print(f'[info] 解析 bmodel: {bmodel_json}')
-bmodel_ops = parse_bmodel(bmodel_json)   # 全部算子
-print(f'[info] bmodel 共 {len(bmodel_ops)} 个算子')
-
 # ----------------------------------------------------------
-# 4. 解析单个 compiler_profile_<n> 文件 (增强版)
+# 4. 解析单个 compiler_profile_<n> 文件 (单遍)
 # ----------------------------------------------------------
 ProfileEntry = collections.namedtuple('ProfileEntry','type name start_id end_id start_t end_t dur dr sz bw')
 
-
-import re
-import re
-from pathlib import Path
-
 # 定义分割日志行的正则表达式（用于分割BD和GDMA指令）
 SPLIT_RE = re.compile(r'\s{2,}')  # 匹配两个或更多连续空格
 
@@ -307,104 +243,95 @@ INST_RE = re.compile(
     r'(?:\|bw:(?P<bw>[\d\.]+))?'  # 可选带宽
 )
 
-def parse_single_profile(path: Path):
+def parse_single_profile(path: pathlib.Path):
+    """
+    单遍解析：GDMA 行先占位高度，带宽存入紧凑数组，
+    读完后按全文件最大 bw 一次性归一化
+    返回 (bd_rows, gdma_rows, api_end, summary)，summary 见 interval_stats.busy_summary
+    """
     bd_rows, gdma_rows = [], []
     if not path.exists() or path.stat().st_size == 0:
-        return bd_rows, gdma_rows, 0, 0.0
+        return bd_rows, gdma_rows, 0, busy_summary([], [], [], [])
 
     TIU_MHZ = 1000
-    max_bw = 1  # 默认最大值（避免除以0）
-
-    # 第一遍：收集所有GDMA的bw值，计算全局最大值
-    gdma_bandwidth = []
-    for raw in path.read_text().splitlines():
-        line = raw.rstrip()
-        if not line or line.startswith('-') or 'ENGINE_' in line:
-            continue
-        
-        # 使用SPLIT_RE分割行
-        parts = SPLIT_RE.split(line, maxsplit=1)
-        right = parts[1] if len(parts) > 1 else None
-        
-        # 检查右侧GDMA指令
-        if right:
-            m = INST_RE.search(right)
-            if m and m.group('bw'):
-                gdma_bandwidth.append(float(m.group('bw')))
-    
-    if gdma_bandwidth:
-        max_bw = max(gdma_bandwidth)  # 获取全局最大sz值
+    gdma_bw = array('d')     # 与 gdma_rows 一一对应
+    max_bw = None            # 所有出现过的 bw（含被跳过的行）中的最大值
+    ddr_bytes = 0            # 经过 DDR 的 GDMA 字节数（Summary 带宽用）
+
+    with open_input(path) as fp:
+        for raw in fp:
+            line = raw.rstrip()
+            if not line or line.startswith('-') or 'ENGINE_' in line:
+                continue
 
-    # 第二遍：实际解析
-    for raw in path.read_text().splitlines():
-        line = raw.rstrip()
-        if not line or line.startswith('-') or 'ENGINE_' in line:
-            continue
-        
-        # 使用SPLIT_RE分割行
-        parts = SPLIT_RE.split(line, maxsplit=1)
-        left = parts[0] if len(parts) > 0 else None
-        right = parts[1] if len(parts) > 1 else None
-
-        # 解析左侧 BD 指令
-        if left:
-            m = INST_RE.search(left)
-            if m:
-                d = m.groupdict()
+            # 使用SPLIT_RE分割行
+            parts = SPLIT_RE.split(line, maxsplit=1)
+            left = parts[0] if len(parts) > 0 else None
+            right = parts[1] if len(parts) > 1 else None
+
+            # 右侧先匹配：bw 最大值统计不受左侧是否有效影响
+            rm = INST_RE.search(right) if right else None
+            if rm and rm.group('bw'):
+                bw = float(rm.group('bw'))
+                if max_bw is None or bw > max_bw:
+                    max_bw = bw
+
+            # 解析左侧 BD 指令
+            if left:
+                m = INST_RE.search(left)
+                if m:
+                    d = m.groupdict()
+                    s, e = int(d['s']), int(d['e'])
+                    if e < 0:  # 跳过无效结束时间（同行 GDMA 一并跳过）
+                        continue
+
+                    begin_us = s / TIU_MHZ
+                    end_us = e / TIU_MHZ
+
+                    # BD 指令使用固定小高度 
+                    height = -1
+
+                    bd_rows.append([
+                        0,  # category
+                        round(begin_us, 3),
+                        round(end_us, 3),
+                        f"bd_id={d['b']}",
+                        height,
+                        -1,  # layer_id
+                        f"{d['name']}(G)",  # layer_type
+                        0,  # subnet_id
+                        "TPU(static)",  # subnet_type
+                        "Iter[0]",  # iteration
+                        "BD"  # info
+                    ])
+
+            # 解析右侧 GDMA 指令
+            if rm:
+                d = rm.groupdict()
                 s, e = int(d['s']), int(d['e'])
                 if e < 0:  # 跳过无效结束时间
                     continue
-                
-                begin_us = s / TIU_MHZ
-                end_us = e / TIU_MHZ
-                
-                # BD 指令使用固定小高度 
-                height = -1
-                
-                bd_rows.append([
-                    0,  # category
-                    round(begin_us, 3),
-                    round(end_us, 3),
-                    f"bd_id={d['b']}",
-                    height,
-                    -1,  # layer_id
-                    f"{d['name']}(G)",  # layer_type
-                    0,  # subnet_id
-                    "TPU(static)",  # subnet_type
-                    "Iter[0]",  # iteration
-                    "BD"  # info
-                ])
 
-        # 解析右侧 GDMA 指令
-        if right:
-            m = INST_RE.search(right)
-            if m:
-                d = m.groupdict()
-                s, e = int(d['s']), int(d['e'])
-                if e < 0:  # 跳过无效结束时间
-                    continue
-                    
                 begin_us = s / TIU_MHZ
                 end_us = e / TIU_MHZ
                 dr = int(d['dr']) if d['dr'] else -1
                 sz = int(d['sz']) if d['sz'] else 0
                 bw = float(d['bw']) if d['bw'] else 0.0
-                
-                # GDMA 指令高度基于数据大小 (sz)
-                # 归一化到 0-1 范围，最大高度为1
-                height = min(1.0, bw / max_bw) if max_bw > 0 else 0.5
-                
+
                 direction = 0 if dr == 0 else 1
                 mem_ty = "GDMA_TENSOR" if "TENSOR" in d['ty'].upper() else "GDMA_MATRIX"
                 info = (f"{mem_ty}<br>direction={direction}<br>bytes={sz}"
                         f"<br>speed={bw:.2f}GB/s")
-                
+
+                if dr in DDR_DIRECTIONS:
+                    ddr_bytes += sz
+                gdma_bw.append(bw)
                 gdma_rows.append([
                     1,  # category
                     round(begin_us, 3),
                     round(end_us, 3),
                     f"gdma_id={d['g']}",
-                    round(height, 4),  # 修改后的高度
+                    None,  # 高度，见下方归一化
                     -1,  # layer_id
                     f"{d['name']}(G)",  # layer_type
                     0,  # subnet_id
@@ -413,14 +340,26 @@ def parse_single_profile(path: Path):
                     info  # info
                 ])
 
-    # 计算API结束时间和DDR带宽
+    # GDMA 高度基于带宽归一化到 0-1 范围，最大高度为1
+    if max_bw is None:
+        max_bw = 1  # 默认最大值（避免除以0）
+    for row, bw in zip(gdma_rows, gdma_bw):
+        height = min(1.0, bw / max_bw) if max_bw > 0 else 0.5
+        row[4] = round(height, 4)
+
+    # 计算API结束时间与忙碌/并行/带宽汇总（区间并集，单位 us）
     api_end = max((row[2] for row in bd_rows + gdma_rows), default=0)
-    ddr_bw = 0.0  # 实际应用中可能需要计算
-    
-    return bd_rows, gdma_rows, api_end, ddr_bw
+    summary = busy_summary(
+        [r[1] for r in bd_rows], [r[2] for r in bd_rows],
+        [r[1] for r in gdma_rows], [r[2] for r in gdma_rows],
+        ddr_bytes=ddr_bytes, unit_us=1.0)
 
+    return bd_rows, gdma_rows, api_end, summary
 
 
+# ----------------------------------------------------------
+# 5. 按 core 转换（可在进程池中逐 core 调用）
+# ----------------------------------------------------------
 class CoreData:
     def __init__(self, core_id):
         self.core_id = core_id
@@ -428,110 +367,125 @@ class CoreData:
         self.lmem_record = []      # 给 window.lmem_op_record<n>
         self.api_cycle = 0
         self.ddr_bw_usage = 0
+        self.summary = None        # busy_summary() 结果，给 Summary Table
 
-cores = {}   # core_id -> CoreData
 
-for prof_path in profile_files:
-    # 从文件名提取核心ID (更健壮的匹配)
+def collect_profile_files(paths):
+    """收集所有profile文件，支持目录和文件混合输入"""
+    all_files = []
+    for p in paths:
+        if p.is_dir():
+            # 收集目录下所有compiler_profile_*文件
+            files = sorted(p.glob('compiler_profile_*'))
+            if not files:
+                print(f"⚠️ 警告: 目录中无compiler_profile文件: {p}")
+            all_files.extend(files)
+        elif p.is_file():
+            # 直接添加文件
+            all_files.append(p)
+        else:
+            print(f"⚠️ 警告: 路径不存在: {p}")
+    return all_files
+
+
+def core_id_from_path(prof_path):
+    """
+    从文件名提取核心ID，支持多种文件名格式:
+      compiler_profile_0 / compiler_profile_0.txt / custom_profile_1.log
+    """
     try:
-        # 支持多种文件名格式:
-        #   compiler_profile_0
-        #   compiler_profile_0.txt
-        #   custom_profile_1.log
         match = re.search(r'(\d+)(?:\..+)?$', prof_path.stem)
         if not match:
             print(f"⚠️ 无法从文件名提取core_id: {prof_path.name}, 使用默认值0")
-            core_id = 0
-        else:
-            core_id = int(match.group(1))
+            return 0
+        return int(match.group(1))
     except Exception as e:
         print(f"⚠️ 文件名解析错误: {prof_path.name}, 错误: {e}, 使用默认值0")
-        core_id = 0
-    
-    print(f'[info] 处理 {prof_path.name} (core {core_id})')
-    
-    # try:
-    #     bd_list, gdma_list, api_end, ddr_bw = parse_single_profile(prof_path)
-    #     core = cores.setdefault(core_id, CoreData(core_id))
-    #     core.api_cycle = api_end
-    #     core.ddr_bw_usage = ddr_bw
-
-    #     #print(f"bd_list:{bd_list}")
-
-    #     # bd_map = {e[0] for e in bd_list}
-    #     # gdma_map = {e[0] for e in gdma_list}
-
-    #     # 1. 先扔指令级数据
-    #     core.time_data.extend(bd_list)      # category=0/1
-    #     core.time_data.extend(gdma_list)
-
-    #     # 2. 再追加 Layer 级数据（category=2）
-    #     for op in filter(lambda o: o.core_id == core_id, bmodel_ops):
-    #         bd_entries = [bd_map[i] for i in range(op.bd_start, op.bd_start + op.bd_count) if i in bd_map]
-    #         gdma_entries = [gdma_map[i] for i in range(op.gdma_start, op.gdma_start + op.gdma_count) if i in gdma_map]
-    #         all_e = bd_entries + gdma_entries
-    #         if not all_e:
-    #             continue
-    #         begin_us = min(e.start_t for e in all_e) / TIU_MHZ
-    #         end_us   = max(e.end_t   for e in all_e) / TIU_MHZ
-    #         dur_us   = end_us - begin_us
-    #         func_type = f"{op.name}(L)"
-    #         layer_row = [
-    #             2, round(begin_us,3), round(end_us,3),
-    #             func_type, 1, op.file_line, func_type,
-    #             0, "TPU(static)", "Iter[0]", build_info(op)
-    #         ]
-    #         core.time_data.append(layer_row)
-
+        return 0
+
+
+def build_id_table(rows):
+    """
+    指令记录 -> 按 id 下标的 (begin, end) 稠密数组（微秒）
+    row[3] 为 "bd_id=N" / "gdma_id=N"；缺失 id 处 begin=+inf、end=-inf，重复 id 以后出现者为准
+    """
+    ids = [int(row[3].partition('=')[2]) for row in rows]
+    size = max(ids) + 1 if ids else 0
+    begin = array('d', [math.inf]) * size
+    end = array('d', [-math.inf]) * size
+    for i, row in zip(ids, rows):
+        begin[i] = row[1]
+        end[i] = row[2]
+    return begin, end
+
+
+def range_min_max(begin, end, lo, hi):
+    """
+    批量区间查询：对每个 [lo[k], hi[k]) 求 begin 最小值与 end 最大值
+    有 numpy 时用 reduceat 一次完成，否则逐区间对数组切片做 min/max
+    """
+    n = len(begin)
+    bounds = [(min(max(l, 0), n), min(max(h, 0), n)) for l, h in zip(lo, hi)]
+    if not HAS_NUMPY or not bounds:
+        mins = [min(begin[l:h]) if l < h else math.inf for l, h in bounds]
+        maxs = [max(end[l:h]) if l < h else -math.inf for l, h in bounds]
+        return mins, maxs
+
+    # 末尾补一个哨兵，使 hi == n 也是合法下标；偶数位为 [lo, hi) 的归约结果
+    b = np.append(np.frombuffer(begin, dtype=np.float64), np.inf)
+    e = np.append(np.frombuffer(end, dtype=np.float64), -np.inf)
+    idx = np.asarray(bounds, dtype=np.intp).ravel()
+    valid = idx[0::2] < idx[1::2]
+    mins = np.minimum.reduceat(b, idx)[0::2]
+    maxs = np.maximum.reduceat(e, idx)[0::2]
+    mins[~valid] = np.inf
+    maxs[~valid] = -np.inf
+    return mins.tolist(), maxs.tolist()
+
+
+def partition_ops(bmodel_ops):
+    """bmodel 算子按 core_id 分区（一次遍历，保持原顺序）"""
+    ops_by_core = collections.defaultdict(list)
+    for op in bmodel_ops:
+        ops_by_core[op.core_id].append(op)
+    return ops_by_core
+
+
+def convert_core(prof_path, core_id, core_ops):
+    """
+    转换单个 profile 文件 -> CoreData（顶层函数，可被进程池 pickle）
+    core_ops: 该 core 的 bmodel 算子；失败时返回 None
+    """
     try:
-        bd_list, gdma_list, api_end, ddr_bw = parse_single_profile(prof_path)
-        core = cores.setdefault(core_id, CoreData(core_id))
+        bd_list, gdma_list, api_end, summary = parse_single_profile(prof_path)
+        core = CoreData(core_id)
         core.api_cycle = api_end
-        core.ddr_bw_usage = ddr_bw
+        core.ddr_bw_usage = summary['gdmaDdrAvgBandwidth']
+        core.summary = summary
 
         # 1. 添加指令级数据
         core.time_data.extend(bd_list)      # category=0/1
         core.time_data.extend(gdma_list)
 
-        # 2. 创建指令ID到时间记录的字典映射
-        # 注意: bd_list/gdma_list中的第3项是"bd_id=X"或"gdma_id=X"
-        bd_dict = {}
-        for entry in bd_list:
-            # 提取 "bd_id=100" 中的 100
-            bd_id = entry[3].split('=')[1]
-            bd_dict[bd_id] = entry  # 存储完整记录
-        
-        gdma_dict = {}
-        for entry in gdma_list:
-            # 提取 "gdma_id=50" 中的 50
-            gdma_id = entry[3].split('=')[1]
-            gdma_dict[gdma_id] = entry  # 存储完整记录
+        # 2. 指令 id -> 起止时间 稠密数组；每个算子一次区间 min/max
+        bd_begin, bd_end = build_id_table(bd_list)
+        gdma_begin, gdma_end = build_id_table(gdma_list)
+        bd_lo = [op.bd_start for op in core_ops]
+        bd_hi = [op.bd_start + op.bd_count for op in core_ops]
+        gdma_lo = [op.gdma_start for op in core_ops]
+        gdma_hi = [op.gdma_start + op.gdma_count for op in core_ops]
+        bd_min, bd_max = range_min_max(bd_begin, bd_end, bd_lo, bd_hi)
+        gdma_min, gdma_max = range_min_max(gdma_begin, gdma_end, gdma_lo, gdma_hi)
 
         # 3. 处理当前核心的算子
-        for op in filter(lambda o: o.core_id == core_id, bmodel_ops):
-            all_entries = []  # 存储所有相关指令的记录
-            
-            # 收集BD指令
-            for bd_id in range(op.bd_start, op.bd_start + op.bd_count):
-                bd_str = str(bd_id)
-                if bd_str in bd_dict:
-                    all_entries.append(bd_dict[bd_str])
-            
-            # 收集GDMA指令
-            for gdma_id in range(op.gdma_start, op.gdma_start + op.gdma_count):
-                gdma_str = str(gdma_id)
-                if gdma_str in gdma_dict:
-                    all_entries.append(gdma_dict[gdma_str])
-            
+        for k, op in enumerate(core_ops):
+            # 时间范围 = 所有相关指令的最小开始和最大结束时间（已是微秒）
+            begin_us = min(bd_min[k], gdma_min[k])
             # 如果没有找到任何指令记录，跳过该算子
-            if not all_entries:
+            if begin_us == math.inf:
                 continue
-            
-            # 计算时间范围 (所有指令的最小开始和最大结束时间)
-            # 注意: 时间在parse_single_profile中已转换为微秒
-            begin_us = min(entry[1] for entry in all_entries)
-            end_us = max(entry[2] for entry in all_entries)
-            
+            end_us = max(bd_max[k], gdma_max[k])
+
             # 构建Layer记录
             func_type = f"{op.name}(L)"
             layer_row = [
@@ -551,21 +505,129 @@ for prof_path in profile_files:
 
         # 4. 按时间排序
         core.time_data.sort(key=lambda r: r[1])
-
-        # 3. 按时间排序（可选，前端也能排）
-        # core.time_data.sort(key=lambda r: r[1])
+        return core
     except Exception as e:
         print(f"❌ 处理 {prof_path.name} 失败: {type(e).__name__}: {e}")
-        continue
+        return None
 
-print(f'[info] 共处理 {len(cores)} 个 core')
 
-# print(f'core{core.time_data}')
+def _convert_core_job(job):
+    return convert_core(*job)
+
+
+def convert_profiles(profile_files, bmodel_ops, jobs=None):
+    """
+    转换全部 profile 文件 -> {core_id: CoreData}（保持输入顺序）
+    jobs: 进程数，None 为 CPU 核数，<=1 时串行
+    """
+    ops_by_core = partition_ops(bmodel_ops)
+
+    todo = []
+    for prof_path in profile_files:
+        core_id = core_id_from_path(prof_path)
+        print(f'[info] 处理 {prof_path.name} (core {core_id})')
+        todo.append((prof_path, core_id, ops_by_core.get(core_id, [])))
+
+    jobs = min(jobs or os.cpu_count() or 1, len(todo))
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_convert_core_job, todo))
+    else:
+        results = [convert_core(*job) for job in todo]
+
+    cores = {}   # core_id -> CoreData
+    for core in results:
+        if core is None:
+            continue
+        prev = cores.get(core.core_id)
+        if prev is None:
+            cores[core.core_id] = core
+            continue
+        # 同一 core 出现多个文件：合并后重新排序并重新汇总
+        merge_core(prev, core)
+    return cores
+
+
+def merge_core(dst, src):
+    """把 src 的行并入 dst；忙碌/并行汇总按合并后的 BD/GDMA 行重新求区间并集"""
+    dst.time_data.extend(src.time_data)
+    dst.time_data.sort(key=lambda r: r[1])
+    dst.api_cycle = max(dst.api_cycle, src.api_cycle)
+    bd = [r for r in dst.time_data if r[0] == 0]
+    gdma = [r for r in dst.time_data if r[0] == 1]
+    ddr_bytes = sum(c.summary['ddrBytes'] for c in (dst, src) if c.summary)
+    dst.summary = busy_summary(
+        [r[1] for r in bd], [r[2] for r in bd],
+        [r[1] for r in gdma], [r[2] for r in gdma],
+        ddr_bytes=ddr_bytes, unit_us=1.0)
+    dst.ddr_bw_usage = dst.summary['gdmaDdrAvgBandwidth']
+
+
+def build_summary_data(cores):
+    """
+    按 SUMMARY_HEADER 生成 Summary Table：每 core 一行（cycle）+ Overall 行（us）
+    Overall：totalTime 取所有 core 的整体跨度，TIU/GDMA 忙碌取各 core 平均，带宽按总字节/总忙碌时间
+    uArchURate / 突发长度 / SDMA 在 profile 中没有来源，分别填 '-' / 0
+    """
+    rows = []
+    sums = [c.summary for c in cores.values() if c.summary and c.summary['span']]
+    cyc = lambda us: int(round(us * TIU_MHZ))
+    for core_id, core in cores.items():
+        sm = core.summary
+        if not sm or not sm['span']:
+            continue
+        rows.append([str(core_id), f"{sm['parallelism']:.2f}%", cyc(sm['span']),
+                     f"{sm['tiuWorkingRatio']:.2f}%", cyc(sm['tiuBusy']), '-',
+                     cyc(sm['gdmaBusy']), f"{sm['gdmaDdrAvgBandwidth']:.2f}", 0, 0, 0, 0, 0])
+    if not sums:
+        return rows
+
+    span = max(sm['end'] for sm in sums) - min(sm['begin'] for sm in sums)
+    tiu = sum(sm['tiuBusy'] for sm in sums) / len(sums)
+    gdma = sum(sm['gdmaBusy'] for sm in sums) / len(sums)
+    gdma_total = sum(sm['gdmaBusy'] for sm in sums)
+    ddr_bw = sum(sm['ddrBytes'] for sm in sums) / gdma_total / 1e3 if gdma_total else 0.0
+    pct = lambda v: f"{v / span * 100:.2f}%" if span else '0.00%'
+    rows.append(['Overall', pct(tiu + gdma), f'{span:.2f}us', pct(tiu), f'{tiu:.2f}us',
+                 '-', f'{gdma:.2f}us', f'{ddr_bw:.2f}', 0, 0, '0.00us', 0, '0.00'])
+    return rows
+
 
 # ----------------------------------------------------------
 # 6. 写出 profile_data.js (增强兼容性)
 # ----------------------------------------------------------
-try:
+def write_js_array(f, rows):
+    """逐行编码写出 JSON 数组，输出与 json.dumps(rows) 一致但不构造整段字符串"""
+    f.write('[')
+    sep = ''
+    for row in rows:
+        f.write(sep)
+        f.write(json.dumps(row))
+        sep = ', '
+    f.write(']')
+
+
+def write_core_js(f, core_id, core):
+    f.write(f'window.time_data{core_id} = ')
+    write_js_array(f, core.time_data)
+    f.write(';\n')
+    f.write(f'window.lmem_op_record{core_id} = ')
+    write_js_array(f, core.lmem_record)
+    f.write(';\n')
+    # lane 暂无
+    f.write(f'window.lane_op_record{core_id} = [];\n')
+
+
+def core_js_path(out_js, core_id):
+    """--split 时单个 core 的脚本路径：profile_data.js -> profile_data_core<N>.js"""
+    return out_js.with_name(f'{out_js.stem}_core{core_id}.js')
+
+
+def write_profile_js(cores, out_js, split=False):
+    """
+    写出 profile_data.js；split=True 时主文件只含全局量与 core_scripts 索引，
+    各 core 数据写入 profile_data_core<N>.js，由 result.html 按需加载
+    """
     with out_js.open('w', encoding='utf-8') as f:
         f.write('var np = {float64: v=>parseFloat(v), int64: v=>parseInt(v,10)};\n')
         f.write(f'let page_caption = {json.dumps(PAGE_CAP)};\n')
@@ -573,7 +635,7 @@ try:
         f.write(f'let configs = {json.dumps(CONFIGS)};\n')
         f.write(f'let summary_caption = {json.dumps(SUMMARY_CAP)};\n')
         f.write(f'let summary_header = {json.dumps(SUMMARY_HEADER)};\n')
-        f.write(f'let summary_data = {json.dumps(SUMMARY_DATA)};\n')
+        f.write(f'let summary_data = {json.dumps(build_summary_data(cores))};\n')
         f.write(f'let ddr_bandwidth = {DDR_BW};\n')
         f.write(f'let l2_bandwidth = {L2_BW};\n')
         f.write(f'let dependCmds = {json.dumps(DEPEND_CMDS)};\n')
@@ -582,14 +644,98 @@ try:
         f.write(f'let lmem_partition = {json.dumps(LMEM_PARTITION)};\n')
         f.write(f'let time_header = {json.dumps(TIME_HEADER)};\n')
 
+        if split:
+            scripts = {str(core_id): core_js_path(out_js, core_id).name for core_id in cores}
+            f.write(f'let core_scripts = {json.dumps(scripts)};\n')
+        else:
+            for core_id, core in cores.items():
+                write_core_js(f, core_id, core)
+
+    if split:
         for core_id, core in cores.items():
-            f.write(f'window.time_data{core_id} = {json.dumps(core.time_data)};\n')
-            f.write(f'window.lmem_op_record{core_id} = {json.dumps(core.lmem_record)};\n')
-            # lane 暂无
-            f.write(f'window.lane_op_record{core_id} = [];\n')
+            with core_js_path(out_js, core_id).open('w', encoding='utf-8') as f:
+                write_core_js(f, core_id, core)
 
-    print('[info] 已生成', out_js)
-    
-except Exception as e:
-    print(f"❌ 写入输出文件失败: {type(e).__name__}: {e}")
-    sys.exit(1)
+
+# ----------------------------------------------------------
+# 7. 命令行入口
+# ----------------------------------------------------------
+def parse_args(argv):
+    """
+    自动识别参数类型（从后往前）：[output.js]、bmodel.json、其余为 profile 文件/目录
+    返回 (profile_paths, bmodel_json, out_js, jobs, split)
+    """
+    if len(argv) < 2:
+        print("错误: 需要至少2个参数")
+        print(__doc__)
+        sys.exit(1)
+
+    args = list(argv)
+    jobs = None
+    for flag in ('-j', '--jobs'):
+        if flag in args:
+            i = args.index(flag)
+            try:
+                jobs = int(args[i + 1])
+            except (IndexError, ValueError):
+                print(f"错误: {flag} 需要整数参数")
+                sys.exit(1)
+            del args[i:i + 2]
+    split = '--split' in args
+    if split:
+        args.remove('--split')
+
+    out_js = pathlib.Path('profile_data.js')  # 默认输出文件
+    if args and args[-1].endswith('.js'):
+        out_js = pathlib.Path(args.pop())
+
+    # 识别bmodel.json (最后一个非.js参数)
+    if args and args[-1].endswith('.json'):
+        bmodel_json = pathlib.Path(args.pop())
+    else:
+        print("错误: 未找到bmodel.json文件")
+        print(__doc__)
+        sys.exit(1)
+
+    # 剩余参数为profile文件/目录
+    profile_paths = [pathlib.Path(p) for p in args]
+    if not profile_paths:
+        print("错误: 未提供任何profile文件或目录")
+        print(__doc__)
+        sys.exit(1)
+    return profile_paths, bmodel_json, out_js, jobs, split
+
+
+def main(argv=None):
+    profile_paths, bmodel_json, out_js, jobs, split = parse_args(sys.argv[1:] if argv is None else argv)
+
+    print(f'[info] 输入参数:')
+    print(f'  - Profile文件: {[str(p) for p in profile_paths]}')
+    print(f'  - bmodel.json: {bmodel_json}')
+    print(f'  - 输出文件: {out_js}')
+
+    profile_files = collect_profile_files(profile_paths)
+    if not profile_files:
+        print("❌ 错误: 未找到任何有效的profile文件")
+        sys.exit(1)
+    print(f'[info] 找到 {len(profile_files)} 个profile文件')
+
+    print(f'[info] 解析 bmodel: {bmodel_json}')
+    bmodel_ops = parse_bmodel(bmodel_json)   # 全部算子
+    print(f'[info] bmodel 共 {len(bmodel_ops)} 个算子')
+
+    cores = convert_profiles(profile_files, bmodel_ops, jobs)
+    print(f'[info] 共处理 {len(cores)} 个 core')
+
+    try:
+        write_profile_js(cores, out_js, split)
+        print('[info] 已生成', out_js)
+        if split:
+            print(f'[info] 已按 core 拆分 {len(cores)} 个数据脚本 -> {core_js_path(out_js, "<N>").name}')
+    except Exception as e:
+        print(f"❌ 写入输出文件失败: {type(e).__name__}: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -37,6 +37,7 @@ export function collectProducers(entries, laneOrder) {
  */
 export function buildDeps(entries, laneOrder) {
   const producers = collectProducers(entries, laneOrder);
+  const laneIdx = new Map(laneOrder.map((k, i) => [k, i]));
   const deps = [];
 
   entries.forEach(e => {
@@ -49,11 +50,34 @@ export function buildDeps(entries, laneOrder) {
       op: e.tensor_name,
       ts: e.timestep,
       laneKey: `${e.timestep_type}_${e.timestep}`, 
-      laneIndex: laneOrder.indexOf(e.timestep_type), 
+      laneIndex: laneIdx.get(e.timestep_type), 
       cycStart: e._cycStart,
       cycEnd: e._cycEnd
     };
     deps.push({ from: producers.get(pname), to: consumer });
   });
   return deps;
-}
\ No newline at end of file
+}
+
+/**
+ * 由 parser 预建的依赖下标（TimestepParser._build_deps）还原依赖数组，格式同 buildDeps
+ * @param {Array} entries   分组 entries（_cycStart/_cycEnd 已由 parser 填好）
+ * @param {Object} index    {from: number[], to: number[]}
+ * @param {Array} laneOrder  泳道id数组
+ * @return 返回依赖数组
+ */
+export function depsFromIndex(entries, index, laneOrder) {
+  const laneIdx = new Map(laneOrder.map((k, i) => [k, i]));
+  const node = (e, op) => ({
+    op,
+    ts: e.timestep,
+    laneKey: `${e.timestep_type}_${e.timestep}`,
+    laneIndex: laneIdx.get(e.timestep_type),
+    cycStart: e._cycStart,
+    cycEnd: e._cycEnd
+  });
+  return index.from.map((p, k) => {
+    const to = entries[index.to[k]];
+    return { from: node(entries[p], entries[p].concerning_op_name), to: node(to, to.tensor_name) };
+  });
+}
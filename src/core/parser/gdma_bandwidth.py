@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GDMA 带宽时间桶（按方向 S2L/L2S/S2S/L2L、按 core）
+  - 每条 GDMA 传输的 size 在 [start, start + cost) 内均匀摊到固定宽度的 cycle 桶里
+  - 所有 core 共用以 cycle 0 为起点的同一套桶，前端可直接叠加对比
+  - 经过 DDR 的方向（S2L/L2S/S2S）合计后与 DDR Max BW 比较
+有 numpy 时整体向量化（bincount + cumsum，O(n + 桶数)），否则逐条按覆盖的桶累加
+usage:
+    python log_parser.py input_dir/ -o output_dir/ --bandwidth [--bw-bucket 1000] [--ddr-max-bw 34.132]
+"""
+import math
+from operator import itemgetter
+from typing import Any, Dict, List, Optional
+
+from interval_stats import DDR_DIRECTIONS
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# dr[0..3]，与 GDMA SUMMARY 的顺序一致
+DIRECTION_NAMES = ('S2L', 'L2S', 'S2S', 'L2L')
+# GB/s/core，同 convert.py CONFIGS['DDR Max BW(GB/s/Core)']（日志的芯片段不含该项）
+DEFAULT_DDR_MAX_BW = 34.132
+# 未指定桶宽时，按最长 core 的时长切成约这么多个桶
+AUTO_BUCKETS = 512
+COLUMNS = ('start', 'cost', 'size', 'direction')
+
+
+def _column(rows, key):
+    """C 层 map(itemgetter) 取列；个别条目缺字段时退回逐条 get"""
+    try:
+        return list(map(itemgetter(key), rows))
+    except KeyError:
+        return [e.get(key, -1 if key == 'direction' else 0) for e in rows]
+
+
+def gdma_columns(entries: List[Dict[str, Any]]):
+    """GDMA 条目 -> (start, cost, size, direction) 四列，只保留 size > 0 且方向合法的传输"""
+    rows = [e for e in entries if e['engine'] == 'GDMA']
+    cols = [_column(rows, k) for k in COLUMNS]
+    nd = len(DIRECTION_NAMES)
+    if HAS_NUMPY:
+        s, c, sz, d = (np.asarray(col, dtype=np.int64) for col in cols)
+        keep = (sz > 0) & (d >= 0) & (d < nd)
+        return s[keep], c[keep], sz[keep], d[keep]
+    keep = [i for i, (z, d) in enumerate(zip(cols[2], cols[3])) if z and 0 <= d < nd]
+    return tuple([col[i] for i in keep] for col in cols)
+
+
+def _max_end(cols) -> Optional[int]:
+    s, c = cols[0], cols[1]
+    if not len(s):
+        return None
+    if HAS_NUMPY:
+        return int((s + np.maximum(c, 1)).max())
+    return max(x + max(y, 1) for x, y in zip(s, c))
+
+
+def _spread_np(cols, width: int, nb: int):
+    """
+    F_d(T) = Σ r·clamp(T - s, 0, cost)（r = size / cost）为方向 d 在 [0, T) 内搬运的字节数，
+    分段线性：s 处斜率 +r，s + cost 处斜率 -r。事件 t 影响所有 T_j = j·width ≥ t 的边界，
+    故 F(T_j) = T_j·ΣA - ΣB（A = ±r, B = ±r·t 按 ceil(t / width) 累加后做前缀和）
+    """
+    nd = len(DIRECTION_NAMES)
+    s, c, sz, d = (a.astype(np.float64) if i < 3 else a for i, a in enumerate(cols))
+    out = np.zeros((nd, nb))
+
+    # 零时长：整包计入起点所在桶
+    point = c <= 0
+    if point.any():
+        k = d[point] * nb + (s[point] // width).astype(np.int64)
+        out += np.bincount(k, weights=sz[point], minlength=nd * nb).reshape(nd, nb)
+
+    span = ~point
+    s, c, sz, d = s[span], c[span], sz[span], d[span]
+    r = sz / c
+    t = np.concatenate((s, s + c))
+    w = np.concatenate((r, -r))
+    j = np.ceil(t / width).astype(np.int64)
+    idx = np.concatenate((d, d)) * (nb + 1) + j
+    size = nd * (nb + 1)
+    A = np.bincount(idx, weights=w, minlength=size).reshape(nd, nb + 1).cumsum(axis=1)
+    B = np.bincount(idx, weights=w * t, minlength=size).reshape(nd, nb + 1).cumsum(axis=1)
+    F = np.arange(nb + 1, dtype=np.float64) * width * A - B
+    out += np.diff(F, axis=1)
+    return np.clip(np.rint(out), 0, None).astype(np.int64).tolist()
+
+
+def _spread_py(cols, width: int, nb: int):
+    out = [[0.0] * nb for _ in DIRECTION_NAMES]
+    for s, c, sz, d in zip(*cols):
+        row = out[d]
+        if c <= 0:
+            row[s // width] += sz
+            continue
+        end, r = s + c, sz / c
+        for b in range(s // width, min(math.ceil(end / width), nb)):
+            lo, hi = max(s, b * width), min(end, (b + 1) * width)
+            if hi > lo:
+                row[b] += r * (hi - lo)
+    return [[max(0, round(v)) for v in row] for row in out]
+
+
+def _trim(row: List[int]) -> List[int]:
+    """去掉末尾的 0 桶"""
+    n = len(row)
+    while n and not row[n - 1]:
+        n -= 1
+    return row[:n]
+
+
+def build_bandwidth_timeline(
+    profiles: List[Dict[str, Any]],
+    bucket_cycles: Optional[int] = None,
+    ddr_max_bw: float = DEFAULT_DDR_MAX_BW,
+    tiu_mhz: int = 1000,
+) -> Optional[Dict[str, Any]]:
+    """
+    返回 {bucketCycles, bucketUs, buckets, ddrMaxBW, cores: [{core, bytes: {方向: [每桶字节]}, ...}]}
+    bytes 只保留非全零的方向并去掉末尾 0 桶；GB/s = bytes / bucketUs / 1e3。无 GDMA 传输时返回 None
+    """
+    per_core = [gdma_columns(p.get('entries') or []) for p in profiles]
+    ends = [m for m in map(_max_end, per_core) if m is not None]
+    if not ends:
+        return None
+    max_end = max(ends)
+    width = int(bucket_cycles) if bucket_cycles and bucket_cycles > 0 else max(1, math.ceil(max_end / AUTO_BUCKETS))
+    nb = math.ceil(max_end / width)
+    bucket_us = width / tiu_mhz
+    to_gbps = lambda b: b / bucket_us / 1e3       # bytes / (us * 1e-6) / 1e9
+    spread = _spread_np if HAS_NUMPY else _spread_py
+
+    cores = []
+    for core_id, cols in enumerate(per_core):
+        if not len(cols[0]):
+            continue
+        rows = spread(cols, width, nb)
+        ddr = [sum(col) for col in zip(*(rows[d] for d in DDR_DIRECTIONS))]
+        busy = [b for b in ddr if b]
+        peak = to_gbps(max(ddr))
+        cores.append({
+            'core': core_id,
+            'bytes': {name: _trim(row) for name, row in zip(DIRECTION_NAMES, rows) if any(row)},
+            'ddrPeakGBps': round(peak, 3),
+            'ddrAvgGBps': round(to_gbps(sum(busy) / len(busy)), 3) if busy else 0.0,
+            'ddrPeakUtil': round(peak / ddr_max_bw * 100, 2) if ddr_max_bw else None,
+            'overMaxBuckets': sum(1 for b in ddr if to_gbps(b) > ddr_max_bw) if ddr_max_bw else 0,
+        })
+    return {
+        'bucketCycles': width,
+        'bucketUs': bucket_us,
+        'buckets': nb,
+        'ddrMaxBW': ddr_max_bw,
+        'directions': list(DIRECTION_NAMES),
+        'cores': cores,
+    }
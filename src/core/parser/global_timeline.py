@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多 core 全局时间线（heapq k 路归并各 core 已按 start 排序的流，不拼接后整体重排）
+  - merge_entries：全局按 start 有序的 (core_id, entry) 流，用于导出 timeline.csv
+  - busy_segments：单 core 指令区间的流式并集
+  - build_global_timeline：归并各 core 忙碌段的 +1/-1 事件，得到
+      活跃 core 数分段、按时间桶的平均活跃 core 数、各活跃数的累计时长、
+      全局空闲（所有 core 同时空闲）报告
+usage:
+    python log_parser.py input_dir/ -o output_dir/ --timeline [--buckets 256]
+"""
+import csv
+import heapq
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from log_parser import open_output
+
+# 参与统计的指令引擎（LAYER 为合成条目，不计入）
+INSTR_ENGINES = ('BD', 'GDMA')
+IDLE_TOP = 20
+
+TIMELINE_CSV_KEYS = ['core_id', 'engine', 'op', 'type', 'start', 'end', 'cost']
+
+
+def _instr_entries(entries: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    return (e for e in entries if e.get('engine') in INSTR_ENGINES)
+
+
+def _tagged(core_id: int, entries):
+    for e in _instr_entries(entries):
+        yield e['start'], core_id, e
+
+
+def merge_entries(profiles: List[Dict[str, Any]]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """各 core entries（已按 start 排序）k 路归并为全局 start 序，start 相同按 core 顺序"""
+    streams = [_tagged(core_id, prof.get('entries') or []) for core_id, prof in enumerate(profiles)]
+    for _, core_id, e in heapq.merge(*streams, key=itemgetter(0)):
+        yield core_id, e
+
+
+def busy_segments(entries: Iterable[Dict[str, Any]]) -> Iterator[Tuple[int, int]]:
+    """按 start 有序的指令流 -> 合并后的忙碌段 (start, end)，end = start + cost"""
+    cur_s = cur_e = None
+    for e in _instr_entries(entries):
+        s, end = e['start'], e['start'] + e['cost']
+        if cur_e is not None and s <= cur_e:
+            if end > cur_e:
+                cur_e = end
+            continue
+        if cur_e is not None:
+            yield cur_s, cur_e
+        cur_s, cur_e = s, end
+    if cur_e is not None:
+        yield cur_s, cur_e
+
+
+def _core_events(core_id: int, entries):
+    """单 core 的 (t, +1/-1, core) 事件，忙碌段互不相接，事件天然有序"""
+    for s, e in busy_segments(entries):
+        yield s, 1, core_id
+        yield e, -1, core_id
+
+
+def active_segments(profiles: List[Dict[str, Any]]) -> Iterator[Tuple[int, int, int, int, int]]:
+    """
+    全局扫描线：产出 (t0, t1, 活跃 core 数, t0 处事件所属 core, t1 处事件所属 core)
+    相邻同计数的段不合并，长度为 0 的段跳过
+    """
+    streams = [_core_events(core_id, prof.get('entries') or []) for core_id, prof in enumerate(profiles)]
+    active, prev_t, prev_core = 0, None, -1
+    for t, delta, core_id in heapq.merge(*streams, key=itemgetter(0)):
+        if prev_t is not None and t > prev_t:
+            yield prev_t, t, active, prev_core, core_id
+        active += delta
+        prev_t, prev_core = t, core_id
+
+
+def build_global_timeline(profiles: List[Dict[str, Any]], buckets: int = 256,
+                          idle_top: int = IDLE_TOP) -> Optional[Dict[str, Any]]:
+    """全局时间线统计（单位 cycle），无任何指令时返回 None"""
+    segs = list(active_segments(profiles))
+    if not segs:
+        return None
+    begin, end = segs[0][0], segs[-1][1]
+    span = end - begin
+    size = max(span / buckets, 1e-9)
+    acc = [0.0] * buckets
+    hist: Dict[int, int] = {}
+    idle = []
+    for t0, t1, n, before, after in segs:
+        hist[n] = hist.get(n, 0) + (t1 - t0)
+        if n == 0:
+            idle.append((t0, t1, before, after))
+            continue
+        # 活跃数 * 时长 按桶累加
+        b0, b1 = int((t0 - begin) / size), min(int((t1 - begin) / size), buckets - 1)
+        for b in range(b0, b1 + 1):
+            lo = max(t0, begin + b * size)
+            hi = min(t1, begin + (b + 1) * size)
+            if hi > lo:
+                acc[b] += n * (hi - lo)
+
+    idle.sort(key=lambda g: g[1] - g[0], reverse=True)
+    return {
+        'cores': sum(1 for p in profiles if next(_instr_entries(p.get('entries') or []), None)),
+        'begin': begin,
+        'end': end,
+        'bucketSize': size,
+        'activeCores': [round(v / size, 3) for v in acc],
+        'activeHistogram': {str(n): hist[n] for n in sorted(hist)},
+        'idle': {
+            'total': sum(t1 - t0 for t0, t1, _, _ in idle),
+            'count': len(idle),
+            'top': [{'start': t0, 'end': t1, 'duration': t1 - t0,
+                     'lastCore': before, 'nextCore': after}
+                    for t0, t1, before, after in idle[:idle_top]],
+        },
+    }
+
+
+def write_timeline_csv(profiles: List[Dict[str, Any]], out_dir: Path,
+                       compress: Optional[str] = None) -> Path:
+    """全局有序指令流逐行写出 timeline.csv，不在内存中拼接各 core"""
+    f, out_path = open_output(out_dir / 'timeline.csv', compress, newline='')
+    with f:
+        writer = csv.writer(f)
+        writer.writerow(TIMELINE_CSV_KEYS)
+        for core_id, e in merge_entries(profiles):
+            writer.writerow([core_id, e.get('engine'), e.get('op'), e.get('type'),
+                             e.get('start'), e.get('end'), e.get('cost')])
+    print(f'[timeline] 已导出 -> {out_path}')
+    return out_path
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+热点 layer / op 汇总（跨所有 core）
+  - layers     ：LAYER 条目按 (file_line, op, type) 聚合
+  - ops        ：LAYER 条目按 op 名聚合
+  - instrTypes ：BD / GDMA 指令按 (engine, type) 聚合
+每组统计次数、总/平均/p95 cycle、指令数、搬运字节数；一次遍历哈希聚合，
+heapq.nlargest 按总 cycle 取 top N，p95 只对入选的组排序计算
+usage:
+    python log_parser.py input_dir/ -o output_dir/ --top 50          # 缺省不生成
+    python log_parser.py batch 'runs/*' -o out_root/ --top 50
+"""
+import heapq
+import math
+from array import array
+from typing import Any, Dict, List, Tuple
+
+DEFAULT_TOP = 50
+INSTR_ENGINES = ('BD', 'GDMA')
+
+
+class _Group:
+    __slots__ = ('costs', 'instr', 'bytes', 'cores')
+
+    def __init__(self):
+        self.costs = array('q')
+        self.instr = 0
+        self.bytes = 0
+        self.cores = set()
+
+
+def _p95(costs: array) -> int:
+    """最近秩法 p95"""
+    s = sorted(costs)
+    return s[max(0, math.ceil(len(s) * 0.95) - 1)]
+
+
+def new_tables() -> Dict[str, Dict[Tuple, _Group]]:
+    return {'layers': {}, 'ops': {}, 'instrTypes': {}}
+
+
+def add_profile(tables: Dict[str, Dict[Tuple, _Group]], core_id: int, prof: Dict[str, Any]):
+    """把一个 core 的 entries 累加进聚合表（流式写出时逐 core 调用）"""
+    layers, ops, types = tables['layers'], tables['ops'], tables['instrTypes']
+    for e in prof.get('entries') or []:
+        eng = e.get('engine')
+        if eng == 'LAYER':
+            instr = e.get('bdCount', 0) + e.get('gdmaCount', 0)
+            keys = ((layers, (e.get('file_line'), e['op'], e.get('type'))), (ops, (e['op'],)))
+            nbytes = e.get('bytes', 0)
+        elif eng in INSTR_ENGINES:
+            instr, nbytes = 1, e.get('size', 0) if eng == 'GDMA' else 0
+            keys = ((types, (eng, e.get('type'))),)
+        else:
+            continue
+        for table, key in keys:
+            g = table.get(key)
+            if g is None:
+                g = table[key] = _Group()
+            g.costs.append(e['cost'])
+            g.instr += instr
+            g.bytes += nbytes
+            g.cores.add(core_id)
+
+
+def aggregate(profiles: List[Dict[str, Any]]) -> Dict[str, Dict[Tuple, _Group]]:
+    tables = new_tables()
+    for core_id, prof in enumerate(profiles):
+        add_profile(tables, core_id, prof)
+    return tables
+
+
+KEY_FIELDS = {
+    'layers': ('file_line', 'op', 'type'),
+    'ops': ('op',),
+    'instrTypes': ('engine', 'type'),
+}
+
+
+def top_table(table: Dict[Tuple, _Group], fields: Tuple[str, ...], top: int) -> List[Dict[str, Any]]:
+    total_all = sum(sum(g.costs) for g in table.values())
+    totals = ((sum(g.costs), key, g) for key, g in table.items())
+    rows = []
+    for total, key, g in heapq.nlargest(top, totals, key=lambda t: t[0]):
+        n = len(g.costs)
+        rows.append({
+            **dict(zip(fields, key)),
+            'count': n,
+            'totalCycle': total,
+            'meanCycle': round(total / n, 2),
+            'p95Cycle': _p95(g.costs),
+            'share': round(total / total_all * 100, 2) if total_all else 0.0,
+            'instrCount': g.instr,
+            'bytes': g.bytes,
+            'cores': sorted(g.cores),
+        })
+    return rows
+
+
+def build_hotspots(profiles: List[Dict[str, Any]], top: int = DEFAULT_TOP) -> Dict[str, Any]:
+    return hotspots_from_tables(aggregate(profiles), top)
+
+
+def hotspots_from_tables(tables: Dict[str, Dict[Tuple, _Group]], top: int = DEFAULT_TOP) -> Dict[str, Any]:
+    return {'top': top, **{name: top_table(tables[name], KEY_FIELDS[name], top) for name in KEY_FIELDS}}
+
+
+def print_hotspots(hot: Dict[str, Any], limit: int = 10):
+    rows = hot['layers'] or hot['instrTypes']
+    if not rows:
+        return
+    print(f'[hotspots] top {min(limit, len(rows))}（按总 cycle）:')
+    for r in rows[:limit]:
+        name = f"{r.get('file_line', r.get('engine'))} {r['type']}"
+        print(f"  {name:<32} total={r['totalCycle']:<10} mean={r['meanCycle']:<10} "
+              f"p95={r['p95Cycle']:<8} x{r['count']} ({r['share']}%)")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+区间并集 / 重叠统计（排序 + 归并，O(n log n)；有 numpy 时整体向量化）
+  - merge_intervals / union_length：同一引擎指令区间合并后的忙碌时间
+  - busy_summary：单 core 的 TIU / GDMA 忙碌、重叠、并行度与 DDR 平均带宽
+  - IntervalUnion / BusyTracker：同样的统计逐条累加（watch 模式每轮只处理新增指令）
+供 convert.py 的 Summary Table 与 log_parser.py 的 profile settings 共用，
+时间单位由调用方决定（cycle 或 us），unit_us 为 1 个单位对应的微秒数
+"""
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# 经过 DDR 的 GDMA 方向：dr[0] S2L / dr[1] L2S / dr[2] S2S（dr[3] L2L 不经过 DDR）
+DDR_DIRECTIONS = (0, 1, 2)
+
+
+def _merge_np(starts, ends):
+    s = np.asarray(starts, dtype=np.float64)
+    e = np.asarray(ends, dtype=np.float64)
+    order = np.argsort(s, kind='stable')
+    s, e = s[order], e[order]
+    reach = np.maximum.accumulate(e)                 # 前缀最大 end
+    brk = np.flatnonzero(s[1:] > reach[:-1]) + 1     # 新合并段的起点
+    lo = np.concatenate(([0], brk))
+    hi = np.concatenate((brk - 1, [len(s) - 1]))
+    return s[lo], reach[hi]
+
+
+def merge_intervals(starts: Sequence[float], ends: Sequence[float]) -> Tuple[List[float], List[float]]:
+    """合并区间（首尾相接视为连续），返回按 start 升序且互不相交的 (starts, ends)"""
+    if len(starts) == 0:
+        return [], []
+    if HAS_NUMPY:
+        ms, me = _merge_np(starts, ends)
+        return ms.tolist(), me.tolist()
+
+    out_s, out_e = [], []
+    order = sorted(range(len(starts)), key=starts.__getitem__)
+    cur_s, cur_e = starts[order[0]], ends[order[0]]
+    for i in order:
+        s, e = starts[i], ends[i]
+        if s <= cur_e:
+            if e > cur_e:
+                cur_e = e
+            continue
+        out_s.append(cur_s)
+        out_e.append(cur_e)
+        cur_s, cur_e = s, e
+    out_s.append(cur_s)
+    out_e.append(cur_e)
+    return out_s, out_e
+
+
+def union_length(starts: Sequence[float], ends: Sequence[float]) -> float:
+    """区间并集总长度"""
+    if len(starts) == 0:
+        return 0
+    if HAS_NUMPY:
+        ms, me = _merge_np(starts, ends)
+        return float(np.sum(me - ms))
+    ms, me = merge_intervals(starts, ends)
+    return sum(e - s for s, e in zip(ms, me))
+
+
+def busy_summary(
+    bd_starts: Sequence[float], bd_ends: Sequence[float],
+    gdma_starts: Sequence[float], gdma_ends: Sequence[float],
+    ddr_bytes: int = 0, unit_us: float = 1.0,
+) -> Dict[str, Any]:
+    """
+    单 core 汇总：
+      span        = 全部指令 max(end) - min(start)
+      tiuBusy     = BD 区间并集长度，gdmaBusy 同理
+      overlap     = TIU 与 GDMA 同时忙碌的时间 = tiuBusy + gdmaBusy - |BD ∪ GDMA|
+      parallelism = (tiuBusy + gdmaBusy) / span（%），tiuWorkingRatio = tiuBusy / span（%）
+      gdmaDdrAvgBandwidth = DDR 方向字节数 / gdmaBusy（GB/s）
+    """
+    all_starts = list(bd_starts) + list(gdma_starts)
+    all_ends = list(bd_ends) + list(gdma_ends)
+    if not all_starts:
+        return _summary(0, 0, 0, 0, 0, ddr_bytes, unit_us)
+    return _summary(min(all_starts), max(all_ends),
+                    union_length(bd_starts, bd_ends), union_length(gdma_starts, gdma_ends),
+                    union_length(all_starts, all_ends), ddr_bytes, unit_us)
+
+
+def _summary(begin, end, tiu, gdma, busy_all, ddr_bytes: int, unit_us: float) -> Dict[str, Any]:
+    span = end - begin
+    overlap = tiu + gdma - busy_all
+    busy_us = gdma * unit_us
+    return {
+        'begin': begin,
+        'end': end,
+        'span': span,
+        'tiuBusy': tiu,
+        'gdmaBusy': gdma,
+        'overlap': overlap,
+        'parallelism': round((tiu + gdma) / span * 100, 2) if span else 0.0,
+        'tiuWorkingRatio': round(tiu / span * 100, 2) if span else 0.0,
+        'ddrBytes': ddr_bytes,
+        # bytes / (us * 1e-6) / 1e9
+        'gdmaDdrAvgBandwidth': round(ddr_bytes / busy_us / 1e3, 2) if busy_us else 0.0,
+    }
+
+
+class IntervalUnion:
+    """增量区间并集：有序不相交的 [s0, e0, s1, e1, ...]（首尾相接合并）+ 总长度"""
+
+    def __init__(self):
+        self.iv: List[float] = []
+        self.length = 0
+
+    def add(self, a: float, b: float):
+        """并入 [a, b]：二分定位，只改动与之相交的段（按时间追加时落在末尾，O(log n)）"""
+        iv = self.iv
+        i = bisect_left(iv, a)
+        j = bisect_right(iv, b)
+        if i & 1:
+            i -= 1
+            a = iv[i]
+        if j & 1:
+            b = iv[j]
+            j += 1
+        self.length += (b - a) - sum(iv[k + 1] - iv[k] for k in range(i, j, 2))
+        iv[i:j] = (a, b)
+
+
+class BusyTracker:
+    """busy_summary 的增量版本：逐条加入 BD / GDMA 区间，summary() 与 busy_summary 结果一致"""
+
+    def __init__(self):
+        self.tiu, self.gdma, self.all = IntervalUnion(), IntervalUnion(), IntervalUnion()
+        self.begin: Optional[float] = None
+        self.end: Optional[float] = None
+        self.ddr_bytes = 0
+
+    def add(self, is_tiu: bool, start: float, end: float, ddr_bytes: int = 0):
+        (self.tiu if is_tiu else self.gdma).add(start, end)
+        self.all.add(start, end)
+        if self.begin is None or start < self.begin:
+            self.begin = start
+        if self.end is None or end > self.end:
+            self.end = end
+        self.ddr_bytes += ddr_bytes
+
+    def summary(self, unit_us: float = 1.0) -> Dict[str, Any]:
+        if self.begin is None:
+            return _summary(0, 0, 0, 0, 0, self.ddr_bytes, unit_us)
+        return _summary(self.begin, self.end, self.tiu.length, self.gdma.length,
+                        self.all.length, self.ddr_bytes, unit_us)
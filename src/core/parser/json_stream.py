@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+result.json 流式写出：不先 json.dumps 成一个整串，按层逐段编码直接写文件
+  - 外层 STREAM_DEPTH 层的 dict / list 逐键、逐元素展开，最内层的列表（如 profile[i].entries）
+    每 CHUNK 个元素编码一次；更深的值整体 json.dumps
+  - list 位置可以是生成器（如逐 core 解析的 profile），写到时才拉取，写完即可释放
+  - tail 为 {键: 无参函数}：顶层原有的键写完后才求值、追加写出并存回顶层 dict，用于依赖前面流式数据的汇总
+  - 默认紧凑分隔符；indent 指定时与 json.dumps(obj, indent=indent) 逐字节一致
+"""
+import json
+from typing import Any, Callable, Dict, IO, Iterator, Optional
+
+STREAM_DEPTH = 4      # result -> profile[] -> core{} -> entries[]
+CHUNK = 2048
+
+
+class _Writer:
+    def __init__(self, indent: Optional[int]):
+        self.indent = indent
+        self.enc = json.JSONEncoder(ensure_ascii=False, indent=indent,
+                                    separators=(',', ': ') if indent is not None else (',', ':'))
+        self.key_sep = ': ' if indent is not None else ':'
+
+    def nl(self, level: int) -> str:
+        return '' if self.indent is None else '\n' + ' ' * (self.indent * level)
+
+    def dump(self, obj: Any, level: int) -> str:
+        s = self.enc.encode(obj)
+        # 整体编码的值按当前层级整体右移（JSON 字符串内不会有裸换行）
+        return s if self.indent is None or not level else s.replace('\n', self.nl(level))
+
+    def iter(self, obj: Any, level: int, depth: int) -> Iterator[str]:
+        if depth <= 0 or isinstance(obj, (str, bytes)) or obj is None:
+            yield self.dump(obj, level)
+        elif isinstance(obj, dict):
+            yield from self._iter_dict(obj, level, depth)
+        elif isinstance(obj, (list, tuple)) or hasattr(obj, '__next__'):
+            yield from self._iter_list(obj, level, depth)
+        else:
+            yield self.dump(obj, level)
+
+    def _iter_dict(self, obj: dict, level: int, depth: int,
+                   tail: Optional[Dict[str, Callable[[], Any]]] = None) -> Iterator[str]:
+        if not (obj or tail) or not all(isinstance(k, str) for k in obj):
+            yield self.dump(obj, level)
+            return
+        inner = self.nl(level + 1)
+        sep = '{' + inner
+        tail = tail or {}
+        keys = [(k, None) for k in obj if k not in tail] + list(tail.items())
+        for k, fn in keys:
+            if fn is not None:
+                obj[k] = fn()
+            yield sep + self.enc.encode(k) + self.key_sep
+            yield from self.iter(obj[k], level + 1, depth - 1)
+            sep = ',' + inner
+        yield self.nl(level) + '}'
+
+    def _iter_list(self, obj, level: int, depth: int) -> Iterator[str]:
+        inner = self.nl(level + 1)
+        opened = False
+        if depth > 1:
+            for item in obj:
+                yield (',' + inner) if opened else ('[' + inner)
+                opened = True
+                yield from self.iter(item, level + 1, depth - 1)
+        else:
+            item_sep = ',' + inner
+            chunk = []
+            for item in obj:
+                chunk.append(self.dump(item, level + 1))
+                if len(chunk) >= CHUNK:
+                    yield (item_sep if opened else '[' + inner) + item_sep.join(chunk)
+                    opened, chunk = True, []
+            if chunk:
+                yield (item_sep if opened else '[' + inner) + item_sep.join(chunk)
+                opened = True
+        yield (self.nl(level) + ']') if opened else '[]'
+
+
+def iter_json(obj: Any, indent: Optional[int] = None, depth: int = STREAM_DEPTH,
+              tail: Optional[Dict[str, Callable[[], Any]]] = None) -> Iterator[str]:
+    w = _Writer(indent)
+    return w._iter_dict(obj, 0, depth, tail) if tail else w.iter(obj, 0, depth)
+
+
+def write_json(obj: Any, f: IO[str], indent: Optional[int] = None, depth: int = STREAM_DEPTH,
+               tail: Optional[Dict[str, Callable[[], Any]]] = None) -> int:
+    """逐段写入文本流，返回写出的字符数；tail 求得的值写完后留在 obj 中"""
+    n = 0
+    for s in iter_json(obj, indent, depth, tail):
+        f.write(s)
+        n += len(s)
+    return n
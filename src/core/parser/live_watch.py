@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+watch 模式：跟随输入目录中持续增长的日志，只解析新追加的字节
+usage:
+    python log_parser.py input_dir/ -o output_dir/ --watch [--interval 2]
+    python log_parser.py serve input_dir/ --watch                # 查询服务实时更新
+
+  - 每个 compiler_profile_N 持有一个 ProfileParser 实例，按偏移量读取新增完整行并 feed
+  - CoreTimeline 维护该 core 按 start 有序的 entries：新指令与受其影响的 LAYER 排序后归并进尾部，
+    区间 / 倒排索引与忙碌统计也只处理这段尾部，每轮开销与新增量相关而不是与 core 总条数相关
+  - result.json 整体重写由 WriteThrottle 限频：间隔至少 max(interval, WRITE_BACKOFF × 上次写出耗时)，
+    期间的变化累积到下次写出；concurrency 等整 core 统计只在写出（materialize）时计算
+  - 主日志经 LogSectionStream 增量分段，LmemParser / TimestepParser 持续 feed，只重算变化的分组
+  - 只消费到最后一个换行为止；末尾不完整的行/段只在结束时（Ctrl+C 或主日志出现 profile 分隔标记）才处理，
+    写入方停顿一个轮询周期也不会把半行当作完整行解析
+  - 压缩输入无法追加读取，只在出现时完整解析一次
+"""
+import re
+import time
+import heapq
+import asyncio
+from bisect import bisect_left
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from log_parser import (
+    ProfileParser, LmemParser, TimestepParser, MemoryStatistics, LayerExtractor,
+    LogSectionStream, ProfileIndex, ParseSelection, COMPRESS_SUFFIX, LMEM_OP_RE, TS_OP_RE,
+    glob_inputs, find_main_log, open_input, detect_codec, busy_settings,
+    empty_result, write_result_json, export_tables,
+)
+from interval_stats import BusyTracker, DDR_DIRECTIONS
+from concurrency import analyze_concurrency
+
+PROFILE_NAME_RE = re.compile(r'compiler_profile_(\d+)')
+# 两次整体写出的最小间隔 = 上次写出耗时的倍数（result.json 越大写得越稀）
+WRITE_BACKOFF = 4
+
+
+class FileTail:
+    """按字节偏移追加读取文本文件，保留末尾不完整的行"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.offset = 0
+        self.partial = b''
+
+    def read_new(self) -> Optional[str]:
+        """返回新增的完整行文本（到最后一个换行为止）；文件被截断时返回 None（调用方需重置状态）"""
+        size = self.path.stat().st_size
+        if size < self.offset:
+            self.offset, self.partial = 0, b''
+            return None
+        if size == self.offset:
+            return ''
+        with self.path.open('rb') as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        self.offset += len(data)
+        buf = self.partial + data
+        cut = buf.rfind(b'\n') + 1
+        self.partial = buf[cut:]
+        return buf[:cut].decode('utf-8', errors='ignore')
+
+    def flush(self) -> str:
+        """文件已结束：交出末尾没有换行的剩余部分"""
+        rest, self.partial = self.partial, b''
+        return rest.decode('utf-8', errors='ignore')
+
+
+class MainLogState:
+    """主日志的增量解析状态"""
+
+    def __init__(self, path: Path, selection: Optional[ParseSelection] = None):
+        self.tail = FileTail(path)
+        self.sel = selection or ParseSelection()
+        self.reset()
+
+    def reset(self):
+        self.sections = LogSectionStream()
+        self.lmem = None                  # chip 规格出现后才创建（bank_id 依赖 lmem_bank_bytes）
+        self.pending_lmem = []
+        self.timestep = TimestepParser()
+        self.stats = MemoryStatistics()
+
+    def poll(self, final: bool = False) -> Dict[str, List[int]]:
+        """final=True 表示日志已写完：末尾不完整的行与最后一段也一并处理"""
+        text = self.tail.read_new()
+        if text is None:
+            self.reset()
+            text = self.tail.read_new()
+        if final:
+            text += self.tail.flush()
+        lmem_secs, ts_secs = self.sections.feed(text, flush=final)
+        sel = self.sel
+        lmem_secs = [x for x in lmem_secs if sel.keep_section(x, LMEM_OP_RE)] if sel.want('lmem') else []
+        ts_secs = [x for x in ts_secs if sel.keep_section(x, TS_OP_RE)] if sel.want('timestep') else []
+        changed = {'lmem': [], 'timestep': self.timestep.feed(ts_secs) if ts_secs else []}
+        self.pending_lmem.extend(lmem_secs)
+        if self.pending_lmem and (self.sections.chip or self.sections.done):
+            if self.lmem is None:
+                self.lmem = LmemParser(chip=self.sections.chip)
+            changed['lmem'] = self.lmem.feed(self.pending_lmem)
+            self.pending_lmem = []
+        return changed
+
+
+class CoreTimeline:
+    """
+    单 core 的增量 profile，与 ProfileParser.build 的结果一致：
+      entries 按 (start, 指令在前 / LAYER 在后, 文件顺序 / ops 下标) 有序，即 build 中稳定排序的次序
+    """
+
+    def __init__(self, parser: ProfileParser, layer_ext: Optional[LayerExtractor],
+                 core_id: int, tiu_mhz: int = 1000):
+        self.parser, self.layer_ext = parser, layer_ext
+        self.core_id, self.tiu_mhz = core_id, tiu_mhz
+        self.fed = 0                                   # 已处理的 parser.entries 条数
+        self.entries: List[Dict[str, Any]] = []
+        self.keys: List[Tuple[int, int, int]] = []     # 与 entries 一一对应的排序键
+        self.index = ProfileIndex(self.entries)
+        self.busy = BusyTracker()
+        self.bd_map: Dict[int, Dict[str, Any]] = {}
+        self.gdma_map: Dict[int, Dict[str, Any]] = {}
+        self.layers: Dict[int, Tuple[Tuple[int, int, int], Dict[str, Any]]] = {}   # ops 下标 -> (键, 条目)
+        self.bd_owner, self.gdma_owner = layer_ext.instr_owners(core_id) if layer_ext else ({}, {})
+
+    def update(self) -> bool:
+        """处理 parser 新增的条目，返回是否有变化"""
+        new = self.parser.entries[self.fed:]
+        if not new:
+            return False
+        base, self.fed = self.fed, self.fed + len(new)
+        items, touched = [], set()
+        for k, e in enumerate(new):
+            items.append(((e['start'], 0, base + k), e))
+            end = e['start'] + e['cost']
+            if e['engine'] == 'BD':
+                self.busy.add(True, e['start'], end)
+                if 'bd_id' in e:
+                    self.bd_map[e['bd_id']] = e
+                    touched.update(self.bd_owner.get(e['bd_id'], ()))
+            else:
+                ddr = e.get('size', 0) if e.get('direction') in DDR_DIRECTIONS else 0
+                self.busy.add(False, e['start'], end, ddr)
+                if 'gdma_id' in e:
+                    self.gdma_map[e['gdma_id']] = e
+                    touched.update(self.gdma_owner.get(e['gdma_id'], ()))
+
+        # 受影响的 layer 整条重算：start 不变的原地替换，其余旧条目移出、新条目随新指令一起归并
+        removed, same = set(), []
+        for i in touched:
+            old = self.layers.pop(i, None)
+            layer = self.layer_ext.layer_entry(i, self.bd_map, self.gdma_map)
+            item = ((layer['start'], 1, i), layer) if layer else None
+            if old and item and old[0] == item[0]:
+                same.append(item)
+            else:
+                if old:
+                    removed.add(old[0])
+                if item:
+                    items.append(item)
+            if item:
+                self.layers[i] = item
+
+        keys, entries = self.keys, self.entries
+        pos = bisect_left(keys, min(items, key=itemgetter(0))[0])
+        for key in removed:
+            pos = min(pos, bisect_left(keys, key))
+        # 两列格式中 GDMA 列可能远落后于 BD 列，新指令所属的 layer 常在很靠前的位置：
+        # start 未变时只替换该条目，不必把它之后的全部条目重新归并
+        replaced = {}
+        for key, layer in same:
+            p = bisect_left(keys, key)
+            if p < pos:
+                replaced[p] = entries[p]
+                entries[p] = layer
+            else:
+                removed.add(key)
+                items.append((key, layer))
+        items.sort(key=itemgetter(0))
+
+        old_tail = entries[pos:]
+        kept = [(key, e) for key, e in zip(keys[pos:], old_tail) if key not in removed]
+        merged = list(heapq.merge(kept, items, key=itemgetter(0)))
+        keys[pos:] = [key for key, _ in merged]
+        entries[pos:] = [e for _, e in merged]
+        self.index.splice(pos, old_tail, replaced)
+        return True
+
+    def profile(self, copy: bool = False) -> Dict[str, Any]:
+        """当前的 profile[i]；copy=True 时 entries / index 为副本，之后的 update 不会改动它"""
+        settings = self.parser.tail_summary()
+        if self.busy.begin is not None:
+            settings.update(busy_settings(self.busy.summary(1 / self.tiu_mhz)))
+        prof = {'settings': settings, 'entries': list(self.entries) if copy else self.entries}
+        concurrency = analyze_concurrency(self.entries)
+        if concurrency:
+            prof['concurrency'] = concurrency
+        if self.entries:
+            prof['index'] = self.index.to_json(copy)
+        return prof
+
+
+class RunWatcher:
+    """输入目录的增量解析器，poll() 一次处理所有文件的新增内容"""
+
+    def __init__(self, in_dir: Path, selection: Optional[ParseSelection] = None):
+        self.in_dir = in_dir
+        self.sel = selection or ParseSelection()
+        self.result = empty_result()
+        self.profiles: Dict[int, ProfileParser] = {}
+        self.tails: Dict[int, FileTail] = {}
+        self.main: Optional[MainLogState] = None
+        self.bmodel: Optional[Path] = None
+        self.bmodel_mtime = None
+        self.layer_ext: Optional[LayerExtractor] = None
+        self.timelines: Dict[int, CoreTimeline] = {}
+        self.stale: Set[int] = set()         # 有变化、尚未写回 result['profile'] 的 core
+
+    # ---- 文件发现 ----
+    def _discover(self) -> Set[int]:
+        dirty = set()
+        if self.main is None and (self.sel.want('lmem') or self.sel.want('timestep')):
+            log_file = find_main_log(self.in_dir)
+            if log_file:
+                print(f'[watch] 主日志: {log_file.name}')
+                self.main = MainLogState(log_file, self.sel)
+
+        if not self.sel.want('profile'):
+            return dirty
+        bmodel = next(iter(glob_inputs(self.in_dir, '*.bmodel.json')), None)
+        if bmodel:
+            mtime = bmodel.stat().st_mtime
+            if bmodel != self.bmodel or mtime != self.bmodel_mtime:
+                print(f'[watch] bmodel.json: {bmodel.name}')
+                self.bmodel, self.bmodel_mtime = bmodel, mtime
+                self.layer_ext = LayerExtractor(bmodel, self.sel)
+                self.result['opInfo'] = self.layer_ext.op_table
+                self.timelines.clear()               # layer 需全部重建
+                dirty.update(self.profiles)
+
+        for prof_path in sorted(self.in_dir.glob('compiler_profile_*')):
+            m = PROFILE_NAME_RE.search(prof_path.name)
+            if not m or int(m.group(1)) in self.tails or not self.sel.want_core(int(m.group(1))):
+                continue
+            n = int(m.group(1))
+            print(f'[watch] 跟随 profile: {prof_path.name} (core {n})')
+            self.tails[n] = FileTail(prof_path)
+            self.profiles[n] = ProfileParser(self.sel)
+            self.profiles[n].reset()
+        return dirty
+
+    # ---- 单轮增量 ----
+    def poll(self, final: bool = False) -> Dict[str, Any]:
+        """处理所有新增内容，返回 {'cores': 变化的 core, 'lmem': 分组, 'timestep': 分组}
+        final=True（结束跟随时）才处理各文件末尾没有换行的部分；profile 结果需 materialize() 取出"""
+        dirty_cores = self._discover()
+
+        for n, tail in self.tails.items():
+            parser = self.profiles[n]
+            if detect_codec(tail.path) and tail.offset == 0:
+                with open_input(tail.path) as fp:    # 压缩文件：完整解析一次
+                    parser.feed(fp)
+                tail.offset = tail.path.stat().st_size
+                dirty_cores.add(n)
+                continue
+            if tail.path.name.endswith(tuple(COMPRESS_SUFFIX.values())):
+                continue
+            text = tail.read_new()
+            if text is None:                         # 被截断：重置后从头读
+                parser.reset()
+                self.timelines.pop(n, None)
+                dirty_cores.add(n)
+                text = tail.read_new()
+            if final:
+                text += tail.flush()
+            if text:
+                parser.feed(text.splitlines())
+                dirty_cores.add(n)
+
+        for n in dirty_cores:
+            timeline = self.timelines.get(n)
+            if timeline is None:
+                timeline = self.timelines[n] = CoreTimeline(self.profiles[n], self.layer_ext, n)
+            timeline.update()
+            self.stale.add(n)
+
+        changed = {'cores': sorted(dirty_cores), 'lmem': [], 'timestep': []}
+        if self.main:
+            changed.update(self.main.poll(final))
+            self._rebuild_main(changed)
+        return changed
+
+    def materialize(self, copy: bool = False) -> Dict[str, Any]:
+        """把有变化的 core 写回 result['profile'] 并返回 result；
+        copy=True 时各 profile 与后续增量状态不共享列表（交给其他线程使用）"""
+        profiles = self.result['profile']
+        for n in sorted(self.stale):
+            while len(profiles) <= n:
+                profiles.append({'settings': {}, 'entries': []})
+            profiles[n] = self.timelines[n].profile(copy)
+        self.stale.clear()
+        self.result['valid']['profile'] = any(p['entries'] for p in profiles)
+        return self.result
+
+    def _rebuild_main(self, changed: Dict[str, Any]):
+        main, res = self.main, self.result
+        res['chip'] = main.sections.chip
+        if main.timestep.groups:
+            res['timestep'] = main.timestep.groups
+            res['valid']['timestep'] = True
+        if main.lmem and main.lmem.groups:
+            res['lmem'] = main.lmem.groups
+            res['valid']['lmem'] = True
+            if changed['lmem']:
+                res['summary'] = main.stats.update_groups(
+                    main.lmem.groups, main.lmem.get_global_max_timestep(), changed['lmem'])
+                res['valid']['summary'] = True
+
+
+def snapshot_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """浅拷贝顶层容器，避免后台解析线程与查询服务共用同一 list/dict"""
+    return {**result, 'profile': list(result['profile']), 'valid': dict(result['valid'])}
+
+
+class WriteThrottle:
+    """累积各轮 poll 的变化，限制整体写出的频率"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.cores: Set[int] = set()
+        self.main = False
+        self.last: Optional[float] = None
+        self.cost = 0.0
+        self._t0 = 0.0
+
+    def add(self, changed: Dict[str, Any]):
+        self.cores.update(changed['cores'])
+        self.main = self.main or bool(changed['lmem'] or changed['timestep'])
+
+    def pending(self) -> bool:
+        return bool(self.cores or self.main)
+
+    def due(self) -> bool:
+        if not self.pending():
+            return False
+        return self.last is None or time.monotonic() - self.last >= max(self.interval, WRITE_BACKOFF * self.cost)
+
+    def take(self) -> Tuple[List[int], bool]:
+        """取出并清空累积的变化：(变化的 core, 主日志是否变化)，同时开始计时"""
+        out = sorted(self.cores), self.main
+        self.cores, self.main = set(), False
+        self._t0 = time.monotonic()
+        return out
+
+    def done(self):
+        self.last = time.monotonic()
+        self.cost = self.last - self._t0
+
+
+def watch_to_output(in_dir: Path, out_dir: Path, compress: Optional[str] = None,
+                    interval: float = 2.0, selection: Optional[ParseSelection] = None):
+    """持续跟随并刷新 result.json 与变化 core 的 csv 分片（Ctrl+C 结束）"""
+    watcher = RunWatcher(in_dir, selection)
+    throttle = WriteThrottle(interval)
+
+    def flush():
+        cores, _ = throttle.take()
+        result = watcher.materialize()
+        write_result_json(result, out_dir, compress)
+        if cores:
+            export_tables(result, out_dir, compress, cores=cores)
+        throttle.done()
+
+    print(f'[watch] 跟随 {in_dir}，间隔 {interval}s，Ctrl+C 结束')
+    try:
+        while True:
+            throttle.add(watcher.poll())
+            if throttle.due():
+                flush()
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        throttle.add(watcher.poll(final=True))
+        if throttle.pending():
+            flush()
+        print('[watch] 已停止')
+
+
+async def watch_store(watcher: RunWatcher, store, interval: float = 2.0):
+    """查询服务中的后台任务：增量解析并按同样的限频刷新 RunStore"""
+    loop = asyncio.get_running_loop()
+    throttle = WriteThrottle(interval)
+    while True:
+        throttle.add(await loop.run_in_executor(None, watcher.poll))
+        if throttle.due():
+            cores, main = throttle.take()
+            result = await loop.run_in_executor(None, watcher.materialize, True)
+            if main:
+                store.set_result(snapshot_result(result))
+            else:
+                for n in cores:
+                    store.update_core(n, result['profile'][n])
+            throttle.done()
+        await asyncio.sleep(interval)
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LMEM what-if 装箱（log_parser.py --lmem-pack）
+  LmemParser 把失败的分配依次叠在成功分配的 max_addr 之后，忽略了生命周期，明显高估所需 LMEM。
+  这里把失败分配按 best-fit 放进其存活 timestep 区间内的空闲地址洞，估算每组最少还需多少 LMEM：
+  - 时间轴上建线段树，节点存地址区间并集（有序、不相交的 [s0, e0, s1, e1, ...]）：
+      cover[node]：时间区间恰好覆盖该节点的分配；span[node]：与该节点相交的所有分配
+    查询 [s, e] 时取路径上各节点的 cover + 分解节点的 span，合并后即该时间段内被占用的地址
+  - 每次插入 / 查询访问 O(log T) 个节点，节点内二分定位，整体近似 O(n log n)
+  - 存活区间同 lmem-option.js：[timestep_start, timestep_end] 闭区间；start > end 为回环（两段）；
+    hold_in_lmem 常驻整个组
+  - allow_bank_conflict 为 False 时不跨 bank：不超过一个 bank 的分配放在单个 bank 内，更大的从 bank 边界开始
+  - 失败分配按 size 从大到小放置；没有合适的洞时放到占用区的最上方（即需要额外的 LMEM）
+usage:
+    python log_parser.py input_dir/ -o output_dir/ --lmem-pack
+"""
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# ---------- 1. 地址区间并集 ----------
+def _union_add(iv: List[int], a: int, b: int):
+    """iv 为有序不相交的 [s0, e0, s1, e1, ...]，并入 [a, b)（相接的区间合并）"""
+    i = bisect_left(iv, a)
+    j = bisect_right(iv, b)
+    if i & 1:
+        i -= 1
+        a = iv[i]
+    if j & 1:
+        b = iv[j]
+        j += 1
+    iv[i:j] = (a, b)
+
+
+class TimeAddrIndex:
+    """(timestep 区间 × 地址区间) 占用索引"""
+
+    def __init__(self, max_ts: int):
+        self.n = max_ts + 1
+        size = 4 * self.n
+        self.cover: List[Optional[List[int]]] = [None] * size
+        self.span: List[Optional[List[int]]] = [None] * size
+
+    def _nodes(self, lo: int, hi: int):
+        """线段树分解 [lo, hi]：返回 (路径上的节点, 分解出的节点)"""
+        path, parts = [], []
+        stack = [(1, 0, self.n - 1)]
+        while stack:
+            node, l, r = stack.pop()
+            if hi < l or r < lo:
+                continue
+            path.append(node)
+            if lo <= l and r <= hi:
+                parts.append(node)
+                continue
+            m = (l + r) >> 1
+            stack.append((node * 2, l, m))
+            stack.append((node * 2 + 1, m + 1, r))
+        return path, parts
+
+    def insert(self, lo: int, hi: int, a: int, b: int):
+        path, parts = self._nodes(lo, hi)
+        for node in path:
+            iv = self.span[node]
+            if iv is None:
+                iv = self.span[node] = []
+            _union_add(iv, a, b)
+        for node in parts:
+            iv = self.cover[node]
+            if iv is None:
+                iv = self.cover[node] = []
+            _union_add(iv, a, b)
+
+    def occupied(self, lo: int, hi: int) -> List[int]:
+        """[lo, hi] 内任一时刻被占用的地址（合并后的 [s0, e0, ...]）"""
+        path, parts = self._nodes(lo, hi)
+        lists = [self.cover[n] for n in path if self.cover[n]]
+        lists += [self.span[n] for n in parts if self.span[n]]
+        if len(lists) == 1:
+            return lists[0]
+        out: List[int] = []
+        for s, e in sorted((iv[k], iv[k + 1]) for iv in lists for k in range(0, len(iv), 2)):
+            if out and s <= out[-1]:
+                if e > out[-1]:
+                    out[-1] = e
+            else:
+                out += (s, e)
+        return out
+
+
+# ---------- 2. 单组装箱 ----------
+def live_ranges(a: Dict[str, Any], max_ts: int) -> List[Tuple[int, int]]:
+    if a.get('hold_in_lmem'):
+        return [(0, max_ts)]
+    s, e = a['timestep_start'], a['timestep_end']
+    return [(s, e)] if s <= e else [(s, max_ts), (0, e)]
+
+
+def _merge_occupied(index: TimeAddrIndex, ranges: List[Tuple[int, int]]) -> List[int]:
+    if len(ranges) == 1:
+        return index.occupied(*ranges[0])
+    out: List[int] = []
+    for lo, hi in ranges:
+        iv = index.occupied(lo, hi)
+        for k in range(0, len(iv), 2):
+            _union_add(out, iv[k], iv[k + 1])
+    return out
+
+
+def _fit(g0: int, g1: Optional[int], size: int, bank: int) -> Optional[int]:
+    """洞 [g0, g1) 内满足 bank 约束的最低地址（g1 为 None 表示无上界）"""
+    addr = g0
+    if bank:
+        if size <= bank:
+            if addr // bank != (addr + size - 1) // bank:
+                addr = (addr // bank + 1) * bank
+        elif addr % bank:
+            addr = (addr // bank + 1) * bank
+    return addr if g1 is None or addr + size <= g1 else None
+
+
+def best_fit(occupied: List[int], size: int, bank: int) -> int:
+    """最小的可容纳空洞（同大小取低地址）；都放不下时放到最高占用地址之上"""
+    best, best_len = None, None
+    prev = 0
+    for k in range(0, len(occupied), 2):
+        s = occupied[k]
+        if s - prev >= size and (best_len is None or s - prev < best_len):
+            addr = _fit(prev, s, size, bank)
+            if addr is not None:
+                best, best_len = addr, s - prev
+        prev = occupied[k + 1]
+    return best if best is not None else _fit(prev, None, size, bank)
+
+
+def pack_group(group: Dict[str, Any]) -> Dict[str, Any]:
+    settings, allocs = group.get('settings') or {}, group.get('allocations') or []
+    max_ts = max((max(a['timestep_start'], a['timestep_end']) for a in allocs), default=0)
+    bank = 0 if settings.get('allow_bank_conflict') else (settings.get('lmem_bank_bytes') or 0)
+    index = TimeAddrIndex(max_ts)
+
+    failed, success_end = [], 0
+    for i, a in enumerate(allocs):
+        if a.get('status') != 'success':
+            failed.append(i)
+            continue
+        if a['size'] > 0:
+            for lo, hi in live_ranges(a, max_ts):
+                index.insert(lo, hi, a['addr'], a['addr'] + a['size'])
+        success_end = max(success_end, a['addr'] + a['size'])
+
+    capacity = settings.get('lmem_bytes') or success_end
+    failed_bytes = sum(allocs[i]['size'] for i in failed)
+    # 大块优先，同大小时存活更久的优先
+    failed.sort(key=lambda i: (-allocs[i]['size'],
+                               -sum(hi - lo + 1 for lo, hi in live_ranges(allocs[i], max_ts))))
+    placements, packed_end, in_holes = [], success_end, 0
+    for i in failed:
+        a = allocs[i]
+        ranges = live_ranges(a, max_ts)
+        addr = best_fit(_merge_occupied(index, ranges), a['size'], bank)
+        end = addr + a['size']
+        if a['size'] > 0:
+            for lo, hi in ranges:
+                index.insert(lo, hi, addr, end)
+        packed_end = max(packed_end, end)
+        in_holes += end <= capacity
+        placements.append([i, addr])
+
+    naive_end = success_end + failed_bytes
+    return {
+        'capacity': capacity,
+        'failed': len(failed),
+        'failedBytes': failed_bytes,
+        'successEnd': success_end,
+        'naiveEnd': naive_end,
+        'packedEnd': packed_end,
+        'naiveExtraBytes': max(0, naive_end - capacity),
+        'extraBytes': max(0, packed_end - capacity),
+        'inCapacity': in_holes,
+        'placements': sorted(placements),   # [allocations 下标, what-if 地址]
+    }
+
+
+# ---------- 3. 全部分组 ----------
+def pack_lmem(groups: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """result.lmemPack：groups[i] 与 result.lmem[i] 一一对应"""
+    packed = [pack_group(g) for g in groups or []]
+    return {
+        'groups': packed,
+        'extraBytes': max((g['extraBytes'] for g in packed), default=0),
+        'naiveExtraBytes': max((g['naiveExtraBytes'] for g in packed), default=0),
+    }
+
+
+def print_lmem_pack(pack: Dict[str, Any]):
+    rows = [(gi, g) for gi, g in enumerate(pack['groups']) if g['failed']]
+    if not rows:
+        print('[lmem-pack] 没有失败的分配')
+        return
+    print(f'[lmem-pack] {len(rows)} 组有失败分配（额外 LMEM：逐个叠放 / best-fit 装箱）')
+    for gi, g in rows:
+        print(f"  group {gi:<4} 失败 {g['failed']:<6} 放入容量内 {g['inCapacity']:<6} "
+              f"{g['naiveExtraBytes']:>10} B -> {g['extraBytes']:>10} B")
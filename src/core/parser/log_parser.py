@@ -3,20 +3,231 @@
 """
 单日志文件解析，输出固定格式 json 文件以及 profile 导出表
 usage:
-    python log_parser.py input_dir/  -o output_dir/ 
+    python log_parser.py input_dir/  -o output_dir/ [--compress gz|zst]
+    python log_parser.py serve input_dir/ [--port 8765]    # 本地查询服务，见 query_server.py
+    python log_parser.py diff run_a/ run_b/ [-o diff_dir/] # 两次运行对比，见 run_diff.py
+    python log_parser.py batch 'runs/*' -o out_root/ [-j 8]  # 批量解析多个运行目录，见 batch_runner.py
+    python log_parser.py input_dir/ -o output_dir/ --watch  # 跟随增长中的日志增量解析，见 live_watch.py
+    python log_parser.py input_dir/ -o output_dir/ --timeline  # 多 core 全局时间线，见 global_timeline.py
+    python log_parser.py input_dir/ -o output_dir/ --bandwidth  # GDMA 分方向带宽时间桶，见 gdma_bandwidth.py
+    python log_parser.py input_dir/ -o output_dir/ --export sqlite  # 另导出带索引的 result.sqlite，见 sqlite_export.py
+    python log_parser.py input_dir/ -o output_dir/ --export npy     # 按 core 的列式 .npy 缓存（load_columns 读取），见 npy_columns.py
+    python log_parser.py input_dir/ -o output_dir/ --lmem-pack  # 失败 LMEM 分配的 what-if 装箱，见 lmem_packer.py
+    python log_parser.py input_dir/ -o output_dir/ --trace-stages [--chrome-trace trace.json]  # 分阶段耗时/内存，见 stage_trace.py
+    python log_parser.py input_dir/ -o output_dir/ --cores 0,2 --cycle-range 1000:5000 --sections profile --ops Conv2D
+                                                    # 只解析选中的 core / cycle 区间 / 部分 / 算子
     其中 input_dir/ 包含需可视化的日志文件，如：LayerGroup 日志文件， compiler_profie_(), xxxx.bmodel.json 等
+    输入文件可为 .gz / .zst 压缩格式（流式解压）；--compress 压缩输出 result.json 与 csv
 """
 import re
+import io
+import os
+import sys
+import gzip
 import json
+import hashlib
 import argparse
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Iterable, Iterator, IO, Union
 from pathlib import Path
 import collections
 
+from profile_index import ProfileIndex
+from json_stream import write_json
+from interval_stats import busy_summary, DDR_DIRECTIONS
+from concurrency import analyze_concurrency
+from stage_trace import trace
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+# ----------------------------------------------------------
+# 0. 压缩输入/输出（.gz / .zst 透明读写）
+# ----------------------------------------------------------
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+COMPRESS_SUFFIX = {'gz': '.gz', 'zst': '.zst'}
+
+def detect_codec(path: Path) -> Optional[str]:
+    """按文件头魔数判断压缩格式，返回 'gz' / 'zst' / None"""
+    with path.open('rb') as f:
+        head = f.read(4)
+    if head.startswith(GZIP_MAGIC):
+        return 'gz'
+    if head.startswith(ZSTD_MAGIC):
+        return 'zst'
+    return None
+
+def strip_compress_suffix(name: str) -> str:
+    """compiler_profile_0.gz -> compiler_profile_0"""
+    for suffix in COMPRESS_SUFFIX.values():
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+def open_input(path: Path, encoding: str = 'utf-8', errors: str = 'strict') -> IO[str]:
+    """以文本流方式打开输入文件，压缩文件边读边解压"""
+    codec = detect_codec(path)
+    if codec == 'gz':
+        return gzip.open(path, 'rt', encoding=encoding, errors=errors)
+    if codec == 'zst':
+        if not HAS_ZSTD:
+            raise RuntimeError(f'读取 {path.name} 需要 zstandard 模块: pip install zstandard')
+        raw = zstandard.ZstdDecompressor().stream_reader(path.open('rb'), closefd=True)
+        return io.TextIOWrapper(raw, encoding=encoding, errors=errors)
+    return path.open('r', encoding=encoding, errors=errors)
+
+def read_input_text(path: Path, encoding: str = 'utf-8', errors: str = 'strict') -> str:
+    with open_input(path, encoding=encoding, errors=errors) as f:
+        return f.read()
+
+def open_output(path: Path, compress: Optional[str] = None, newline: Optional[str] = None) -> Tuple[IO[str], Path]:
+    """打开输出文件，compress 为 'gz'/'zst' 时自动追加后缀，返回 (文本流, 实际路径)"""
+    if not compress:
+        return path.open('w', encoding='utf-8', newline=newline), path
+    path = path.with_name(path.name + COMPRESS_SUFFIX[compress])
+    if compress == 'gz':
+        return gzip.open(path, 'wt', encoding='utf-8', newline=newline), path
+    if not HAS_ZSTD:
+        raise RuntimeError('输出 .zst 需要 zstandard 模块: pip install zstandard')
+    raw = zstandard.ZstdCompressor().stream_writer(path.open('wb'), closefd=True)
+    return io.TextIOWrapper(raw, encoding='utf-8', newline=newline), path
+
+def check_compress_arg(ap: argparse.ArgumentParser, compress: Optional[str]) -> None:
+    """参数解析阶段检查压缩后端是否可用，避免解析完才在 open_output 里报错"""
+    if compress == 'zst' and not HAS_ZSTD:
+        ap.error('--compress zst 需要 zstandard 模块: pip install zstandard')
+
+def stream_contains(path: Path, needles: Iterable[str], chunk_size: int = 1 << 20) -> bool:
+    """分块流式扫描（含压缩文件），命中任一关键字即提前返回"""
+    needles = list(needles)
+    keep = max(len(n) for n in needles) - 1
+    tail = ''
+    with open_input(path, errors='ignore') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return False
+            buf = tail + chunk
+            if any(n in buf for n in needles):
+                return True
+            tail = buf[-keep:] if keep > 0 else ''
+
+# ----------------------------------------------------------
+# 0.1 解析过滤（--cores / --cycle-range / --sections / --ops 下推到各 reader）
+# ----------------------------------------------------------
+SECTIONS = ('lmem', 'timestep', 'profile')
+OP_SUFFIX_RE = re.compile(r'_\d+$')
+LMEM_OP_RE = re.compile(r';\s*(?:op_type|op_name)\s*=\s*([^;]+)')
+TS_OP_RE = re.compile(r';\s*op\s*=\s*([^;]+)')
+
+def op_key(name: Any) -> str:
+    """算子名归一：忽略大小写与指令序号后缀（Conv2D_32 -> conv2d）"""
+    return OP_SUFFIX_RE.sub('', str(name).strip()).lower()
+
+def _field_int(text: str, key: str) -> Optional[int]:
+    """从 'op|type|s:1|b:2|...' 中只取一个整数字段，不做整行解码"""
+    i = text.find(f'|{key}:')
+    if i < 0:
+        return None
+    i += len(key) + 2
+    j = text.find('|', i)
+    try:
+        return int(text[i:j] if j >= 0 else text[i:])
+    except ValueError:
+        return None
+
+class ParseSelection:
+    """
+    解析范围（None 表示不过滤）：
+      cores       ：只打开选中 core 的 compiler_profile_<n>，bmodel 只取这些 core 的算子
+      cycle_range ：(lo, hi) 闭区间，profile 指令行先只取 s / e 判断是否与区间相交，再做完整解码
+      sections    ：lmem / timestep / profile，未选中的段（及其文件）不读取
+      ops         ：算子名（lmem 的 op_type / op_name，timestep 的 op，profile 指令与 bmodel 算子名）
+    """
+    def __init__(self, cores: Optional[Iterable[int]] = None,
+                 cycle_range: Optional[Tuple[Optional[int], Optional[int]]] = None,
+                 sections: Optional[Iterable[str]] = None,
+                 ops: Optional[Iterable[str]] = None):
+        self.cores = set(cores) if cores is not None else None
+        self.lo, self.hi = cycle_range or (None, None)
+        self.sections = set(sections) if sections else set(SECTIONS)
+        self.ops = {op_key(o) for o in ops} if ops else None
+
+    @property
+    def active(self) -> bool:
+        return (self.cores is not None or self.lo is not None or self.hi is not None
+                or self.ops is not None or self.sections != set(SECTIONS))
+
+    def want(self, section: str) -> bool:
+        return section in self.sections
+
+    def want_core(self, core_id: int) -> bool:
+        return self.cores is None or core_id in self.cores
+
+    def want_op(self, name: Any) -> bool:
+        return self.ops is None or op_key(name) in self.ops
+
+    def accept_instr(self, text: str) -> bool:
+        """profile 单列文本的预过滤：只看算子名前缀和 s / e 字段"""
+        if self.ops is not None and not self.want_op(text.split('|', 1)[0]):
+            return False
+        if self.lo is not None:
+            end = _field_int(text, 'e')
+            if end is not None and end < self.lo:
+                return False
+        if self.hi is not None:
+            start = _field_int(text, 's')
+            if start is not None and start > self.hi:
+                return False
+        return True
+
+    def keep_section(self, sec: str, op_re: re.Pattern) -> bool:
+        """lmem / timestep 段的预过滤：只匹配算子名字段"""
+        if self.ops is None:
+            return True
+        return any(self.want_op(m.group(1)) for m in op_re.finditer(sec))
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            'cores': sorted(self.cores) if self.cores is not None else None,
+            'cycleRange': [self.lo, self.hi] if self.lo is not None or self.hi is not None else None,
+            'sections': [s for s in SECTIONS if s in self.sections],
+            'ops': sorted(self.ops) if self.ops is not None else None,
+        }
+
+    @classmethod
+    def from_args(cls, cores: Optional[str], cycle_range: Optional[str],
+                  sections: Optional[str], ops: Optional[str]) -> 'ParseSelection':
+        """命令行字符串：--cores 0,2-3  --cycle-range 1000:5000（任一端可省）  --sections lmem,profile  --ops Conv2D,Load"""
+        core_set = None
+        if cores:
+            core_set = set()
+            for tok in cores.split(','):
+                a, _, b = tok.strip().partition('-')
+                core_set.update(range(int(a), int(b or a) + 1))
+        rng = None
+        if cycle_range:
+            lo, _, hi = cycle_range.partition(':')
+            rng = (int(lo) if lo.strip() else None, int(hi) if hi.strip() else None)
+            if None not in rng and rng[0] > rng[1]:
+                raise ValueError(f'--cycle-range 下界大于上界: {cycle_range}')
+        secs = None
+        if sections:
+            secs = [x.strip() for x in sections.split(',') if x.strip()]
+            bad = set(secs) - set(SECTIONS)
+            if bad:
+                raise ValueError(f'未知 section: {",".join(sorted(bad))}（可选 {",".join(SECTIONS)}）')
+        op_list = [x for x in ops.split(',') if x.strip()] if ops else None
+        return cls(core_set, rng, secs, op_list)
+
 # ----------------------------------------------------------
 # 1. 日志分段
 # ----------------------------------------------------------
-def extract_valid_sections(raw_log: str) -> Dict[str, Any]:
+def extract_valid_sections(raw_log: str, selection: Optional[ParseSelection] = None) -> Dict[str, Any]:
+    sel = selection or ParseSelection()
     marker_re = re.compile(
         r'^-{20,}\s*\n'          # 第1行：20+ 个 -
         r'.*start time.*$',       # 第2行：包含 start time
@@ -35,12 +246,13 @@ def extract_valid_sections(raw_log: str) -> Dict[str, Any]:
     lmem_sections = [
         s for s in compute_secs
         if '; action = lmem_assign' in s and '; tag = iteration_result' in s
-    ]
+        and sel.keep_section(s, LMEM_OP_RE)
+    ] if sel.want('lmem') else []
     timestep_sections = []
     start_idx = next((
         i for i, s in enumerate(compute_secs)
         if '; action = timestep_cycle; debug_range = given;' in s
-    ), -1)
+    ), -1) if sel.want('timestep') else -1
     if start_idx != -1:
         seen = set()
         for s in compute_secs[start_idx:]:
@@ -51,7 +263,8 @@ def extract_valid_sections(raw_log: str) -> Dict[str, Any]:
                 and s not in seen
             ):
                 seen.add(s)
-                timestep_sections.append(s)
+                if sel.keep_section(s, TS_OP_RE):
+                    timestep_sections.append(s)
 
     chip_section = next((
         s for s in compute_secs
@@ -67,10 +280,139 @@ def extract_valid_sections(raw_log: str) -> Dict[str, Any]:
     return {
         'lmemSections': lmem_sections,
         'timestepSections': timestep_sections,
-        'profileText': profile_text,
+        'profileText': profile_text if sel.want('profile') else '',
         'chip': chip or None
     }
 
+SECTION_START_RE = re.compile(r'; action = \w+')
+PROFILE_MARKER_RE = re.compile(r'^-{20,}\s*\n.*start time.*$', re.MULTILINE)
+
+# 只有这两类 action 的段可能被 _classify 选中，其余段的文本不必保留
+KEPT_ACTIONS = ('lmem_assign', 'timestep_cycle')
+DASH_LINE_RE = re.compile(r'-{20,}\s*$')
+
+class LogSectionStream:
+    """
+    extract_valid_sections 的增量版本（watch 模式 / 流式解析）：
+    按追加文本切分 '; action = xxx' 段，下一段出现（或 flush）时才输出上一段，
+    遇到 profile 分隔标记后停止。
+      - 每次只扫描 carry + 新文本：carry 为末尾不完整的行，以及可能是分隔标记前半部分的
+        '-----' 行与其后的空白行，整体开销与日志长度成线性
+      - 只保留当前未结束的段，且只保留 KEPT_ACTIONS 的段文本；分段结果与 extract_valid_sections 一致
+    """
+    def __init__(self):
+        self.carry = ''
+        self.parts: Optional[List[str]] = None   # 当前未结束段的文本（不需要保留时为 None）
+        self.done = False
+        self.ts_started = False
+        self.seen = set()
+        self.chip = None
+
+    def feed(self, text: str, flush: bool = False) -> Tuple[List[str], List[str]]:
+        """返回本次新完成的 (lmem_sections, timestep_sections)"""
+        if self.done:
+            return [], []
+        work = self.carry + text
+        m = PROFILE_MARKER_RE.search(work)
+        if m:
+            end = m.start()
+            self.done = flush = True
+        elif flush:
+            end = len(work)
+        else:
+            end = self._hold_back(work, work.rfind('\n') + 1)
+        self.carry = '' if flush else work[end:]
+
+        complete, pos = [], 0
+        for mm in SECTION_START_RE.finditer(work, 0, end):
+            self._append(work[pos:mm.start()])
+            self._close(complete)
+            action = mm.group().rsplit(' ', 1)[1]
+            self.parts = [] if action in KEPT_ACTIONS else None
+            pos = mm.start()
+        self._append(work[pos:end])
+        if flush:
+            # 末段已输出，之后若还有追加内容，属于该段的部分忽略
+            self._close(complete)
+        return self._classify(complete)
+
+    @staticmethod
+    def _hold_back(work: str, end: int) -> int:
+        """end 之前末尾的 '-----' 行 + 空白行可能与后续文本组成分隔标记，暂不提交"""
+        pos = end
+        while pos > 0:
+            start = work.rfind('\n', 0, pos - 1) + 1
+            line = work[start:pos]
+            if DASH_LINE_RE.match(line):
+                return start
+            if line.strip():
+                break
+            pos = start
+        return end
+
+    def _append(self, text: str):
+        if self.parts is not None and text:
+            self.parts.append(text)
+
+    def _close(self, out: List[str]):
+        if self.parts is not None:
+            out.append(''.join(self.parts))
+        self.parts = None
+
+    def _classify(self, secs: List[str]) -> Tuple[List[str], List[str]]:
+        lmem, ts = [], []
+        for s in secs:
+            if '; action = lmem_assign' in s and '; tag = iteration_result' in s:
+                lmem.append(s)
+            if '; action = timestep_cycle; debug_range = given;' in s:
+                self.ts_started = True
+            if (
+                self.ts_started
+                and '; action = timestep_cycle;' in s
+                and '; step = timestep_cycle;' in s
+                and '; tag = result;' in s
+                and s not in self.seen
+            ):
+                self.seen.add(s)
+                ts.append(s)
+            if self.chip is None and '; action = lmem_assign' in s and '; step = lmem_spec' in s:
+                chip = {}
+                for mm in re.finditer(r';\s*(\w+)\s*=\s*([^;]+)', s):
+                    key, val = mm.group(1), mm.group(2).strip()
+                    if key in {'lmem_bytes', 'lmem_banks', 'lmem_bank_bytes'}:
+                        chip[key] = int(val)
+                self.chip = chip or None
+        return lmem, ts
+
+LOG_CHUNK_CHARS = 1 << 20
+
+def stream_valid_sections(f: IO[str], selection: Optional[ParseSelection] = None,
+                          chunk_chars: int = LOG_CHUNK_CHARS,
+                          stream: Optional[LogSectionStream] = None) -> Dict[str, Any]:
+    """
+    extract_valid_sections 的流式版本：主日志按块读入 LogSectionStream 切段，不整体读入内存
+    读到 profile 分隔标记即停止（profileText 为空，profile 由 compiler_profile_<n> 提供）
+    stream 为已切过文件开头部分的状态时（见 MainLogReader），从 f 的当前位置接着切
+    """
+    sel = selection or ParseSelection()
+    stream = stream or LogSectionStream()
+    lmem_sections, timestep_sections = [], []
+    while not stream.done:
+        chunk = f.read(chunk_chars)
+        lmem, ts = stream.feed(chunk, flush=not chunk)
+        if sel.want('lmem'):
+            lmem_sections += [s for s in lmem if sel.keep_section(s, LMEM_OP_RE)]
+        if sel.want('timestep'):
+            timestep_sections += [s for s in ts if sel.keep_section(s, TS_OP_RE)]
+        if not chunk:
+            break
+    return {
+        'lmemSections': lmem_sections,
+        'timestepSections': timestep_sections,
+        'profileText': '',
+        'chip': stream.chip,
+    }
+
 FIELDS_WHITELIST_LMEM = {
     'op_name', 'op_type', 'addr', 'size', 'timestep_start', 'timestep_end',
     'lmem_type', 'hold_in_lmem', 'status', 'tag', 'bank_id'
@@ -83,6 +425,8 @@ class LmemParser:
     def __init__(self,chip: Dict = None):
         self.max_timestep_global = 0
         self.chip = chip or {}
+        self.raw_groups = []   # 增量状态：未处理的分组
+        self.groups = []       # 增量状态：处理后的分组
 
     def get_global_max_timestep(self) -> int:
         return self.max_timestep_global
@@ -92,6 +436,27 @@ class LmemParser:
         raw_groups = self._group_by_settings(sections)
         return self._process_allocation_groups(raw_groups)
 
+    def feed(self, sections: List[str]) -> List[int]:
+        """增量解析新增 section，仅重算受影响的分组，返回变化的分组下标"""
+        changed = set()
+        for sec in sections:
+            entry, settings = self._parse_section(sec)
+            if not entry:
+                continue
+            cur = self.raw_groups[-1] if self.raw_groups else None
+            if not cur or not self._is_same_settings(cur['settings'], settings):
+                cur = {'settings': settings, 'allocations': []}
+                self.raw_groups.append(cur)
+            cur['allocations'].append(entry)
+            changed.add(len(self.raw_groups) - 1)
+        for gi in sorted(changed):
+            processed = self._process_allocation_groups([self.raw_groups[gi]])[0]
+            if gi < len(self.groups):
+                self.groups[gi] = processed
+            else:
+                self.groups.append(processed)
+        return sorted(changed)
+
     # ---- 内部 ----
     def _group_by_settings(self, sections: List[str]):
         groups = []
@@ -192,16 +557,119 @@ FIELDS_WHITELIST_TS = {
 }
 
 
+TS_LANES = ('gdma', 'layer')   # 参与依赖 / 关键路径的泳道（timestep_type）
+
 class TimestepParser:
     def __init__(self):
         self.max_timestep_global = 0
+        self.groups = []   # 增量状态
 
     def get_global_max_timestep(self) -> int:
         return self.max_timestep_global
 
     def parse(self, sections: List[str]) -> List[Dict[str, Any]]:
         groups = self._group_by_settings(sections)
-        return [{'settings': g['settings'], 'entries': g['entries']} for g in groups]
+        for g in groups:
+            self.finalize_group(g)
+        return [{'settings': g['settings'], 'entries': g['entries'],
+                 'deps': g['deps'], 'criticalPath': g['criticalPath']} for g in groups]
+
+    def feed(self, sections: List[str]) -> List[int]:
+        """增量解析新增 section，返回变化的分组下标"""
+        changed = set()
+        for sec in sections:
+            entry, settings = self._parse_section(sec)
+            if not entry:
+                continue
+            cur = self.groups[-1] if self.groups else None
+            if not cur or not self._is_same_settings(cur['settings'], settings):
+                cur = {'settings': settings, 'entries': []}
+                self.groups.append(cur)
+            cur['entries'].append(entry)
+            changed.add(len(self.groups) - 1)
+        for gi in changed:
+            self.finalize_group(self.groups[gi])
+        return sorted(changed)
+
+    # ---- 分组派生数据：绝对 cycle 坐标 / 依赖 / 关键路径 ----
+    def finalize_group(self, group: Dict[str, Any]):
+        entries = group['entries']
+        self._layout_cycles(entries)
+        group['deps'] = self._build_deps(entries)
+        group['criticalPath'] = self._critical_path(entries, group['deps'])
+
+    @staticmethod
+    def _layout_cycles(entries: List[Dict[str, Any]]):
+        """
+        与前端 BaseLane.buildGlobalTimeAxis + Layer/GDMA 泳道一致：
+        每个 timestep 槽宽 = 该 ts 内单条最大 cycle，槽左边缘累加；同一泳道同一 ts 内的条目依次堆叠
+        """
+        width: Dict[int, int] = {}
+        for e in entries:
+            w, ts = e['cycle'] or 1, e['timestep']
+            if w > width.get(ts, 0):
+                width[ts] = w
+        left, cursor = {}, 0
+        for ts in sorted(width):
+            left[ts] = cursor
+            cursor += width[ts]
+        offset: Dict[Tuple, int] = {}
+        for e in entries:
+            key, w = (e['timestep_type'], e['timestep']), e['cycle'] or 1
+            off = offset.get(key, 0)
+            offset[key] = off + w
+            e['_cycStart'] = left[e['timestep']] + off
+            e['_cycEnd'] = e['_cycStart'] + w
+
+    @staticmethod
+    def _build_deps(entries: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+        """gdma(concerning_op_name) -> layer(tensor_name)，返回分组内 entries 下标的平行数组"""
+        producers = {e.get('concerning_op_name'): i for i, e in enumerate(entries)
+                     if e['timestep_type'] == 'gdma'}
+        deps = {'from': [], 'to': []}
+        for i, e in enumerate(entries):
+            if e['timestep_type'] != 'layer':
+                continue
+            p = producers.get(e.get('tensor_name'))
+            if p is not None:
+                deps['from'].append(p)
+                deps['to'].append(i)
+        return deps
+
+    @staticmethod
+    def _critical_path(entries: List[Dict[str, Any]], deps: Dict[str, List[int]]) -> Dict[str, Any]:
+        """
+        最长加权路径（权重 = 条目 cycle）：边为同泳道内的先后顺序 + gdma->layer 依赖；
+        节点按 (_cycStart, 下标) 拓扑排序，逆向的依赖边忽略以保证无环
+        """
+        order = sorted((i for i, e in enumerate(entries) if e['timestep_type'] in TS_LANES),
+                       key=lambda i: (entries[i]['_cycStart'], i))
+        if not order:
+            return {'entries': [], 'cycle': 0}
+        rank = {i: r for r, i in enumerate(order)}
+        preds: Dict[int, List[int]] = {}
+        last_in_lane: Dict[str, int] = {}
+        for i in order:
+            lane = entries[i]['timestep_type']
+            if lane in last_in_lane:
+                preds.setdefault(i, []).append(last_in_lane[lane])
+            last_in_lane[lane] = i
+        for p, c in zip(deps['from'], deps['to']):
+            if rank[p] < rank[c]:
+                preds.setdefault(c, []).append(p)
+        dist, back = {}, {}
+        for i in order:
+            best, arg = 0, None
+            for p in preds.get(i, ()):
+                if dist[p] > best:
+                    best, arg = dist[p], p
+            dist[i], back[i] = best + (entries[i]['cycle'] or 1), arg
+        node = max(order, key=lambda i: dist[i])
+        total, path = dist[node], []
+        while node is not None:
+            path.append(node)
+            node = back[node]
+        return {'entries': path[::-1], 'cycle': total}
 
     def _group_by_settings(self, sections):
         groups, cur = [], None
@@ -227,9 +695,6 @@ class TimestepParser:
         if entry.get('timestep') is not None:
             self.max_timestep_global = max(self.max_timestep_global,
                                            int(entry['timestep']))
-        if entry.get('cycle') is not None:
-            entry['_cycStart'] = 0
-            entry['_cycEnd'] = int(entry['cycle'])
         valid_entry = self._validate(entry)
         return valid_entry, settings
 
@@ -275,6 +740,23 @@ class MemoryStatistics:
                               'globalSummary': global_summary}
         return self.summary_cache
 
+    def update_groups(self, lmem_groups: List[Dict], ts_counts: int,
+                      changed: Iterable[int]) -> Dict[str, Any]:
+        """增量刷新：仅重算变化的分组；回绕区间依赖 ts_counts，其变化时全量重算"""
+        if not self.summary_cache or ts_counts != self.ts_counts:
+            self.set_lmem_data(lmem_groups, ts_counts)
+            return self.calculate_all_statistics()
+        self.lmem_groups = lmem_groups
+        groups_stats = self.summary_cache['groups']
+        for gi in changed:
+            stats = self._calc_for_group(lmem_groups[gi])
+            if gi < len(groups_stats):
+                groups_stats[gi] = stats
+            else:
+                groups_stats.append(stats)
+        self.summary_cache['globalSummary'] = self._global_summary(groups_stats)
+        return self.summary_cache
+
     # ---- 内部 ----
     def _calc_for_group(self, group: Dict):
         settings, allocs = group['settings'], group['allocations']
@@ -413,12 +895,12 @@ OpNode = collections.namedtuple(
     'operands results is_local'
 )
 
-def parse_bmodel(path: Path) -> List[OpNode]:
-    """安全解析 bmodel.json，返回 OpNode 列表"""
+def parse_bmodel(path: Path, selection: Optional[ParseSelection] = None) -> List[OpNode]:
+    """安全解析 bmodel.json，返回 OpNode 列表（selection 指定时只保留选中 core / 算子）"""
     if not path.exists() or path.stat().st_size == 0:
         return []
     try:
-        content = path.read_text(encoding='utf-8-sig').strip()
+        content = read_input_text(path, encoding='utf-8-sig').strip()
         if content.startswith('[') and content.endswith(',]'):
             content = content[:-2] + ']'
         data = json.loads(content)
@@ -431,6 +913,8 @@ def parse_bmodel(path: Path) -> List[OpNode]:
         fl  = node.get('file-line', 'N/A')
         core = node.get('core_id', -1)
         name = node['opcode'].split('.')[-1]
+        if selection and not (selection.want_core(core) and selection.want_op(name)):
+            continue
         before = node.get('tiu_dma_id(before)', [0, 0])
         after  = node.get('tiu_dma_id(after)',  [0, 0])
         if len(before) < 2: before = [0, 0]
@@ -465,21 +949,54 @@ def get_tensor_info(tensor):
     
     return shape_str, dtype
 
-def build_info(op: OpNode) -> str:
-    """拼 HTML 片段"""
+def op_meta(op: OpNode) -> Dict[str, Any]:
+    """算子的 tooltip 元数据：张量形状 / 数据类型预先算好"""
+    return {
+        'op'  : op.name,
+        'local': bool(op.is_local),
+        'ins' : [list(get_tensor_info(t)) for t in op.operands],
+        'outs': [list(get_tensor_info(t)) for t in op.results],
+    }
+
+def format_op_info(meta: Dict[str, Any]) -> str:
+    """由 op 元数据拼 HTML 片段（与前端 formatOpInfo 一致）"""
     def fmt_tensor(t):
-        shape, dtype = get_tensor_info(t)
+        shape, dtype = t
         return  f"tensor_id=NaN [{shape}] {dtype}"
-    ins  = '<br>==ins==<br>'  + '<br>'.join(fmt_tensor(t) for t in op.operands)  if op.operands else ''
-    outs = '<br>==outs==<br>' + '<br>'.join(fmt_tensor(t) for t in op.results)   if op.results  else ''
-    local = 'local_layer' if op.is_local else 'global_layer'
+    ins  = '<br>==ins==<br>'  + '<br>'.join(fmt_tensor(t) for t in meta['ins'])  if meta['ins']  else ''
+    outs = '<br>==outs==<br>' + '<br>'.join(fmt_tensor(t) for t in meta['outs']) if meta['outs'] else ''
+    local = 'local_layer' if meta['local'] else 'global_layer'
     return f"<br>{local}{ins}{outs}<br>" #========<br>feature_size=0<br>weight_size=0<br>total_size=0"
 
+def build_info(op: OpNode) -> str:
+    """拼 HTML 片段"""
+    return format_op_info(op_meta(op))
+
 class LayerExtractor:
-    """根据已解析的 BD/GDMA entries + bmodel 生成 layer 条目（对象格式）"""
-    def __init__(self, bmodel_path: Path):
-        self.ops = parse_bmodel(bmodel_path)
+    """
+    根据已解析的 BD/GDMA entries + bmodel 生成 layer 条目（对象格式）
+    每个 bmodel 只解析一次：op_table 为去重后的算子元数据表，layer 条目只存下标 opInfo，
+    前端按需格式化 tooltip（导出 csv 时再还原为 info）
+    """
+    # 实例字段 / ops 结构变化时加一：batch_runner 的 pickle 缓存键带版本号，旧缓存自动失效
+    CACHE_VERSION = 1
+
+    def __init__(self, bmodel_path: Path, selection: Optional[ParseSelection] = None):
+        self.ops = parse_bmodel(bmodel_path, selection)
         self.lookup = {(op.file_line, op.name): op for op in self.ops}
+        self.op_table: List[Dict[str, Any]] = []
+        self.op_index: List[int] = []             # 与 self.ops 一一对应
+        self.by_core: Dict[int, List[int]] = {}   # core_id -> self.ops 下标
+        interned: Dict[Tuple, int] = {}
+        for i, op in enumerate(self.ops):
+            meta = op_meta(op)
+            key = (meta['op'], meta['local'], tuple(map(tuple, meta['ins'])), tuple(map(tuple, meta['outs'])))
+            idx = interned.get(key)
+            if idx is None:
+                idx = interned[key] = len(self.op_table)
+                self.op_table.append(meta)
+            self.op_index.append(idx)
+            self.by_core.setdefault(op.core_id, []).append(i)
 
     def make_layer_entries(
         self,
@@ -491,35 +1008,57 @@ class LayerExtractor:
         bd_map   = {e['bd_id']:  e for e in bd_entries  if 'bd_id'  in e}
         gdma_map = {e['gdma_id']: e for e in gdma_entries if 'gdma_id' in e}
         layer_entries = []
-        for op in filter(lambda o: o.core_id == core_id, self.ops):
-            instr = []
-            for bd_id in range(op.bd_start, op.bd_start + op.bd_count):
-                if bd_id in bd_map:
-                    instr.append(bd_map[bd_id])
-            for g_id in range(op.gdma_start, op.gdma_start + op.gdma_count):
-                if g_id in gdma_map:
-                    instr.append(gdma_map[g_id])
-            if not instr:
-                continue
-            start_cyc = min(e['start'] for e in instr)
-            end_cyc   = max(e['end']   for e in instr)
-            suffix = '(G)' if not op.is_local else '(L)'
-            isSL = True if op.name == 'Load' or op.name == 'Store' else False
-            layer_entries.append({
-                'engine'   : 'LAYER',
-                'op'       : op.name,
-                'type'     : f"{op.name}{suffix}",
-                'start'    : start_cyc,
-                'end'      : end_cyc,
-                'cost'     : end_cyc - start_cyc,
-                'file_line' : op.file_line,
-                'info'     : build_info(op),
-                'isSL'      : isSL,
-            })
+        for i in self.by_core.get(core_id, ()):
+            layer = self.layer_entry(i, bd_map, gdma_map)
+            if layer:
+                layer_entries.append(layer)
         # 按开始时间排序
         layer_entries.sort(key=lambda x: x['start'])
         return layer_entries
 
+    def layer_entry(self, i: int, bd_map: Dict[int, Dict], gdma_map: Dict[int, Dict]) -> Optional[Dict[str, Any]]:
+        """self.ops[i] 的 LAYER 条目；bd_map / gdma_map 中没有它的任何指令时返回 None"""
+        op = self.ops[i]
+        instr = []
+        for bd_id in range(op.bd_start, op.bd_start + op.bd_count):
+            if bd_id in bd_map:
+                instr.append(bd_map[bd_id])
+        for g_id in range(op.gdma_start, op.gdma_start + op.gdma_count):
+            if g_id in gdma_map:
+                instr.append(gdma_map[g_id])
+        if not instr:
+            return None
+        start_cyc = min(e['start'] for e in instr)
+        end_cyc   = max(e['end']   for e in instr)
+        suffix = '(G)' if not op.is_local else '(L)'
+        isSL = True if op.name == 'Load' or op.name == 'Store' else False
+        return {
+            'engine'   : 'LAYER',
+            'op'       : op.name,
+            'type'     : f"{op.name}{suffix}",
+            'start'    : start_cyc,
+            'end'      : end_cyc,
+            'cost'     : end_cyc - start_cyc,
+            'file_line' : op.file_line,
+            'opInfo'   : self.op_index[i],
+            'isSL'      : isSL,
+            'bdCount'  : sum(1 for e in instr if e['engine'] == 'BD'),
+            'gdmaCount': sum(1 for e in instr if e['engine'] == 'GDMA'),
+            'bytes'    : sum(e.get('size', 0) for e in instr if e['engine'] == 'GDMA'),
+        }
+
+    def instr_owners(self, core_id: int) -> Tuple[Dict[int, List[int]], Dict[int, List[int]]]:
+        """(bd_id -> 覆盖它的 ops 下标, gdma_id -> ops 下标)，watch 模式据此只重算受新指令影响的 layer"""
+        bd_owner: Dict[int, List[int]] = {}
+        gdma_owner: Dict[int, List[int]] = {}
+        for i in self.by_core.get(core_id, ()):
+            op = self.ops[i]
+            for bd_id in range(op.bd_start, op.bd_start + op.bd_count):
+                bd_owner.setdefault(bd_id, []).append(i)
+            for g_id in range(op.gdma_start, op.gdma_start + op.gdma_count):
+                gdma_owner.setdefault(g_id, []).append(i)
+        return bd_owner, gdma_owner
+
 # ----------------------------------------------------------
 # 6. ProfileParser
 # ----------------------------------------------------------
@@ -527,7 +1066,26 @@ FIELDS_PROFILE = {
     'op', 'type', 'start', 'end', 'cost',
     'bd_id', 'gdma_id', 'direction', 'size', 'bandwidth'
 }
+# 尾部汇总行关键字（均为单行，逐行收集后再做正则匹配）
+TAIL_SUMMARY_KEYS = ('API_END', 'TCYC', 'GDMA SUMMARY', 'DDR BW USAGE', 'flops:')
+
+
+def busy_settings(sm: Dict[str, Any]) -> Dict[str, Any]:
+    """busy_summary / BusyTracker.summary 的结果 -> profile settings 字段"""
+    return {
+        'spanCycle': int(sm['span']),
+        'tiuBusyCycle': int(sm['tiuBusy']),
+        'gdmaBusyCycle': int(sm['gdmaBusy']),
+        'overlapCycle': int(sm['overlap']),
+        'parallelism': sm['parallelism'],
+        'tiuWorkingRatio': sm['tiuWorkingRatio'],
+        'gdmaDdrAvgBandwidth': sm['gdmaDdrAvgBandwidth'],
+    }
+
 class ProfileParser:
+    def __init__(self, selection: Optional[ParseSelection] = None):
+        self.selection = selection if selection and selection.active else None
+
     def parse(
         self,
         raw_text: str,
@@ -537,33 +1095,101 @@ class ProfileParser:
     ) -> List[Dict[str, Any]]:
         if not raw_text:
             return []
-        entries = []
-        bd_entries, gdma_entries = [], []
-        for line in raw_text.splitlines():
+        return self.parse_lines(raw_text.splitlines(), bmodel_path, core_id, tiu_mhz)
+
+    def parse_lines(
+        self,
+        lines: Iterable[str],
+        bmodel_path: Optional[Path] = None,
+        core_id: int = 0,
+        tiu_mhz: int = 1000,
+        layer_ext: Optional['LayerExtractor'] = None,
+    ) -> List[Dict[str, Any]]:
+        """逐行解析，可直接传入 (解压) 文件流，无需整文件读入；多 core 可共用同一个 layer_ext"""
+        self.reset()
+        with trace('ProfileParser.feed', core_id) as rec:
+            rec['items'] = self.feed(lines)
+        if layer_ext is None and bmodel_path and bmodel_path.exists():
+            with trace('LayerExtractor.bmodel', core_id):
+                layer_ext = LayerExtractor(bmodel_path)
+        return self.build(layer_ext, core_id, tiu_mhz)
+
+    # ---- 增量接口（watch 模式：同一实例持续 feed 新追加的行） ----
+    def reset(self):
+        self.entries, self.bd_entries, self.gdma_entries = [], [], []
+        self.tail_lines = []
+
+    def feed(self, lines: Iterable[str]) -> int:
+        """解析新增行并累积到内部状态，返回新增条目数"""
+        if not hasattr(self, 'entries'):
+            self.reset()
+        sel = getattr(self, 'selection', None)
+        before = len(self.entries)
+        for line in lines:
             line = line.rstrip()
+            if any(k in line for k in TAIL_SUMMARY_KEYS):
+                self.tail_lines.append(line)
             if not line or line.startswith('-') or 'ENGINE_' in line:
                 continue
             left, right = self._split_two_cols(line)
+            if sel:   # 区间 / 算子预过滤，未命中的列不做完整解码
+                left = left if left and sel.accept_instr(left) else None
+                right = right if right and sel.accept_instr(right) else None
             if left:
                 e = self._parse_single(left, 'BD')
                 if e:
-                    entries.append(e)
-                    bd_entries.append(e)
+                    self.entries.append(e)
+                    self.bd_entries.append(e)
             if right:
                 e = self._parse_single(right, 'GDMA')
                 if e:
-                    entries.append(e)
-                    gdma_entries.append(e)
+                    self.entries.append(e)
+                    self.gdma_entries.append(e)
+        return len(self.entries) - before
+
+    def build(
+        self,
+        layer_ext: Optional['LayerExtractor'] = None,
+        core_id: int = 0,
+        tiu_mhz: int = 1000,
+    ) -> List[Dict[str, Any]]:
+        """由当前累积状态生成 [{'settings', 'entries'}]（不修改内部状态）"""
+        entries = list(self.entries)
         # ---- 注入 layer ----
-        if bmodel_path and bmodel_path.exists():
-            layer_ext = LayerExtractor(bmodel_path)
-            entries.extend(
-                layer_ext.make_layer_entries(bd_entries, gdma_entries, core_id, tiu_mhz)
-            )
+        if layer_ext:
+            with trace('LayerExtractor', core_id) as rec:
+                layers = layer_ext.make_layer_entries(self.bd_entries, self.gdma_entries, core_id, tiu_mhz)
+                entries.extend(layers)
+                rec['items'] = len(layers)
         # -------------------
         entries.sort(key=lambda x: x['start'])
-        summary = self._extract_tail_summary(raw_text)
-        return [{'settings': summary, 'entries': entries}]
+        with trace('ProfileParser.summary', core_id) as rec:
+            summary = self.tail_summary()
+            summary.update(self._busy_summary(tiu_mhz))
+            rec['items'] = len(self.entries)
+        with trace('concurrency', core_id) as rec:
+            concurrency = analyze_concurrency(entries)
+            rec['items'] = len(entries)
+        prof = {'settings': summary, 'entries': entries}
+        if concurrency:
+            prof['concurrency'] = concurrency
+        return [prof]
+
+    def _busy_summary(self, tiu_mhz: int) -> Dict[str, Any]:
+        """TIU/GDMA 忙碌、重叠与并行度（区间并集，单位 cycle），同 convert.py 的 Summary Table"""
+        if not self.entries:
+            return {}
+        bd, gdma = self.bd_entries, self.gdma_entries
+        ddr_bytes = sum(e.get('size', 0) for e in gdma if e.get('direction') in DDR_DIRECTIONS)
+        sm = busy_summary(
+            [e['start'] for e in bd], [e['start'] + e['cost'] for e in bd],
+            [e['start'] for e in gdma], [e['start'] + e['cost'] for e in gdma],
+            ddr_bytes=ddr_bytes, unit_us=1 / tiu_mhz)
+        return busy_settings(sm)
+
+    def tail_summary(self) -> Dict[str, Any]:
+        """尾部汇总行（API_END / TCYC / GDMA SUMMARY ...）解析出的 settings"""
+        return self._extract_tail_summary('\n'.join(self.tail_lines))
 
     # 用 ≥2 空格拆成左右两列
     def _split_two_cols(self, line: str):
@@ -640,8 +1266,24 @@ class ProfileParser:
 # ----------------------------------------------------------
 # 7. 主流程
 # ----------------------------------------------------------
-def parse_log(raw_log: str) -> Dict[str, Any]:
-    sections = extract_valid_sections(raw_log)
+def parse_log(raw_log: str, selection: Optional[ParseSelection] = None) -> Dict[str, Any]:
+    with trace('extract_valid_sections') as rec:
+        sections = extract_valid_sections(raw_log, selection)
+        rec['items'] = len(sections['lmemSections']) + len(sections['timestepSections'])
+    return parse_sections(sections, selection)
+
+def parse_log_file(log_file: Union[Path, 'MainLogReader'],
+                   selection: Optional[ParseSelection] = None) -> Dict[str, Any]:
+    """同 parse_log，主日志从文件流式切段（见 stream_valid_sections）；
+    传入 open_main_log 的结果时接着识别阶段已读的内容继续，不重读文件，读完后关闭"""
+    reader = log_file if isinstance(log_file, MainLogReader) else MainLogReader(
+        log_file, open_input(log_file, errors='ignore'))
+    with trace('extract_valid_sections', file=reader.path.name) as rec, reader:
+        sections = stream_valid_sections(reader, selection, stream=reader.stream)
+        rec['items'] = len(sections['lmemSections']) + len(sections['timestepSections'])
+    return parse_sections(sections, selection)
+
+def parse_sections(sections: Dict[str, Any], selection: Optional[ParseSelection] = None) -> Dict[str, Any]:
     lmem_sections = sections['lmemSections']
     timestep_sections = sections['timestepSections']
     profile_text = sections['profileText']
@@ -654,14 +1296,18 @@ def parse_log(raw_log: str) -> Dict[str, Any]:
     # 6.1 LMEM (保持不变)
     if lmem_sections:
         try:
-            lmem_parser = LmemParser(chip=chip)
-            results['lmem'] = lmem_parser.parse(lmem_sections)
+            with trace('LmemParser') as rec:
+                lmem_parser = LmemParser(chip=chip)
+                results['lmem'] = lmem_parser.parse(lmem_sections)
+                rec['items'] = sum(len(g['allocations']) for g in results['lmem'])
             valid['lmem'] = True
             if results['lmem']:
-                stats = MemoryStatistics()
-                stats.set_lmem_data(results['lmem'],
-                                    lmem_parser.get_global_max_timestep())
-                results['summary'] = stats.calculate_all_statistics()
+                with trace('MemoryStatistics') as rec:
+                    stats = MemoryStatistics()
+                    stats.set_lmem_data(results['lmem'],
+                                        lmem_parser.get_global_max_timestep())
+                    results['summary'] = stats.calculate_all_statistics()
+                    rec['items'] = len(results['lmem'])
                 valid['summary'] = True
         except Exception as e:
             print(f'[LMEM] 解析错误: {e}')
@@ -669,8 +1315,10 @@ def parse_log(raw_log: str) -> Dict[str, Any]:
     # 6.2 Timestep (保持不变)
     if timestep_sections:
         try:
-            ts_parser = TimestepParser()
-            results['timestep'] = ts_parser.parse(timestep_sections)
+            with trace('TimestepParser') as rec:
+                ts_parser = TimestepParser()
+                results['timestep'] = ts_parser.parse(timestep_sections)
+                rec['items'] = sum(len(g['entries']) for g in results['timestep'])
             valid['timestep'] = True
         except Exception as e:
             print(f'[Timestep] 解析错误: {e}')
@@ -678,7 +1326,7 @@ def parse_log(raw_log: str) -> Dict[str, Any]:
     # profile 部分仅改一行
     if profile_text:
         try:
-            profile_parser = ProfileParser()
+            profile_parser = ProfileParser(selection)
             results['profile'] = profile_parser.parse(profile_text)  # 单文件场景先空着
             valid['profile'] = True
         except Exception as e:
@@ -689,111 +1337,536 @@ def parse_log(raw_log: str) -> Dict[str, Any]:
 # ----------------------------------------------------------
 # 8. CLI（仅把 bmodel.json 路径和 core_id 传进 parse）
 # ----------------------------------------------------------
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument('folder', type=Path, help='包含所有日志/json 的文件夹')
-    ap.add_argument('-o', '--output', required=True, type=Path,
-                    help='输出文件夹（将写入 result.json 及 core_*.csv/xlsx）')
-    args = ap.parse_args()
-
-    in_dir: Path  = args.folder
-    out_dir: Path = args.output
-    if not in_dir.is_dir():
-        print(f'❌ 输入路径不是文件夹: {in_dir}')
-        exit(1)
-    out_dir.mkdir(parents=True, exist_ok=True)
-
-    # 1. 自动找主日志
-    main_log = None
-    for log_file in in_dir.glob('*.log'):
-        txt = log_file.read_text(encoding='utf-8', errors='ignore')
-        if '; action = lmem_assign' in txt or '; action = timestep_cycle' in txt:
-            main_log = txt
-            print(f'[info] 主日志: {log_file.name}')
-            break
+MAIN_LOG_MARKERS = ('; action = lmem_assign', '; action = timestep_cycle')
+
+def glob_inputs(in_dir: Path, pattern: str) -> List[Path]:
+    """按 pattern 查找输入文件，同时匹配 .gz / .zst 压缩版本"""
+    files = set(in_dir.glob(pattern))
+    for suffix in COMPRESS_SUFFIX.values():
+        files.update(in_dir.glob(pattern + suffix))
+    return sorted(files)
+
+# 缓存目录：不写进输入文件夹（可能只读或被归档），统一放在用户缓存目录下按输入路径区分
+def user_cache_dir() -> Path:
+    """LETSVIS_CACHE_DIR > $XDG_CACHE_HOME/letsvis > %LOCALAPPDATA%/letsvis > ~/.cache/letsvis"""
+    if os.environ.get('LETSVIS_CACHE_DIR'):
+        return Path(os.environ['LETSVIS_CACHE_DIR'])
+    base = os.environ.get('XDG_CACHE_HOME') or os.environ.get('LOCALAPPDATA')
+    return (Path(base) if base else Path.home() / '.cache') / 'letsvis'
+
+def default_cache_dir(in_dir: Path) -> Path:
+    """输入文件夹对应的缓存目录：<user_cache_dir>/<目录名>-<绝对路径 sha1 前 12 位>"""
+    path = in_dir.resolve()
+    return user_cache_dir() / f'{path.name}-{hashlib.sha1(str(path).encode()).hexdigest()[:12]}'
+
+# 主日志识别：先只嗅探文件开头有限长度，分类结果按 (size, mtime) 缓存到 <cache_dir>/discovery.json
+SNIFF_CHARS = 4 << 20
+DISCOVERY_INDEX = 'discovery.json'
+
+def _file_key(path: Path) -> Dict[str, int]:
+    st = path.stat()
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+def load_discovery_index(in_dir: Path, cache_dir: Optional[Path]) -> Dict[str, Any]:
+    """缓存记录的输入目录不一致时视为未命中"""
+    if cache_dir is None:
+        return {}
+    try:
+        index = json.loads((cache_dir / DISCOVERY_INDEX).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    return index if index.get('dir') == str(in_dir.resolve()) else {}
+
+def save_discovery_index(in_dir: Path, cache_dir: Optional[Path], index: Dict[str, Any]):
+    """缓存目录不可写时静默跳过"""
+    if cache_dir is None:
+        return
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        index['dir'] = str(in_dir.resolve())
+        (cache_dir / DISCOVERY_INDEX).write_text(json.dumps(index, ensure_ascii=False, indent=2), encoding='utf-8')
+    except OSError:
+        pass
+
+class MainLogReader:
+    """
+    open_main_log 的结果：主日志路径 + 已打开的文本流，识别阶段读过的内容不再重读
+      pending：已读出、尚未切段的文本，read() 先交出它再接着读流
+      stream ：已切段部分的 LogSectionStream 状态（全量扫描兜底时，命中前的内容边读边切段）
+    """
+    def __init__(self, path: Path, f: IO[str], pending: str = '',
+                 stream: Optional[LogSectionStream] = None):
+        self.path, self.f, self.pending = path, f, pending
+        self.stream = stream or LogSectionStream()
+
+    def read(self, size: int = -1) -> str:
+        if self.pending:
+            out, self.pending = self.pending, ''
+            return out
+        return self.f.read(size)
+
+    def scan_rest(self, tail: str = '', chunk_chars: int = LOG_CHUNK_CHARS) -> bool:
+        """继续读到出现主日志关键字为止：命中的块留作 pending，之前的块直接喂给 stream
+        （关键字即 KEPT_ACTIONS 的段首，命中前不会产出任何段，切段结果与从头解析一致）"""
+        keep = max(len(n) for n in MAIN_LOG_MARKERS) - 1
+        while True:
+            chunk = self.f.read(chunk_chars)
+            if not chunk:
+                return False
+            if any(n in tail + chunk for n in MAIN_LOG_MARKERS):
+                self.pending = chunk
+                return True
+            self.stream.feed(chunk)
+            tail = (tail + chunk)[-keep:]
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self) -> 'MainLogReader':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_main_log(in_dir: Path, cache_dir: Optional[Path] = None,
+                  sniff_chars: int = SNIFF_CHARS) -> Optional[MainLogReader]:
+    """
+    找到并打开主日志，返回的 MainLogReader 交给 parse_log_file 接着读（整个文件只读一遍）
+      1. cache_dir 指定时读写其中的 discovery.json：size/mtime 未变的文件直接按缓存分类
+      2. 其余文件只读前 sniff_chars 个字符判断，命中时这段文本留给切段
+      3. 前缀内未命中且未读完的文件保持打开，最后接着向后扫描兜底（扫描同时切段）
+    """
+    index = load_discovery_index(in_dir, cache_dir)
+    known = index.get('files', {})
+    keep = max(len(n) for n in MAIN_LOG_MARKERS) - 1
+    deferred: List[Tuple[MainLogReader, str]] = []
+    found = None
+    try:
+        for log_file in glob_inputs(in_dir, '*.log'):
+            key = _file_key(log_file)
+            rec = known.get(log_file.name)
+            if rec and {k: rec.get(k) for k in key} == key:
+                if rec['kind'] == 'main':
+                    found = MainLogReader(log_file, open_input(log_file, errors='ignore'))
+                    break
+                if rec['scope'] != 'full':
+                    deferred.append((MainLogReader(log_file, open_input(log_file, errors='ignore')), ''))
+                continue
+            f = open_input(log_file, errors='ignore')
+            head = f.read(sniff_chars)
+            if any(n in head for n in MAIN_LOG_MARKERS):
+                known[log_file.name] = {**key, 'kind': 'main', 'scope': 'prefix'}
+                found = MainLogReader(log_file, f, pending=head)
+                break
+            scope = 'full' if len(head) < sniff_chars else 'prefix'
+            known[log_file.name] = {**key, 'kind': 'other', 'scope': scope}
+            if scope == 'full':
+                f.close()
+                continue
+            reader = MainLogReader(log_file, f)
+            reader.stream.feed(head)
+            deferred.append((reader, head[-keep:]))
+
+        if found is None:
+            for reader, tail in deferred:
+                hit = reader.scan_rest(tail)
+                known[reader.path.name] = {**_file_key(reader.path), 'kind': 'main' if hit else 'other',
+                                           'scope': 'full'}
+                if hit:
+                    found = reader
+                    break
+    finally:
+        for reader, _ in deferred:
+            if reader is not found:
+                reader.close()
+
+    index['files'] = known
+    save_discovery_index(in_dir, cache_dir, index)
+    return found
+
+def find_main_log(in_dir: Path, cache_dir: Optional[Path] = None,
+                  sniff_chars: int = SNIFF_CHARS) -> Optional[Path]:
+    """只要主日志路径（watch 模式按字节偏移自行跟随读取）"""
+    reader = open_main_log(in_dir, cache_dir, sniff_chars)
+    if reader is None:
+        return None
+    reader.close()
+    return reader.path
+
+def list_profiles(in_dir: Path, selection: Optional[ParseSelection] = None) -> List[Tuple[int, Path]]:
+    """[(core_id, compiler_profile_<n> 路径)]，按文件名排序，只含选中的 core"""
+    out = []
+    for prof_path in sorted(in_dir.glob('compiler_profile_*')):
+        m = re.search(r'compiler_profile_(\d+)', prof_path.name)
+        if m and (selection is None or selection.want_core(int(m.group(1)))):
+            out.append((int(m.group(1)), prof_path))
+    return out
+
+def parse_folder(in_dir: Path, selection: Optional[ParseSelection] = None,
+                 lazy: bool = False, cache_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    解析整个输入文件夹（主日志 + bmodel.json + compiler_profile_*），返回 result 结构
+    selection 指定时未选中的 section / core 文件不读取
+    lazy=True 时 result['profile'] 为逐 core 解析的生成器，供 write_result_json 流式写出
+    cache_dir 指定时主日志识别结果缓存在其中（见 open_main_log）
+    """
+    sel = selection or ParseSelection()
+    # 1. 自动找主日志（lmem / timestep 都未选中时跳过）并接着识别时读到的位置解析
+    main = None
+    if sel.want('lmem') or sel.want('timestep'):
+        with trace('find_main_log'):
+            reader = open_main_log(in_dir, cache_dir)
+        if reader:
+            print(f'[info] 主日志: {reader.path.name}')
+            main = parse_log_file(reader, sel)
 
     # 2. 自动找 bmodel.json
-    bmodel_json = next(in_dir.glob('*.bmodel.json'), None)
+    want_profile = sel.want('profile')
+    bmodel_json = next(iter(glob_inputs(in_dir, '*.bmodel.json')), None) if want_profile else None
+    layer_ext = None
     if bmodel_json:
         print(f'[info] bmodel.json: {bmodel_json.name}')
-
-    # 3. 自动找所有 compiler_profile_<n>
-    prof_map, max_n = {}, -1
-    prof_parser = ProfileParser()
-    for prof_path in sorted(in_dir.glob('compiler_profile_*')):
-        m = re.search(r'compiler_profile_(\d+)', prof_path.name)
-        if not m:
+        with trace('LayerExtractor.bmodel') as rec:
+            layer_ext = LayerExtractor(bmodel_json, sel)
+            rec['items'] = len(layer_ext.ops)
+
+    # 3. 所有 compiler_profile_<n> 按 core 顺序组成 profile 数组
+    profiles = iter_folder_profiles(in_dir, sel, layer_ext) if want_profile else iter(())
+    return assemble_result(main, layer_ext, profiles, sel, lazy)
+
+def assemble_result(main: Optional[Dict[str, Any]], layer_ext: Optional['LayerExtractor'],
+                    profiles: Iterable[Dict[str, Any]], sel: ParseSelection,
+                    lazy: bool = False) -> Dict[str, Any]:
+    """
+    主日志结果（无则空骨架）+ opInfo + selection + profile 数组，parse_folder 与 batch_runner 共用
+    profiles 按 core 顺序给出（缺失的 core 为空骨架，见 profiles_by_core）
+    """
+    result = main or empty_result()
+    result['opInfo'] = layer_ext.op_table if layer_ext else []
+    if sel.active:
+        result['selection'] = sel.to_json()
+    if lazy:
+        # 流式写出时逐个 core 解析（valid 在 profile 之后写出，届时已更新）
+        result['valid']['profile'] = False
+        result['profile'] = _mark_profile_valid(profiles, result['valid'])
+    else:
+        result['profile'] = list(profiles)
+        result['valid']['profile'] = any(p['entries'] for p in result['profile'])
+    return result
+
+def empty_profile() -> Dict[str, Any]:
+    return {"settings": {}, "entries": []}
+
+def profiles_by_core(cores: Dict[int, Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """{core_id: profile} -> 按 core 顺序的 profile，缺失的 core 补空骨架"""
+    for n in range(max(cores, default=-1) + 1):
+        yield cores.get(n) or empty_profile()
+
+def iter_folder_profiles(in_dir: Path, sel: ParseSelection,
+                         layer_ext: Optional['LayerExtractor']) -> Iterator[Dict[str, Any]]:
+    """逐个 core 解析 compiler_profile_<n> 并建查询索引，缺失的 core 补空骨架"""
+    paths = dict(list_profiles(in_dir, sel))
+    prof_parser = ProfileParser(sel)
+    for n in range(max(paths, default=-1) + 1):
+        prof_path = paths.get(n)
+        if prof_path is None:
+            yield empty_profile()
             continue
-        n = int(m.group(1))
         print(f'[info] 加载 profile: {prof_path.name} (core {n})')
         try:
-            parsed = prof_parser.parse(
-                prof_path.read_text(encoding='utf-8'),
-                bmodel_path=bmodel_json,
-                core_id=n
-            )
-            prof_map[n] = parsed[0] if parsed else {"settings": {}, "entries": []}
-            max_n = max(max_n, n)
+            with trace('profile', n, file=prof_path.name) as rec, open_input(prof_path) as fp:
+                parsed = prof_parser.parse_lines(
+                    fp,
+                    core_id=n,
+                    layer_ext=layer_ext,
+                )
+                rec['items'] = len(parsed[0]['entries']) if parsed else 0
+            prof = parsed[0] if parsed else empty_profile()
         except Exception as e:
             print(f'❌[Profile] 解析失败 {prof_path.name}: {e}')
-            prof_map[n] = {"settings": {}, "entries": []}
+            prof = empty_profile()
 
-    # 4. 解析主日志或搭空骨架
-    if main_log:
-        result = parse_log(main_log)
-    else:
-        result = {
-            'lmem': None, 'timestep': None, 'summary': None,
-            'profile': [], 'chip': None,
-            'valid': {'lmem': False, 'summary': False, 'timestep': False, 'profile': False},
-            'success': True
-        }
+        yield index_profile(prof, n)
 
-    # 5. 组装 profile 数组
-    profile_arr = []
-    for i in range(max_n + 1):
-        profile_arr.append(prof_map.get(i, {"settings": {}, "entries": []}))
-    result['profile'] = profile_arr
-    result['valid']['profile'] = any(p['entries'] for p in profile_arr)
+def index_profile(prof: Dict[str, Any], core_id: int) -> Dict[str, Any]:
+    """每个 core 建查询索引（区间 + 倒排），前端筛选直接复用"""
+    if prof['entries']:
+        with trace('ProfileIndex', core_id) as rec:
+            prof['index'] = ProfileIndex(prof['entries']).to_json()
+            rec['items'] = len(prof['entries'])
+    return prof
+
+def _mark_profile_valid(profiles: Iterable[Dict[str, Any]], valid: Dict[str, bool]) -> Iterator[Dict[str, Any]]:
+    for prof in profiles:
+        if prof['entries']:
+            valid['profile'] = True
+        yield prof
+
+def tap_profiles(result: Dict[str, Any], fn) -> None:
+    """给惰性的 result['profile'] 挂逐 core 回调 fn(core_id, prof)，写出时随解析依次调用"""
+    src = result['profile']
+    def gen():
+        for core_id, prof in enumerate(src):
+            fn(core_id, prof)
+            yield prof
+    result['profile'] = gen()
+
+def empty_result() -> Dict[str, Any]:
+    return {
+        'lmem': None, 'timestep': None, 'summary': None,
+        'profile': [], 'chip': None, 'opInfo': [],
+        'valid': {'lmem': False, 'summary': False, 'timestep': False, 'profile': False},
+        'success': True
+    }
 
-    # 6. 写 result.json
-    result_json = out_dir / 'result.json'
-    result_json.write_text(json.dumps(result, ensure_ascii=False, indent=2))
+def write_result_json(result: Dict[str, Any], out_dir: Path, compress: Optional[str] = None,
+                      indent: Optional[int] = None, tail: Optional[Dict[str, Any]] = None) -> Path:
+    """
+    逐段流式写出（见 json_stream.py），默认紧凑格式，indent 指定时缩进
+    tail：{键: 无参函数}，profile 等流式部分写完后求值并追加为最后的键，写完后存入 result
+    """
+    f, result_json = open_output(out_dir / 'result.json', compress)
+    with f:
+        write_json(result, f, indent, tail=tail)
     print(f'✅ json 已生成 -> {result_json}')
+    return result_json
 
-    # 7. 自动导出 csv & excel（不依赖额外参数）
+def _resolve_op_info(entry: Dict[str, Any], op_info: List[str]) -> Dict[str, Any]:
+    e = dict(entry)
+    e['info'] = op_info[e.pop('opInfo')]
+    return e
+
+def has_excel() -> bool:
     try:
         import openpyxl
-        HAS_EXCEL = True
+        return True
     except ImportError:
-        HAS_EXCEL = False
-
+        return False
+
+def export_tables(result: Dict[str, Any], out_dir: Path, compress: Optional[str] = None,
+                  cores: Optional[Iterable[int]] = None):
+    """按 core 导出 csv & excel（无 openpyxl 时仅 csv），cores 指定时只导出这些 core"""
+    excel = has_excel()
+    selected = set(cores) if cores is not None else None
+    op_info = [format_op_info(m) for m in result.get('opInfo') or []]
     for core_id, prof in enumerate(result['profile']):
-        entries = prof['entries']
-        if not entries:
-            continue
-        keys = ['core_id', 'entry_id'] + list({k for e in entries for k in e})
-
-        # ---- CSV ----
-        csv_path = out_dir / f'core_{core_id}.csv'
-        with csv_path.open('w', newline='', encoding='utf-8') as f:
-            import csv
-            writer = csv.DictWriter(f, fieldnames=keys)
-            writer.writeheader()
-            for idx, entry in enumerate(entries):
-                writer.writerow({'core_id': core_id, 'entry_id': idx, **entry})
-        print(f'[csv] 已导出 -> {csv_path}')
-
-        # ---- Excel ----
-        if HAS_EXCEL:
-            xlsx_path = out_dir / f'core_{core_id}.xlsx'
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.append(keys)
-            for idx, entry in enumerate(entries):
-                ws.append([{'core_id': core_id, 'entry_id': idx, **entry}.get(k) for k in keys])
-            wb.save(xlsx_path)
-            print(f'[excel] 已导出 -> {xlsx_path}')
+        if prof['entries'] and (selected is None or core_id in selected):
+            export_core_table(core_id, prof['entries'], out_dir, compress, op_info, excel)
+
+def export_core_table(core_id: int, entries: List[Dict[str, Any]], out_dir: Path,
+                      compress: Optional[str] = None, op_info: Optional[List[str]] = None,
+                      excel: bool = False):
+    """单个 core 的 core_<n>.csv（excel=True 时另写 .xlsx）"""
+    if op_info:   # opInfo 下标还原为 info 列（每个算子只格式化一次）
+        entries = [_resolve_op_info(e, op_info) if 'opInfo' in e else e for e in entries]
+    keys = ['core_id', 'entry_id'] + list({k for e in entries for k in e})
+
+    # ---- CSV ----
+    f, csv_path = open_output(out_dir / f'core_{core_id}.csv', compress, newline='')
+    with f:
+        import csv
+        writer = csv.DictWriter(f, fieldnames=keys)
+        writer.writeheader()
+        for idx, entry in enumerate(entries):
+            writer.writerow({'core_id': core_id, 'entry_id': idx, **entry})
+    print(f'[csv] 已导出 -> {csv_path}')
+
+    # ---- Excel ----
+    if excel:
+        import openpyxl
+        xlsx_path = out_dir / f'core_{core_id}.xlsx'
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.append(keys)
+        for idx, entry in enumerate(entries):
+            ws.append([{'core_id': core_id, 'entry_id': idx, **entry}.get(k) for k in keys])
+        wb.save(xlsx_path)
+        print(f'[excel] 已导出 -> {xlsx_path}')
+
+
+def load_columns(out_dir: Path):
+    """打开 --export npy 写出的列式缓存：store[core][col] 为只读 mmap 列（首次访问时才映射），见 npy_columns.py"""
+    from npy_columns import ColumnStore
+    return ColumnStore(Path(out_dir))
+
+
+EXPORT_BACKENDS = ('sqlite', 'npy')
+
+def add_selection_args(ap: argparse.ArgumentParser):
+    ap.add_argument('--cores', help='只解析这些 core 的 profile，如 0,2-3')
+    ap.add_argument('--cycle-range', metavar='LO:HI',
+                    help='只保留与该 cycle 区间相交的 profile 指令（任一端可省，如 1000: ）')
+    ap.add_argument('--sections', help=f'只解析这些部分（逗号分隔，可选 {",".join(SECTIONS)}）')
+    ap.add_argument('--ops', help='只保留这些算子（逗号分隔，忽略大小写与 _N 后缀）')
+
+def selection_from_args(args: argparse.Namespace) -> ParseSelection:
+    try:
+        selection = ParseSelection.from_args(args.cores, args.cycle_range, args.sections, args.ops)
+    except ValueError as e:
+        print(f'❌ 过滤参数错误: {e}')
+        exit(1)
+    if selection.active:
+        print(f'[info] 解析范围: {selection.to_json()}')
+    return selection
+
+def main():
+    # 子命令：serve / diff / batch（其余参数沿用原有单目录解析用法）
+    if sys.argv[1:2] == ['serve']:
+        from query_server import serve_main
+        return serve_main(sys.argv[2:])
+    if sys.argv[1:2] == ['diff']:
+        from run_diff import diff_main
+        return diff_main(sys.argv[2:])
+    if sys.argv[1:2] == ['batch']:
+        from batch_runner import batch_main
+        return batch_main(sys.argv[2:])
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument('folder', type=Path, help='包含所有日志/json 的文件夹')
+    ap.add_argument('-o', '--output', required=True, type=Path,
+                    help='输出文件夹（将写入 result.json 及 core_*.csv/xlsx）')
+    ap.add_argument('--compress', choices=sorted(COMPRESS_SUFFIX),
+                    help='压缩输出 result.json 及 core_*.csv（gz 或 zst）')
+    ap.add_argument('--watch', action='store_true',
+                    help='持续跟随增长中的日志，只解析新追加内容并刷新输出')
+    ap.add_argument('--interval', type=float, default=2.0, help='watch 轮询间隔（秒）')
+    ap.add_argument('--timeline', action='store_true',
+                    help='多 core 全局时间线：result.json 增加 timeline 统计并导出 timeline.csv')
+    ap.add_argument('--buckets', type=int, default=256, help='timeline 活跃 core 数的时间桶个数')
+    ap.add_argument('--bandwidth', action='store_true',
+                    help='GDMA 分方向带宽时间桶：result.json 增加 bandwidth（对比 DDR Max BW）')
+    ap.add_argument('--bw-bucket', type=int, help='bandwidth 桶宽（cycle），缺省按时长自动切约 512 桶')
+    ap.add_argument('--ddr-max-bw', type=float, help='DDR Max BW（GB/s/core），缺省 34.132')
+    ap.add_argument('--top', type=int, default=0, help='热点 layer/op 汇总条数（缺省 0 不生成，常用 50）')
+    ap.add_argument('--series-layout', action='store_true',
+                    help='result.json 增加 seriesLayout：按 core / 泳道预排版的图表数值列')
+    ap.add_argument('--lmem-pack', action='store_true',
+                    help='result.json 增加 lmemPack：失败的 LMEM 分配按存活区间 best-fit 装箱后的额外 LMEM 估算')
+    ap.add_argument('--json-indent', type=int, metavar='N', help='result.json 缩进空格数（缺省紧凑格式）')
+    ap.add_argument('--export', action='append', choices=EXPORT_BACKENDS, default=[],
+                    help='额外导出格式（可重复）：sqlite -> output_dir/result.sqlite，'
+                         'npy -> output_dir/columns/（按 core 的列式 .npy，log_parser.load_columns 读取）')
+    add_selection_args(ap)
+    ap.add_argument('--trace-stages', nargs='?', type=Path, const=True, metavar='REPORT.json',
+                    help='分阶段耗时/内存报告，缺省写入 output_dir/trace_stages.json')
+    ap.add_argument('--trace-malloc', action='store_true', help='阶段报告附带 tracemalloc 峰值（较慢）')
+    ap.add_argument('--chrome-trace', type=Path, metavar='TRACE.json',
+                    help='同时导出 Chrome trace-event 格式（chrome://tracing / Perfetto）')
+    args = ap.parse_args()
+    check_compress_arg(ap, args.compress)
+    if args.watch:
+        # watch 只刷新 result.json / csv 的基础内容，以下附加阶段不会执行，直接拒绝而不是静默忽略
+        ignored = [flag for flag, on in (
+            ('--timeline', args.timeline), ('--bandwidth', args.bandwidth),
+            ('--series-layout', args.series_layout), ('--lmem-pack', args.lmem_pack),
+            ('--top', args.top > 0), ('--export', args.export),
+            ('--json-indent', args.json_indent is not None),
+            ('--trace-stages', args.trace_stages), ('--chrome-trace', args.chrome_trace)) if on]
+        if ignored:
+            ap.error(f'--watch 不支持与 {", ".join(ignored)} 同时使用')
+
+    in_dir: Path  = args.folder
+    out_dir: Path = args.output
+    if not in_dir.is_dir():
+        print(f'❌ 输入路径不是文件夹: {in_dir}')
+        exit(1)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    selection = selection_from_args(args)
+
+    if args.watch:
+        from live_watch import watch_to_output
+        return watch_to_output(in_dir, out_dir, args.compress, args.interval, selection)
+
+    tracer = None
+    if args.trace_stages or args.chrome_trace:
+        import stage_trace
+        tracer = stage_trace.enable(args.trace_malloc)
+
+    # 没有需要整份 profile 的阶段时，profile 在写 result.json 时逐 core 解析、写完即释放
+    stream = not (args.timeline or args.bandwidth or args.series_layout or args.export)
+    with trace('parse_folder') as rec:
+        result = parse_folder(in_dir, selection, lazy=stream, cache_dir=default_cache_dir(in_dir))
+        if not stream:
+            rec['items'] = sum(len(p['entries']) for p in result['profile'])
+
+    # 5.2 全局时间线（k 路归并各 core，已排序的 entries 不再整体重排）
+    if args.timeline:
+        from global_timeline import build_global_timeline, write_timeline_csv
+        with trace('timeline'):
+            result['timeline'] = build_global_timeline(result['profile'], args.buckets)
+            write_timeline_csv(result['profile'], out_dir, args.compress)
+
+    # 5.3 GDMA 带宽时间桶（按方向、按 core）
+    if args.bandwidth:
+        from gdma_bandwidth import build_bandwidth_timeline, DEFAULT_DDR_MAX_BW
+        with trace('bandwidth'):
+            result['bandwidth'] = build_bandwidth_timeline(
+                result['profile'], args.bw_bucket, args.ddr_max_bw or DEFAULT_DDR_MAX_BW)
+
+    # 5.4 profile 图表预排版数值列（前端直接包成 TypedArray）
+    if args.series_layout:
+        from series_layout import build_series_layout
+        with trace('seriesLayout') as rec:
+            result['seriesLayout'] = build_series_layout(result['profile'])
+            rec['items'] = sum(l['count'] for c in result['seriesLayout']['cores'] for l in c['lanes'])
+
+    # 5.5 LMEM what-if：失败分配按存活区间 best-fit 装箱，估算每组最少额外 LMEM
+    if args.lmem_pack:
+        from lmem_packer import pack_lmem, print_lmem_pack
+        with trace('lmemPack') as rec:
+            result['lmemPack'] = pack_lmem(result['lmem'])
+            rec['items'] = sum(g['failed'] for g in result['lmemPack']['groups'])
+        print_lmem_pack(result['lmemPack'])
+
+    # 5.6 热点 layer / op 汇总（最后一个键：流式时随 profile 逐 core 累加，profile 写完后再取 top N 追加写出）
+    tail = {}
+    if args.top > 0:
+        from hotspots import build_hotspots, print_hotspots, new_tables, add_profile, hotspots_from_tables
+        if stream:
+            tables = new_tables()
+            tap_profiles(result, lambda core_id, prof: add_profile(tables, core_id, prof))
+            tail['hotspots'] = lambda: hotspots_from_tables(tables, args.top)
+        else:
+            with trace('hotspots'):
+                result['hotspots'] = build_hotspots(result['profile'], args.top)
+            print_hotspots(result['hotspots'])
+
+    # 6. 写 result.json（流式时 csv & excel 随各 core 一起导出）
+    if stream:
+        excel, op_info = has_excel(), [format_op_info(m) for m in result['opInfo']]
+        def export_core(core_id, prof):
+            if prof['entries']:
+                with trace('export_tables', core_id) as rec:
+                    export_core_table(core_id, prof['entries'], out_dir, args.compress, op_info, excel)
+                    rec['items'] = len(prof['entries'])
+        tap_profiles(result, export_core)
+    with trace('write_result_json'):
+        write_result_json(result, out_dir, args.compress, args.json_indent, tail)
+    if stream and args.top > 0:
+        print_hotspots(result['hotspots'])
+
+    # 7. 自动导出 csv & excel（不依赖额外参数）
+    if not stream:
+        with trace('export_tables') as rec:
+            export_tables(result, out_dir, args.compress)
+            rec['items'] = sum(len(p['entries']) for p in result['profile'])
+
+    # 7.1 额外导出格式
+    if 'sqlite' in args.export:
+        from sqlite_export import export_sqlite
+        with trace('export_sqlite') as rec:
+            export_sqlite(result, out_dir)
+            rec['items'] = sum(len(p['entries']) for p in result['profile'])
+    if 'npy' in args.export:
+        from npy_columns import write_columns
+        with trace('export_npy') as rec:
+            write_columns(result, out_dir)
+            rec['items'] = sum(len(p['entries']) for p in result['profile'])
+
+    # 8. 阶段报告
+    if tracer:
+        report = out_dir / 'trace_stages.json' if args.trace_stages in (None, True) else args.trace_stages
+        tracer.write(report, args.chrome_trace)
 
 # def main():
 #     ap = argparse.ArgumentParser()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+profile 列式缓存（log_parser.py --export npy），供 notebook 脚本分析，不必 json.load 整个 result.json
+  output_dir/columns/columns.json        ：列 dtype、字符串表（engine/op/type/direction/opInfo）、各 core 条数
+  output_dir/columns/core_<n>/<col>.npy  ：每个 core 每列一个标准 .npy（NumPy 1.0 格式，np.load 可直接读）
+  - 写出只用标准库 array 拼 .npy 头 + 原始字节，解析机器无需安装 numpy
+  - 读取用 log_parser.load_columns()：有 numpy 时 np.load(mmap_mode='r')，否则 mmap + memoryview.cast；
+    列在首次访问时才打开，只有用到的页会被读入
+  - 缺失值：整数列为 -1，bandwidth 为 NaN；op/type/engine/direction 为字符串表下标
+usage:
+    python log_parser.py input_dir/ -o output_dir/ --export npy
+    cols = load_columns('output_dir/')
+    c = cols[3]                       # core 3
+    gdma = c['engine'] == cols.code('engine', 'GDMA')
+    c['size'][gdma].sum()
+"""
+import array
+import ast
+import json
+import mmap
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+COLUMNS_DIR = 'columns'
+META_NAME = 'columns.json'
+NAN = float('nan')
+# 列名 -> (array typecode, npy descr, 缺失值)
+COLUMNS = {
+    'start':     ('q', '<i8', -1),
+    'end':       ('q', '<i8', -1),
+    'cost':      ('q', '<i8', -1),
+    'engine':    ('b', '|i1', -1),
+    'op':        ('i', '<i4', -1),
+    'type':      ('i', '<i4', -1),
+    'bd_id':     ('i', '<i4', -1),
+    'gdma_id':   ('i', '<i4', -1),
+    'direction': ('b', '|i1', -1),
+    'size':      ('q', '<i8', -1),
+    'bandwidth': ('d', '<f8', NAN),
+    'file_line': ('i', '<i4', -1),
+    'opInfo':    ('i', '<i4', -1),
+}
+# 字符串表编码的列
+CODED = ('engine', 'op', 'type')
+NPY_MAGIC = b'\x93NUMPY'
+NPY_ALIGN = 64
+DESCR_TYPECODE = {descr: code for code, descr, _ in COLUMNS.values()}
+
+
+# ---------- 1. .npy 读写（NumPy 格式 1.0，一维 C 序） ----------
+def write_npy(path: Path, data: array.array, descr: str):
+    header = repr({'descr': descr, 'fortran_order': False, 'shape': (len(data),)})
+    # 魔数(6) + 版本(2) + 头长度(2) + 头，补空格到 64 字节对齐，以 '\n' 结尾
+    pad = -(len(NPY_MAGIC) + 4 + len(header) + 1) % NPY_ALIGN
+    header = (header + ' ' * pad + '\n').encode('latin1')
+    if sys.byteorder == 'big' and data.itemsize > 1:
+        data = array.array(data.typecode, data)
+        data.byteswap()
+    with path.open('wb') as f:
+        f.write(NPY_MAGIC + b'\x01\x00' + len(header).to_bytes(2, 'little'))
+        f.write(header)
+        data.tofile(f)
+
+
+def read_npy_header(f) -> Dict[str, Any]:
+    """返回 {'descr', 'shape', 'offset'}（支持 1.0 / 2.0 格式头）"""
+    if f.read(6) != NPY_MAGIC:
+        raise ValueError(f'不是 .npy 文件: {f.name}')
+    major = f.read(2)[0]
+    n = 2 if major == 1 else 4
+    hlen = int.from_bytes(f.read(n), 'little')
+    header = ast.literal_eval(f.read(hlen).decode('latin1'))
+    if header.get('fortran_order') or len(header['shape']) != 1:
+        raise ValueError(f'只支持一维 C 序数组: {f.name}')
+    return {'descr': header['descr'], 'shape': header['shape'], 'offset': 6 + 2 + n + hlen}
+
+
+def open_npy(path: Path):
+    """只读映射一列：有 numpy 返回 np.memmap，否则返回 memoryview（同样按需分页读入）"""
+    if HAS_NUMPY:
+        return np.load(path, mmap_mode='r')
+    with path.open('rb') as f:
+        h = read_npy_header(f)
+        code = DESCR_TYPECODE.get(h['descr'])
+        if code is None or (sys.byteorder == 'big' and h['descr'][0] == '<'):
+            raise ValueError(f'无 numpy 时不支持的 dtype: {h["descr"]}')
+        if not h['shape'][0]:
+            return memoryview(array.array(code))
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mm)[h['offset']:].cast(code)
+
+
+# ---------- 2. 写出 ----------
+class _Strings:
+    def __init__(self, init: Optional[List[str]] = None):
+        self.items: List[str] = list(init or [])
+        self.ids = {s: i for i, s in enumerate(self.items)}
+
+    def __call__(self, name: Any) -> int:
+        if name is None:
+            return -1
+        i = self.ids.get(name)
+        if i is None:
+            i = self.ids[name] = len(self.items)
+            self.items.append(name)
+        return i
+
+
+def _core_columns(entries: List[Dict[str, Any]], tables: Dict[str, _Strings]) -> Dict[str, array.array]:
+    cols = {name: array.array(code) for name, (code, _, _) in COLUMNS.items()}
+    appenders = [(cols[name].append, name, tables.get(name), miss) for name, (_, _, miss) in COLUMNS.items()]
+    for e in entries:
+        g = e.get
+        for append, name, table, miss in appenders:
+            v = g(name)
+            if table is not None:
+                append(table(v))
+            else:
+                append(miss if v is None else v)
+    return cols
+
+
+def write_columns(result: Dict[str, Any], out_dir: Path) -> Path:
+    """每个 core 每列一个 .npy，字符串表与列信息写入 columns.json"""
+    from gdma_bandwidth import DIRECTION_NAMES
+    from log_parser import format_op_info
+
+    root = out_dir / COLUMNS_DIR
+    root.mkdir(parents=True, exist_ok=True)
+    tables = {'engine': _Strings(['BD', 'GDMA', 'LAYER']), 'op': _Strings(), 'type': _Strings()}
+    cores = []
+    for core, prof in enumerate(result.get('profile') or ()):
+        entries = prof.get('entries') or []
+        if not entries:
+            continue
+        core_dir = root / f'core_{core}'
+        core_dir.mkdir(exist_ok=True)
+        for name, data in _core_columns(entries, tables).items():
+            write_npy(core_dir / f'{name}.npy', data, COLUMNS[name][1])
+        cores.append({'core': core, 'count': len(entries)})
+
+    meta = {
+        'version': 1,
+        'columns': {name: descr for name, (_, descr, _) in COLUMNS.items()},
+        'strings': {
+            **{k: t.items for k, t in tables.items()},
+            'direction': list(DIRECTION_NAMES),
+            'opInfo': [format_op_info(m) for m in result.get('opInfo') or ()],
+        },
+        'cores': cores,
+    }
+    (root / META_NAME).write_text(json.dumps(meta, ensure_ascii=False), encoding='utf-8')
+    print(f'[npy] 已导出 -> {root}（{len(cores)} 个 core，{sum(c["count"] for c in cores)} 条）')
+    return root
+
+
+# ---------- 3. 读取 ----------
+class CoreColumns(Mapping):
+    """单个 core 的列：首次访问某列时才映射对应 .npy"""
+
+    def __init__(self, folder: Path, names: List[str], count: int):
+        self.folder, self.names, self.count = folder, names, count
+        self._cols: Dict[str, Any] = {}
+
+    def __getitem__(self, name: str):
+        col = self._cols.get(name)
+        if col is None:
+            if name not in self.names:
+                raise KeyError(name)
+            col = self._cols[name] = open_npy(self.folder / f'{name}.npy')
+        return col
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class ColumnStore(Mapping):
+    """columns/ 目录：store[core] -> CoreColumns，code()/decode() 做字符串表换算"""
+
+    def __init__(self, out_dir: Path):
+        root = out_dir / COLUMNS_DIR if (out_dir / COLUMNS_DIR).is_dir() else out_dir
+        self.meta = json.loads((root / META_NAME).read_text(encoding='utf-8'))
+        self.strings: Dict[str, List[str]] = self.meta['strings']
+        names = list(self.meta['columns'])
+        self.cores = {c['core']: CoreColumns(root / f'core_{c["core"]}', names, c['count'])
+                      for c in self.meta['cores']}
+        self._codes = {k: {s: i for i, s in enumerate(v)} for k, v in self.strings.items()}
+
+    def __getitem__(self, core: int) -> CoreColumns:
+        return self.cores[core]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.cores)
+
+    def __len__(self) -> int:
+        return len(self.cores)
+
+    def code(self, column: str, name: str) -> int:
+        """字符串 -> 编码（不存在返回 -1，比较时不会命中任何行）"""
+        return self._codes[column].get(name, -1)
+
+    def decode(self, column: str, code: int) -> Optional[str]:
+        table = self.strings[column]
+        return table[code] if 0 <= code < len(table) else None
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Profile entries 查询索引（单 core）
+  - 区间索引：entries 按 start 升序排列后，在原数组上建隐式平衡二叉树（cgranges 布局），
+    每个节点记录子树最大 end，重叠查询 O(log n + k)
+  - 倒排索引：op / type / bd_id / gdma_id -> entry 下标（升序）
+  - splice()：替换 pos 之后的尾部（watch 模式新指令多落在末尾），只重算受影响的节点与倒排项
+  - 同一套结构由 log_parser.py 写入 result.json 的 profile[i]['index']，
+    前端 profile-index.js 直接复用，脚本侧用法：
+
+    >>> idx = ProfileIndex.from_profile(result['profile'][0])
+    >>> rows = [idx.entries[i] for i in idx.query(window=(1000, 5000), op=['Conv2D_3'])]
+"""
+import heapq
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+# entry 字段 -> 导出的倒排表键名
+INVERTED_FIELDS = {
+    'op': 'byOp',
+    'type': 'byType',
+    'bd_id': 'byBdId',
+    'gdma_id': 'byGdmaId',
+}
+
+# 子树规模 <= 2^(k+1) 时直接线性扫描
+SCAN_LEVEL = 3
+
+
+def entry_end(e: Dict[str, Any]) -> int:
+    """与前端绘制一致：矩形右边界 = start + cost"""
+    return e['start'] + e['cost']
+
+
+def build_max_end(ends: List[int], max_end: Optional[List[int]] = None,
+                  start: int = 0, points: Iterable[int] = ()) -> Tuple[List[int], int]:
+    """在按 start 排序的数组上构建隐式树的子树最大 end，返回 (maxEnd, 根层级)
+    传入旧的 max_end 时原地更新：ends[start:] 与 ends[p]（p in points）变化，
+    只重算子树覆盖到这些位置的节点"""
+    n = len(ends)
+    if max_end is None:
+        max_end, start, points = list(ends), 0, ()
+    else:
+        del max_end[start:]
+        max_end.extend(ends[start:])
+        points = [p for p in points if p < start]
+        for p in points:
+            max_end[p] = ends[p]
+    if n == 0:
+        return max_end, -1
+    last_i = (n - 1) & ~1
+    last = ends[last_i]
+    k = 1
+    while (1 << k) <= n:
+        x = 1 << (k - 1)
+        # 第 k 层节点 i = 2x-1 + j*4x，子树覆盖 [i-2x+1, i+2x-1]
+        first = (x << 1) - 1
+        if start > first + (x << 1) - 1:
+            first += (start - first - (x << 1) + 1 + (x << 2) - 1) // (x << 2) * (x << 2)
+        # points 各自的第 k 层祖先（已在 first 之后的不必重复）
+        nodes = {(p >> (k + 1) << (k + 1)) + (x << 1) - 1 for p in points}
+        for i in sorted(i for i in nodes if i < first) + list(range(first, n, x << 2)):
+            el = max_end[i - x]
+            er = max_end[i + x] if i + x < n else last
+            e = ends[i]
+            if el > e: e = el
+            if er > e: e = er
+            max_end[i] = e
+        last_i = last_i - x if (last_i >> k) & 1 else last_i + x
+        if last_i < n and max_end[last_i] > last:
+            last = max_end[last_i]
+        k += 1
+    return max_end, k - 1
+
+
+class ProfileIndex:
+    """单 core profile 查询索引，entries 需已按 start 升序"""
+
+    def __init__(self, entries: List[Dict[str, Any]], index: Optional[Dict[str, Any]] = None):
+        self.entries = entries
+        self.starts = [e['start'] for e in entries]
+        self.ends = [entry_end(e) for e in entries]
+        if index and len(index.get('maxEnd', ())) == len(entries):
+            self.max_end = index['maxEnd']
+            self.root_level = index.get('rootLevel', len(entries).bit_length() - 1)
+            self.inverted = {key: index.get(key, {}) for key in INVERTED_FIELDS.values()}
+            self.op_bounds = index.get('opBounds', {})
+        else:
+            self.max_end, self.root_level = build_max_end(self.ends)
+            self.inverted = self._build_inverted(entries)
+            self.op_bounds = self._build_op_bounds(entries)
+
+    @classmethod
+    def from_profile(cls, prof: Dict[str, Any]) -> 'ProfileIndex':
+        """由 result.json 中的单个 profile 项（含可选 index）构造"""
+        return cls(prof.get('entries', []), prof.get('index'))
+
+    # ---- 构建 ----
+    @staticmethod
+    def _build_inverted(entries):
+        inverted = {key: {} for key in INVERTED_FIELDS.values()}
+        for pos, e in enumerate(entries):
+            for field, key in INVERTED_FIELDS.items():
+                v = e.get(field)
+                if v is not None:
+                    inverted[key].setdefault(str(v), []).append(pos)
+        return inverted
+
+    @staticmethod
+    def _build_op_bounds(entries):
+        bounds = {}
+        for e in entries:
+            b = bounds.get(e['op'])
+            end = entry_end(e)
+            if b is None:
+                bounds[e['op']] = [e['start'], end]
+            elif end > b[1]:
+                b[1] = end
+        return bounds
+
+    def splice(self, pos: int, removed: List[Dict[str, Any]],
+               replaced: Optional[Dict[int, Dict[str, Any]]] = None):
+        """self.entries[pos:] 已被替换（removed 为替换前的 entries[pos:]），同步更新索引；
+        replaced 为 pos 之前原地替换的条目 {下标: 旧条目}，新旧条目只允许 end / cost 不同"""
+        entries = self.entries
+        replaced = replaced or {}
+        del self.starts[pos:], self.ends[pos:]
+        self.starts.extend(e['start'] for e in entries[pos:])
+        self.ends.extend(entry_end(e) for e in entries[pos:])
+        for i in replaced:
+            self.ends[i] = entry_end(entries[i])
+        self.max_end, self.root_level = build_max_end(self.ends, self.max_end, pos, replaced)
+
+        # 倒排表：下标升序，>= pos 的都在各列表末尾
+        for e in removed:
+            for field, key in INVERTED_FIELDS.items():
+                v = e.get(field)
+                if v is None:
+                    continue
+                table = self.inverted[key]
+                postings = table.get(str(v))
+                while postings and postings[-1] >= pos:
+                    postings.pop()
+                if postings is not None and not postings:
+                    del table[str(v)]
+        for i in range(pos, len(entries)):
+            e = entries[i]
+            for field, key in INVERTED_FIELDS.items():
+                v = e.get(field)
+                if v is not None:
+                    self.inverted[key].setdefault(str(v), []).append(i)
+
+        # opBounds：只扩不缩；真正移除的条目恰好是边界、且新条目没有达到该边界时，按该 op 的倒排表重算
+        bounds = self.op_bounds
+        added = sorted(replaced) + list(range(pos, len(entries)))
+        kept = {id(entries[i]) for i in added}
+        recheck: Dict[str, list] = {}           # op -> [待确认的 start 边界, 待确认的 end 边界]
+        for e in removed + list(replaced.values()):
+            b = bounds.get(e['op'])
+            if b is None or id(e) in kept:
+                continue
+            need = recheck.setdefault(e['op'], [None, None])
+            if e['start'] == b[0]:
+                need[0] = b[0]
+            if entry_end(e) == b[1]:
+                need[1] = b[1]
+        for i in added:
+            e = entries[i]
+            b = bounds.get(e['op'])
+            end = self.ends[i]
+            if b is None:
+                bounds[e['op']] = [e['start'], end]
+            else:
+                if e['start'] < b[0]:
+                    b[0] = e['start']
+                if end > b[1]:
+                    b[1] = end
+            need = recheck.get(e['op'])
+            if need:
+                if need[0] is not None and e['start'] <= need[0]:
+                    need[0] = None
+                if need[1] is not None and end >= need[1]:
+                    need[1] = None
+        for op, need in recheck.items():
+            if need == [None, None]:
+                continue
+            postings = self.postings('op', op)
+            if postings:
+                bounds[op] = [self.starts[postings[0]], max(self.ends[i] for i in postings)]
+            else:
+                del bounds[op]
+
+    def to_json(self, copy: bool = False) -> Dict[str, Any]:
+        """copy=True 时复制各列表（索引之后还会被 splice 原地修改时使用）"""
+        if copy:
+            return {
+                'sortedBy': 'start',
+                'rootLevel': self.root_level,
+                'maxEnd': list(self.max_end),
+                **{key: {v: list(p) for v, p in table.items()} for key, table in self.inverted.items()},
+                'opBounds': {op: list(b) for op, b in self.op_bounds.items()},
+            }
+        return {
+            'sortedBy': 'start',
+            'rootLevel': self.root_level,
+            'maxEnd': self.max_end,
+            **self.inverted,
+            'opBounds': self.op_bounds,
+        }
+
+    # ---- 查询 ----
+    def postings(self, field: str, value) -> List[int]:
+        """倒排表：field 取值为 value 的 entry 下标（升序）"""
+        return self.inverted[INVERTED_FIELDS[field]].get(str(value), [])
+
+    def overlap(self, lo: float, hi: float) -> List[int]:
+        """与闭区间 [lo, hi] 有交集的 entry 下标（升序）"""
+        n = len(self.entries)
+        out = []
+        if n == 0:
+            return out
+        starts, ends, max_end = self.starts, self.ends, self.max_end
+        stack = [(self.root_level, (1 << self.root_level) - 1, False)]
+        while stack:
+            k, x, left_done = stack.pop()
+            if k <= SCAN_LEVEL:
+                i0 = x >> k << k
+                i1 = min(i0 + (1 << (k + 1)) - 1, n)
+                for i in range(i0, i1):
+                    if starts[i] > hi:
+                        break
+                    if ends[i] >= lo:
+                        out.append(i)
+            elif not left_done:
+                y = x - (1 << (k - 1))
+                stack.append((k, x, True))
+                if y >= n or max_end[y] >= lo:
+                    stack.append((k - 1, y, False))
+            elif x < n and starts[x] <= hi:
+                if ends[x] >= lo:
+                    out.append(x)
+                stack.append((k - 1, x + (1 << (k - 1)), False))
+        return out
+
+    def start_range(self, start_min=None, start_max=None) -> Tuple[int, int]:
+        """start 落在 [start_min, start_max] 内的下标区间 [lo, hi)"""
+        lo = bisect_left(self.starts, start_min) if start_min is not None else 0
+        hi = bisect_right(self.starts, start_max) if start_max is not None else len(self.starts)
+        return lo, hi
+
+    def op_boundary(self, op: str) -> Optional[Tuple[int, int]]:
+        """op 覆盖的最左 start 与最右 end"""
+        b = self.op_bounds.get(op)
+        return tuple(b) if b else None
+
+    def query(
+        self,
+        start_min=None,
+        start_max=None,
+        window: Optional[Tuple[Optional[float], Optional[float]]] = None,
+        engine: str = 'all',
+        op: Optional[Iterable[str]] = None,
+        type: Optional[Iterable[str]] = None,
+        bd_id: Optional[int] = None,
+        gdma_id: Optional[int] = None,
+        duration_min=None,
+        duration_max=None,
+        direction='all',
+    ) -> List[int]:
+        """组合筛选（与前端 profile 表格筛选语义一致），返回 entry 下标（升序）"""
+        lo_pos, hi_pos = self.start_range(start_min, start_max)
+        op = set(op or ())
+        type = set(type or ())
+
+        # 1. 选最短的候选来源：倒排表 / 时间窗口 / start 区间
+        sources = []
+        if op:
+            sources.append([self.postings('op', v) for v in op])
+        if type:
+            sources.append([self.postings('type', v) for v in type])
+        if bd_id is not None:
+            sources.append([self.postings('bd_id', bd_id)])
+        if gdma_id is not None:
+            sources.append([self.postings('gdma_id', gdma_id)])
+        if sources:
+            lists = min(sources, key=lambda ls: sum(len(l) for l in ls))
+            merged = lists[0] if len(lists) == 1 else list(heapq.merge(*lists))
+            cand = merged[bisect_left(merged, lo_pos):bisect_left(merged, hi_pos)]
+        elif window is not None:
+            w_lo = window[0] if window[0] is not None else float('-inf')
+            w_hi = window[1] if window[1] is not None else float('inf')
+            cand = [i for i in self.overlap(w_lo, w_hi) if lo_pos <= i < hi_pos]
+        else:
+            cand = range(lo_pos, hi_pos)
+
+        # 2. 其余条件逐条校验
+        w_lo = w_hi = None
+        if window is not None:
+            w_lo, w_hi = window
+        out = []
+        for i in cand:
+            e = self.entries[i]
+            if w_lo is not None and self.ends[i] < w_lo: continue
+            if w_hi is not None and self.starts[i] > w_hi: continue
+            if engine != 'all' and e.get('engine') != engine: continue
+            if op and e['op'] not in op: continue
+            if type and e['type'] not in type: continue
+            if bd_id is not None and e.get('bd_id') != bd_id: continue
+            if gdma_id is not None and e.get('gdma_id') != gdma_id: continue
+            if duration_min is not None and e['cost'] < duration_min: continue
+            if duration_max is not None and e['cost'] > duration_max: continue
+            if direction != 'all' and e.get('direction') != direction: continue
+            out.append(i)
+        return out
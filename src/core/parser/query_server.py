@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地查询服务：解析（或读取缓存）一次，按需返回视图所需的数据切片
+usage:
+    python log_parser.py serve input_dir/ [--cache cache_dir/] [--port 8765] [--refresh] [--watch]
+    前端：页面 URL 加 ?serve（非默认地址时 ?serve=http://host:port），profile 视图改为向本服务按 core 拉取
+
+仅依赖标准库（asyncio），默认只监听 127.0.0.1，可离线使用；多个浏览器页面共享同一份解析结果。
+
+接口（均为 GET，返回 JSON）:
+    /api/manifest                          运行概况：各 core 条目数/总 cycle/settings、opInfo、LMEM/Timestep 分组
+    /api/profile/<core>?start=&end=&...    时间窗口切片，可附加 engine/op/type/bd_id/gdma_id 筛选
+    /api/tiles/<core>?level=&tile=         LOD 瓦片：每瓦片 TILE_BUCKETS 个桶，按 engine 统计条数与忙碌 cycle
+    /api/lmem                              LMEM 分组 settings + summary
+    /api/lmem/<g>/steps                    分组逐 step 统计
+    /api/lmem/<g>/steps/<s>                单 step 统计 + 该 step 活跃的 allocations
+    /api/timestep                          Timestep 分组概况
+    /api/timestep/<g>                      分组 entries
+    /api/layers/<core>?file_line=&op=      Layer 条目查询
+"""
+import re
+import gzip
+import json
+import asyncio
+import argparse
+import threading
+import collections
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+from profile_index import ProfileIndex
+
+TILE_BUCKETS = 256
+TILE_CACHE_SIZE = 1024
+DEFAULT_LIMIT = 20000
+GZIP_MIN_BYTES = 1024
+ENGINES = ('BD', 'GDMA', 'LAYER')
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# ----------------------------------------------------------
+# 1. 运行数据（只读共享，多连接复用）
+# ----------------------------------------------------------
+class RunStore:
+    """一次运行的解析结果 + 各 core 查询索引；查询在线程池中执行，瓦片缓存读写加锁"""
+
+    def __init__(self, result: Dict[str, Any]):
+        self.version = 0
+        self._tiles = collections.OrderedDict()
+        self._tiles_lock = threading.Lock()
+        self.set_result(result)
+
+    def set_result(self, result: Dict[str, Any]):
+        self.result = result
+        self.indexes = {}
+        self.layers = {}
+        for core, prof in enumerate(result.get('profile') or []):
+            self._index_core(core, prof)
+        self.ts_counts = max(
+            (a.get('max_timestep', 0) for g in (result.get('lmem') or []) for a in g['allocations']),
+            default=0)
+        self._bump()
+
+    def update_core(self, core: int, prof: Dict[str, Any]):
+        """替换单个 core 的 profile（watch 模式增量更新）"""
+        profiles = self.result.setdefault('profile', [])
+        while len(profiles) <= core:
+            profiles.append({'settings': {}, 'entries': []})
+        profiles[core] = prof
+        self.result['valid']['profile'] = any(p['entries'] for p in profiles)
+        self._index_core(core, prof)
+        self._bump()
+
+    def _index_core(self, core: int, prof: Dict[str, Any]):
+        self.indexes[core] = ProfileIndex.from_profile(prof)
+        by_line, by_op = {}, {}
+        for pos, e in enumerate(prof.get('entries', [])):
+            if e.get('engine') == 'LAYER':
+                by_line.setdefault(str(e.get('file_line')), []).append(pos)
+                by_op.setdefault(e['op'], []).append(pos)
+        self.layers[core] = (by_line, by_op)
+
+    def _bump(self):
+        with self._tiles_lock:
+            self.version += 1
+            self._tiles.clear()
+
+    # ---- 工具 ----
+    def _index(self, core: int) -> ProfileIndex:
+        idx = self.indexes.get(core)
+        if idx is None:
+            raise HttpError(404, f'core {core} 不存在')
+        return idx
+
+    def _group(self, key: str, g: int) -> Dict[str, Any]:
+        groups = self.result.get(key) or []
+        if not 0 <= g < len(groups):
+            raise HttpError(404, f'{key} 分组 {g} 不存在')
+        return groups[g]
+
+    def total_cycle(self, core: int) -> int:
+        idx = self._index(core)
+        settings = self.result['profile'][core].get('settings', {})
+        return settings.get('totalCycle') or max(idx.ends, default=0)
+
+    # ---- 接口实现 ----
+    def manifest(self) -> Dict[str, Any]:
+        cores = []
+        for core, prof in enumerate(self.result.get('profile') or []):
+            cores.append({
+                'core': core,
+                'entries': len(prof.get('entries', [])),
+                'totalCycle': self.total_cycle(core),
+                'settings': prof.get('settings', {}),
+            })
+        summary = self.result.get('summary') or {}
+        return {
+            'version': self.version,
+            'valid': self.result.get('valid', {}),
+            'chip': self.result.get('chip'),
+            'opInfo': self.result.get('opInfo') or [],
+            'cores': cores,
+            'lmemGroups': len(self.result.get('lmem') or []),
+            'timestepGroups': len(self.result.get('timestep') or []),
+            'globalSummary': summary.get('globalSummary', {}),
+            'tileBuckets': TILE_BUCKETS,
+        }
+
+    def profile_window(self, core: int, q: Dict[str, str]) -> Dict[str, Any]:
+        idx = self._index(core)
+        start, end = _num(q, 'start'), _num(q, 'end')
+        limit = int(q.get('limit', DEFAULT_LIMIT))
+        positions = idx.query(
+            window=(start, end) if start is not None or end is not None else None,
+            engine=q.get('engine', 'all'),
+            op=_list(q, 'op'),
+            type=_list(q, 'type'),
+            bd_id=_int(q, 'bd_id'),
+            gdma_id=_int(q, 'gdma_id'),
+        )
+        return {
+            'core': core,
+            'total': len(positions),
+            'truncated': len(positions) > limit,
+            'positions': positions[:limit],
+            'entries': [idx.entries[i] for i in positions[:limit]],
+        }
+
+    def tile(self, core: int, level: int, tile: int) -> Dict[str, Any]:
+        if level < 0 or tile < 0:
+            raise HttpError(400, f'level / tile 不能为负: level={level} tile={tile}')
+        key = (core, level, tile)
+        with self._tiles_lock:
+            cached = self._tiles.get(key)
+            if cached is not None:
+                self._tiles.move_to_end(key)
+                return cached
+            version = self.version
+        idx = self._index(core)
+        total = max(1, self.total_cycle(core))
+        tile_width = -(-total // (1 << level))
+        bucket = max(1, -(-tile_width // TILE_BUCKETS))
+        lo = tile * tile_width
+        hi = lo + bucket * TILE_BUCKETS
+        counts = {eng: [0] * TILE_BUCKETS for eng in ENGINES}
+        busy = {eng: [0] * TILE_BUCKETS for eng in ENGINES}
+        full = {eng: [0] * (TILE_BUCKETS + 1) for eng in ENGINES}   # 整桶覆盖差分
+        for i in idx.overlap(lo, hi - 1):
+            e = idx.entries[i]
+            eng = e.get('engine')
+            if eng not in counts:
+                continue
+            a = max(idx.starts[i], lo) - lo
+            b = min(idx.ends[i], hi) - lo
+            fa = min(a // bucket, TILE_BUCKETS - 1)
+            fb = min(b // bucket, TILE_BUCKETS - 1)
+            counts[eng][fa] += 1
+            if fa == fb:
+                busy[eng][fa] += b - a
+                continue
+            busy[eng][fa] += (fa + 1) * bucket - a
+            busy[eng][fb] += b - fb * bucket
+            full[eng][fa + 1] += 1
+            full[eng][fb] -= 1
+        for eng in ENGINES:
+            run = 0
+            for k in range(TILE_BUCKETS):
+                run += full[eng][k]
+                busy[eng][k] += run * bucket
+        out = {
+            'core': core, 'level': level, 'tile': tile,
+            'start': lo, 'bucketWidth': bucket,
+            'counts': counts, 'busy': busy,
+        }
+        with self._tiles_lock:
+            if version == self.version:     # 计算期间数据已更新（watch）则不缓存旧结果
+                self._tiles[key] = out
+                if len(self._tiles) > TILE_CACHE_SIZE:
+                    self._tiles.popitem(last=False)
+        return out
+
+    def lmem_groups(self) -> List[Dict[str, Any]]:
+        stats = (self.result.get('summary') or {}).get('groups', [])
+        return [{
+            'group': g,
+            'settings': s['settings'],
+            'summary': s['summary'],
+            'steps': len(s['stepStatistics']),
+        } for g, s in enumerate(stats)]
+
+    def lmem_steps(self, g: int) -> List[Dict[str, Any]]:
+        return self._group_stats(g)['stepStatistics']
+
+    def lmem_step(self, g: int, step: int) -> Dict[str, Any]:
+        steps = self._group_stats(g)['stepStatistics']
+        if not 0 <= step < len(steps):
+            raise HttpError(404, f'step {step} 不存在')
+        allocs = self._group('lmem', g)['allocations']
+        return {
+            'statistics': steps[step],
+            'allocations': [a for a in allocs if self._is_active(a, step)],
+        }
+
+    def _group_stats(self, g: int) -> Dict[str, Any]:
+        groups = (self.result.get('summary') or {}).get('groups', [])
+        if not 0 <= g < len(groups):
+            raise HttpError(404, f'LMEM 分组 {g} 不存在')
+        return groups[g]
+
+    def _is_active(self, a: Dict[str, Any], step: int) -> bool:
+        """与 MemoryStatistics._is_active 一致（支持回绕的 timestep 区间）"""
+        if a.get('hold_in_lmem'):
+            return True
+        start, end = a['timestep_start'], a['timestep_end']
+        if start <= end:
+            return start <= step <= end
+        return (start <= step <= self.ts_counts) or (0 <= step <= end)
+
+    def timestep_groups(self) -> List[Dict[str, Any]]:
+        return [{'group': g, 'settings': grp['settings'], 'entries': len(grp['entries']),
+                 'deps': len((grp.get('deps') or {}).get('from') or []),
+                 'criticalPathCycle': (grp.get('criticalPath') or {}).get('cycle')}
+                for g, grp in enumerate(self.result.get('timestep') or [])]
+
+    def timestep_group(self, g: int) -> Dict[str, Any]:
+        return self._group('timestep', g)
+
+    def layers_lookup(self, core: int, q: Dict[str, str]) -> List[Dict[str, Any]]:
+        idx = self._index(core)
+        by_line, by_op = self.layers[core]
+        if 'file_line' in q:
+            positions = by_line.get(q['file_line'], [])
+        elif 'op' in q:
+            positions = by_op.get(q['op'], [])
+        else:
+            positions = sorted(p for ps in by_line.values() for p in ps)
+        return [idx.entries[i] for i in positions]
+
+
+def _num(q, key) -> Optional[float]:
+    v = q.get(key)
+    return float(v) if v not in (None, '') else None
+
+def _int(q, key) -> Optional[int]:
+    v = q.get(key)
+    return int(v) if v not in (None, '') else None
+
+def _list(q, key) -> List[str]:
+    v = q.get(key)
+    return [x for x in v.split(',') if x] if v else []
+
+
+# ----------------------------------------------------------
+# 2. 路由 + 极简 HTTP/1.1（仅 GET，支持 keep-alive 与 gzip）
+# ----------------------------------------------------------
+ROUTES = [
+    (re.compile(r'^/api/manifest$'), lambda st, m, q: st.manifest()),
+    (re.compile(r'^/api/profile/(\d+)$'), lambda st, m, q: st.profile_window(int(m[1]), q)),
+    (re.compile(r'^/api/tiles/(\d+)$'),
+     lambda st, m, q: st.tile(int(m[1]), int(q.get('level', 0)), int(q.get('tile', 0)))),
+    (re.compile(r'^/api/lmem$'), lambda st, m, q: st.lmem_groups()),
+    (re.compile(r'^/api/lmem/(\d+)/steps$'), lambda st, m, q: st.lmem_steps(int(m[1]))),
+    (re.compile(r'^/api/lmem/(\d+)/steps/(\d+)$'), lambda st, m, q: st.lmem_step(int(m[1]), int(m[2]))),
+    (re.compile(r'^/api/timestep$'), lambda st, m, q: st.timestep_groups()),
+    (re.compile(r'^/api/timestep/(\d+)$'), lambda st, m, q: st.timestep_group(int(m[1]))),
+    (re.compile(r'^/api/layers/(\d+)$'), lambda st, m, q: st.layers_lookup(int(m[1]), q)),
+]
+
+STATUS_TEXT = {200: 'OK', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found',
+               405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+def encode_response(store: RunStore, method: str, target: str,
+                    accept_gzip: bool) -> Tuple[int, bytes, str]:
+    """dispatch + JSON 编码 + gzip，返回 (status, body, 额外响应头)；整体在线程池中执行"""
+    try:
+        status, payload = dispatch(store, method, target)
+    except Exception as e:
+        status, payload = 500, {'error': f'{type(e).__name__}: {e}'}
+    body = b'' if payload is None else json.dumps(
+        payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    extra = ''
+    if len(body) >= GZIP_MIN_BYTES and accept_gzip:
+        body = gzip.compress(body, compresslevel=5)
+        extra = 'Content-Encoding: gzip\r\n'
+    return status, body, extra
+
+
+def dispatch(store: RunStore, method: str, target: str) -> Tuple[int, Any]:
+    if method == 'OPTIONS':
+        return 204, None
+    if method != 'GET':
+        return 405, {'error': f'不支持的方法 {method}'}
+    url = urlsplit(target)
+    q = {k: v[-1] for k, v in parse_qs(url.query).items()}
+    for pattern, handler in ROUTES:
+        m = pattern.match(url.path)
+        if m:
+            try:
+                return 200, handler(store, m, q)
+            except HttpError as e:
+                return e.status, {'error': str(e)}
+            except (ValueError, KeyError) as e:
+                return 400, {'error': f'参数错误: {e}'}
+    return 404, {'error': f'未知路径 {url.path}'}
+
+
+class QueryServer:
+    def __init__(self, store: RunStore, host: str = '127.0.0.1', port: int = 8765):
+        self.store = store
+        self.host = host
+        self.port = port
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    break
+                method, target, version = parts
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    k, _, v = line.decode('latin-1').partition(':')
+                    headers[k.strip().lower()] = v.strip()
+
+                # 大窗口的查询 / 编码 / 压缩可能耗时数秒，放到线程池，不阻塞其他连接
+                status, body, extra = await asyncio.get_running_loop().run_in_executor(
+                    None, encode_response, self.store, method.upper(), target,
+                    'gzip' in headers.get('accept-encoding', ''))
+                keep_alive = (version == 'HTTP/1.1'
+                              and headers.get('connection', '').lower() != 'close')
+                head = (
+                    f'HTTP/1.1 {status} {STATUS_TEXT.get(status, "")}\r\n'
+                    'Content-Type: application/json; charset=utf-8\r\n'
+                    f'Content-Length: {len(body)}\r\n'
+                    'Access-Control-Allow-Origin: *\r\n'
+                    'Access-Control-Allow-Methods: GET, OPTIONS\r\n'
+                    f'X-Letsvis-Version: {self.store.version}\r\n'
+                    f'{extra}'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'
+                )
+                writer.write(head.encode('latin-1') + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> asyncio.AbstractServer:
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        print(f'✅ 查询服务已启动 -> http://{self.host}:{self.port}/api/manifest')
+        return server
+
+    async def serve_forever(self):
+        server = await self.start()
+        async with server:
+            await server.serve_forever()
+
+
+# ----------------------------------------------------------
+# 3. 解析 / 缓存加载
+# ----------------------------------------------------------
+def load_or_parse(in_dir: Path, cache_dir: Path, refresh: bool = False) -> Dict[str, Any]:
+    """缓存 result.json 比所有输入都新时直接读取，否则重新解析并写缓存"""
+    from log_parser import parse_folder, write_result_json, read_input_text
+
+    cache = next((p for p in (cache_dir / 'result.json', cache_dir / 'result.json.gz')
+                  if p.exists()), None)
+    inputs = [p for p in in_dir.iterdir() if p.is_file()]
+    newest = max((p.stat().st_mtime for p in inputs), default=0)
+    if cache and not refresh and cache.stat().st_mtime >= newest:
+        print(f'[info] 读取缓存: {cache}')
+        return json.loads(read_input_text(cache))
+
+    result = parse_folder(in_dir, cache_dir=cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    write_result_json(result, cache_dir)
+    return result
+
+
+def serve_main(argv: List[str]):
+    ap = argparse.ArgumentParser(prog='log_parser.py serve')
+    ap.add_argument('folder', type=Path, help='包含所有日志/json 的文件夹')
+    ap.add_argument('--cache', type=Path, help='解析缓存目录（默认用户缓存目录下按输入路径区分，见 log_parser.default_cache_dir）')
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=8765)
+    ap.add_argument('--refresh', action='store_true', help='忽略缓存，强制重新解析')
+    ap.add_argument('--watch', action='store_true', help='跟随增长中的日志，增量刷新服务数据')
+    ap.add_argument('--interval', type=float, default=2.0, help='watch 轮询间隔（秒）')
+    args = ap.parse_args(argv)
+
+    if not args.folder.is_dir():
+        print(f'❌ 输入路径不是文件夹: {args.folder}')
+        exit(1)
+
+    async def run():
+        server = QueryServer(store, args.host, args.port)
+        if watcher is None:
+            return await server.serve_forever()
+        task = asyncio.create_task(watch_store(watcher, store, args.interval))
+        try:
+            await server.serve_forever()
+        finally:
+            task.cancel()
+
+    watcher = None
+    if args.watch:
+        from live_watch import RunWatcher, watch_store, snapshot_result
+        watcher = RunWatcher(args.folder)
+        watcher.poll()
+        store = RunStore(snapshot_result(watcher.materialize(copy=True)))
+    else:
+        from log_parser import default_cache_dir
+        cache_dir = args.cache or default_cache_dir(args.folder)
+        store = RunStore(load_or_parse(args.folder, cache_dir, args.refresh))
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print('[info] 查询服务已停止')
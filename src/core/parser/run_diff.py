@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+两次运行的解析结果对比
+usage:
+    python log_parser.py diff run_a/ run_b/ [-o diff_dir/] [--top 20] [--refresh]
+
+  - a / b 可以是原始日志文件夹（复用用户缓存目录下的解析缓存，见 log_parser.default_cache_dir）、
+    含 result.json 的输出文件夹，或 result.json(.gz/.zst) 文件
+  - layer    ：按 (file_line, op) 哈希连接，汇总所有 core 上该 layer 的 cost
+  - lmem     ：按 settingsKey（同 key 多次出现按出现序号区分）对齐分组，比较峰值/成功率
+  - timestep ：按 (分组, timestep, op) 对齐，比较 cycle 合计
+  全程只做哈希表构建与探测，整体 O(n)；top 回归用 heapq.nlargest
+"""
+import argparse
+import heapq
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from log_parser import read_input_text, open_output, check_compress_arg, default_cache_dir
+
+DEFAULT_TOP = 20
+RESULT_NAMES = ('result.json', 'result.json.gz', 'result.json.zst')
+LMEM_METRICS = ('maxMemoryUsage', 'peakAllocationCount', 'successRate',
+                'failedAllocations', 'totalMemoryFootprint')
+
+
+# ---------- 1. 读取 ----------
+def load_run(path: Path, refresh: bool = False) -> Dict[str, Any]:
+    """result.json 文件 / 含 result.json 的目录 / 原始日志目录（走缓存）"""
+    if path.is_file():
+        return json.loads(read_input_text(path))
+    for name in RESULT_NAMES:
+        if (path / name).exists():
+            print(f'[diff] 读取 {path / name}')
+            return json.loads(read_input_text(path / name))
+    from query_server import load_or_parse
+    return load_or_parse(path, default_cache_dir(path), refresh)
+
+
+# ---------- 2. 建索引（每个 run 一次遍历） ----------
+def _occurrence_keys(keys: List[str]) -> List[str]:
+    """同一 key 多次出现时追加 #序号，保证一一对齐"""
+    seen: Dict[str, int] = {}
+    out = []
+    for k in keys:
+        n = seen.get(k, 0)
+        seen[k] = n + 1
+        out.append(k if n == 0 else f'{k}#{n}')
+    return out
+
+
+def index_layers(result: Dict[str, Any]) -> Dict[Tuple[Any, str], Dict[str, Any]]:
+    """(file_line, op) -> {'cost', 'count', 'cores'}"""
+    layers: Dict[Tuple[Any, str], Dict[str, Any]] = {}
+    for core_id, prof in enumerate(result.get('profile') or []):
+        for e in prof.get('entries') or []:
+            if e.get('engine') != 'LAYER':
+                continue
+            key = (e.get('file_line'), e['op'])
+            rec = layers.get(key)
+            if rec is None:
+                rec = layers[key] = {'cost': 0, 'count': 0, 'cores': set()}
+            rec['cost'] += e['cost']
+            rec['count'] += 1
+            rec['cores'].add(core_id)
+    return layers
+
+
+def _lmem_key(settings: Dict[str, Any]) -> str:
+    # 与 MemoryStatistics._settings_key 一致
+    return json.dumps({'allow_bank_conflict': settings.get('allow_bank_conflict'),
+                       'shape_secs': settings.get('shape_secs')}, sort_keys=True)
+
+
+def index_lmem(result: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """settingsKey -> 分组 summary 指标"""
+    groups = (result.get('summary') or {}).get('groups') or []
+    keys = _occurrence_keys([_lmem_key(g.get('settings') or {}) for g in groups])
+    return {k: {m: (g.get('summary') or {}).get(m) for m in LMEM_METRICS}
+            for k, g in zip(keys, groups)}
+
+
+def index_timesteps(result: Dict[str, Any]) -> Dict[Tuple[str, Any, Any], int]:
+    """(分组 key, timestep, op) -> cycle 合计"""
+    groups = result.get('timestep') or []
+    keys = _occurrence_keys([json.dumps(g.get('settings') or {}, sort_keys=True) for g in groups])
+    out: Dict[Tuple[str, Any, Any], int] = {}
+    for gk, g in zip(keys, groups):
+        for e in g.get('entries') or []:
+            key = (gk, e.get('timestep'), e.get('op'))
+            out[key] = out.get(key, 0) + (e.get('cycle') or 0)
+    return out
+
+
+# ---------- 3. 对齐 ----------
+def _delta(a, b) -> Dict[str, Any]:
+    d = {'a': a, 'b': b}
+    if a is not None and b is not None:
+        d['delta'] = b - a
+        d['ratio'] = round((b - a) / a * 100, 2) if a else None
+    return d
+
+
+def diff_layers(la, lb) -> List[Dict[str, Any]]:
+    rows = []
+    for key in la.keys() | lb.keys():
+        ra, rb = la.get(key), lb.get(key)
+        row = {'file_line': key[0], 'op': key[1],
+               'status': 'common' if ra and rb else ('removed' if ra else 'added'),
+               **_delta(ra['cost'] if ra else None, rb['cost'] if rb else None),
+               'countA': ra['count'] if ra else 0,
+               'countB': rb['count'] if rb else 0,
+               'cores': sorted((ra['cores'] if ra else set()) | (rb['cores'] if rb else set()))}
+        rows.append(row)
+    rows.sort(key=lambda r: (str(r['file_line']), r['op']))
+    return rows
+
+
+def diff_lmem(ga, gb) -> List[Dict[str, Any]]:
+    rows = []
+    for key in list(ga) + [k for k in gb if k not in ga]:
+        ma, mb = ga.get(key), gb.get(key)
+        rows.append({'settingsKey': key,
+                     'status': 'common' if ma and mb else ('removed' if ma else 'added'),
+                     **{m: _delta(ma[m] if ma else None, mb[m] if mb else None) for m in LMEM_METRICS}})
+    return rows
+
+
+def diff_timesteps(ta, tb) -> List[Dict[str, Any]]:
+    rows = []
+    for key in list(ta) + [k for k in tb if k not in ta]:
+        rows.append({'group': key[0], 'timestep': key[1], 'op': key[2],
+                     **_delta(ta.get(key), tb.get(key))})
+    return rows
+
+
+def diff_results(a: Dict[str, Any], b: Dict[str, Any], top: int = DEFAULT_TOP) -> Dict[str, Any]:
+    layers = diff_layers(index_layers(a), index_layers(b))
+    lmem = diff_lmem(index_lmem(a), index_lmem(b))
+    timesteps = diff_timesteps(index_timesteps(a), index_timesteps(b))
+
+    cores = []
+    pa, pb = a.get('profile') or [], b.get('profile') or []
+    for i in range(max(len(pa), len(pb))):
+        sa = pa[i].get('settings', {}) if i < len(pa) else {}
+        sb = pb[i].get('settings', {}) if i < len(pb) else {}
+        cores.append({'core': i, 'totalCycle': _delta(sa.get('totalCycle'), sb.get('totalCycle'))})
+
+    worse = lambda rows: (r for r in rows if (r.get('delta') or 0) > 0)
+    better = lambda rows: (r for r in rows if (r.get('delta') or 0) < 0)
+    lmem_peak = [{**r, 'delta': r['maxMemoryUsage'].get('delta')} for r in lmem]
+    by_delta = lambda r: r['delta']
+    return {
+        'cores': cores,
+        'layers': layers,
+        'lmem': lmem,
+        'timesteps': timesteps,
+        'topRegressions': {
+            'layers': heapq.nlargest(top, worse(layers), key=by_delta),
+            'lmemPeak': heapq.nlargest(top, worse(lmem_peak), key=by_delta),
+            'timesteps': heapq.nlargest(top, worse(timesteps), key=by_delta),
+        },
+        'topImprovements': {
+            'layers': heapq.nsmallest(top, better(layers), key=by_delta),
+            'lmemPeak': heapq.nsmallest(top, better(lmem_peak), key=by_delta),
+            'timesteps': heapq.nsmallest(top, better(timesteps), key=by_delta),
+        },
+    }
+
+
+# ---------- 4. CLI ----------
+def print_report(diff: Dict[str, Any]):
+    for c in diff['cores']:
+        d = c['totalCycle']
+        if d.get('delta') is not None:
+            print(f"[diff] core {c['core']}: totalCycle {d['a']} -> {d['b']} ({d['delta']:+d})")
+    for title, key in (('回归', 'topRegressions'), ('改善', 'topImprovements')):
+        rows = diff[key]['layers']
+        if rows:
+            print(f'[diff] layer {title} top:')
+        for r in rows:
+            ratio = 'n/a' if r['ratio'] is None else f"{r['ratio']}%"
+            print(f"  {str(r['file_line']):>8} {r['op']:<24} {r['a']} -> {r['b']} "
+                  f"({r['delta']:+d}, {ratio})")
+    for r in diff['topRegressions']['lmemPeak']:
+        d = r['maxMemoryUsage']
+        print(f"[diff] lmem 峰值回归 {r['settingsKey']}: {d['a']} -> {d['b']} ({d['delta']:+d})")
+
+
+def diff_main(argv: List[str]):
+    ap = argparse.ArgumentParser(prog='log_parser.py diff')
+    ap.add_argument('a', type=Path, help='基准运行（日志文件夹 / 输出文件夹 / result.json）')
+    ap.add_argument('b', type=Path, help='对比运行')
+    ap.add_argument('-o', '--output', type=Path, help='输出文件夹（写入 diff.json）')
+    ap.add_argument('--top', type=int, default=DEFAULT_TOP, help='回归列表条数')
+    ap.add_argument('--refresh', action='store_true', help='忽略缓存，强制重新解析日志文件夹')
+    ap.add_argument('--compress', choices=('gz', 'zst'), help='压缩输出 diff.json')
+    args = ap.parse_args(argv)
+    check_compress_arg(ap, args.compress)
+
+    for p in (args.a, args.b):
+        if not p.exists():
+            print(f'❌ 路径不存在: {p}')
+            exit(1)
+
+    diff = diff_results(load_run(args.a, args.refresh), load_run(args.b, args.refresh), args.top)
+    print_report(diff)
+    if args.output:
+        args.output.mkdir(parents=True, exist_ok=True)
+        f, path = open_output(args.output / 'diff.json', args.compress)
+        with f:
+            f.write(json.dumps(diff, ensure_ascii=False, indent=2))
+        print(f'✅ diff 已生成 -> {path}')
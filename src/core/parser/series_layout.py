@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+profile 图表的预排版 series 数据（log_parser.py --series-layout）
+  每个 core、每条泳道输出一组等长数值列，前端直接包成 TypedArray 交给 ECharts dataset，
+  不再逐条 entry 走 ProfileLane.parseSegments / makeSegmentAbsolute / getColor：
+    laneIndex  ：泳道序号（与 profile-chart 的 laneOrder profile-bd / profile-gdma / profile-layer 一致）
+    x0 / x1    ：矩形起止 cycle（start, start + cost）
+    colorIndex ：泳道内 type 首次出现的顺序，前端对色盘长度取模（同 ProfileLane.getColor）
+    entryIndex ：对应 profile.entries 下标（tooltip / 标签按需回查原始条目）
+    height     ：泳道高度比例（同 ProfileLane.getHeightRatio）
+usage:
+    python log_parser.py input_dir/ -o output_dir/ --series-layout
+"""
+from typing import Any, Dict, List
+
+# engine -> 泳道名（lane-factory.js: profile-bd / profile-gdma / profile-layer）
+PROFILE_LANES = (('BD', 'ENGINE_BD'), ('GDMA', 'ENGINE_GDMA'), ('LAYER', 'ENGINE_LAYER'))
+COLUMNS = ('laneIndex', 'x0', 'x1', 'colorIndex', 'entryIndex', 'height')
+# 前端 TypedArray 类型
+DTYPES = {'laneIndex': 'Uint8', 'x0': 'Float64', 'x1': 'Float64',
+          'colorIndex': 'Uint16', 'entryIndex': 'Uint32', 'height': 'Float32'}
+BASE_HEIGHT = 0.4
+PEAK_BW = 64          # GB/s，与 ProfileLane.getHeightRatio 的固定峰值一致
+
+
+def height_ratio(e: Dict[str, Any]) -> float:
+    if e.get('isSL'):
+        return BASE_HEIGHT * 0.5
+    bw = e.get('bandwidth')
+    if bw is None:
+        return BASE_HEIGHT
+    return round(BASE_HEIGHT * min(bw / PEAK_BW, 1), 4)
+
+
+def layout_profile(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """单 core：按 engine 分泳道，各泳道内保持 entries 原顺序"""
+    lane_of = {eng: i for i, (eng, _) in enumerate(PROFILE_LANES)}
+    lanes = [{c: [] for c in COLUMNS} for _ in PROFILE_LANES]
+    types: List[Dict[str, int]] = [{} for _ in PROFILE_LANES]
+    for idx, e in enumerate(entries):
+        li = lane_of.get(e.get('engine'))
+        start, cost = e.get('start'), e.get('cost')
+        if li is None or start is None or cost is None:
+            continue
+        cols, colors = lanes[li], types[li]
+        color = colors.get(e.get('type'))
+        if color is None:
+            color = colors[e.get('type')] = len(colors)
+        cols['laneIndex'].append(li)
+        cols['x0'].append(start)
+        cols['x1'].append(start + cost)
+        cols['colorIndex'].append(color)
+        cols['entryIndex'].append(idx)
+        cols['height'].append(height_ratio(e))
+    return {
+        'entryCount': len(entries),
+        'lanes': [{
+            'lane': name,
+            'count': len(cols['x0']),
+            'totalCycles': sum(cols['x1']) - sum(cols['x0']),
+            'types': list(colors),
+            'columns': cols,
+        } for (_, name), cols, colors in zip(PROFILE_LANES, lanes, types)],
+    }
+
+
+def build_series_layout(profiles: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """result.seriesLayout：cores[i] 与 result.profile[i] 一一对应"""
+    return {
+        'columns': list(COLUMNS),
+        'dtypes': DTYPES,
+        'cores': [layout_profile(p.get('entries') or []) for p in profiles],
+    }
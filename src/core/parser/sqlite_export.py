@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解析结果导出为带索引的 SQLite 库（log_parser.py --export sqlite，仅依赖标准库 sqlite3）
+  表：
+    entries     ：BD / GDMA 指令（core, entry_id 对应 result.json profile[core].entries 下标）
+    layers      ：LAYER 条目（file_line、op_info_id -> op_info）
+    lmem_allocs ：LMEM 分配（group_idx 对应 result.json lmem 下标）
+    timesteps   ：timestep 条目（含 _cycStart / _cycEnd 排版结果）
+    ops / types / directions / op_info / cores / meta：归一化的名称表与汇总
+  视图 v_entries / v_layers 已连好名称表；ops.key 为忽略大小写与 _N 后缀的算子名（同 --ops）
+  每个 core 的 entries + layers 在一个事务内 executemany 批量写入，写完再统一建索引
+usage:
+    python log_parser.py input_dir/ -o output_dir/ --export sqlite
+    -- core 10~20 上 layer X 期间超过 1MB 的 GDMA L2S 传输
+    SELECT e.* FROM layers l JOIN v_entries e
+        ON e.core = l.core AND e.start >= l.start AND e.start < l.end
+     WHERE l.file_line = 123 AND e.core BETWEEN 10 AND 20
+       AND e.engine = 'GDMA' AND e.direction = 'L2S' AND e.size > 1 << 20;
+"""
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from gdma_bandwidth import DIRECTION_NAMES
+from log_parser import op_key
+
+DB_NAME = 'result.sqlite'
+SCHEMA = '''
+CREATE TABLE meta       (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE ops        (id INTEGER PRIMARY KEY, name TEXT NOT NULL, key TEXT NOT NULL);
+CREATE TABLE types      (id INTEGER PRIMARY KEY, name TEXT NOT NULL);
+CREATE TABLE directions (id INTEGER PRIMARY KEY, name TEXT NOT NULL);
+CREATE TABLE op_info    (id INTEGER PRIMARY KEY, op TEXT, local INTEGER, ins TEXT, outs TEXT);
+CREATE TABLE cores      (core INTEGER PRIMARY KEY, entries INTEGER, total_cycle INTEGER, settings TEXT);
+CREATE TABLE entries (
+    core INTEGER, entry_id INTEGER, engine TEXT, op_id INTEGER, type_id INTEGER,
+    start INTEGER, "end" INTEGER, cost INTEGER, bd_id INTEGER, gdma_id INTEGER,
+    direction INTEGER, size INTEGER, bandwidth REAL
+);
+CREATE TABLE layers (
+    core INTEGER, entry_id INTEGER, op_id INTEGER, type_id INTEGER,
+    start INTEGER, "end" INTEGER, cost INTEGER, file_line INTEGER, op_info_id INTEGER,
+    is_sl INTEGER, bd_count INTEGER, gdma_count INTEGER, bytes INTEGER
+);
+CREATE TABLE lmem_allocs (
+    group_idx INTEGER, alloc_idx INTEGER, tag TEXT, op_id INTEGER, type_id INTEGER,
+    addr INTEGER, size INTEGER, timestep_start INTEGER, timestep_end INTEGER,
+    lmem_type TEXT, hold_in_lmem INTEGER, status TEXT, bank_id INTEGER
+);
+CREATE TABLE timesteps (
+    group_idx INTEGER, entry_idx INTEGER, timestep INTEGER, timestep_type TEXT, op_id INTEGER,
+    tensor_name TEXT, concerning_op TEXT, concerning_op_name TEXT,
+    cycle INTEGER, cyc_start INTEGER, cyc_end INTEGER
+);
+CREATE VIEW v_entries AS
+    SELECT e.core, e.entry_id, e.engine, o.name AS op, o.key AS op_key, t.name AS type,
+           e.start, e."end", e.cost, e.bd_id, e.gdma_id, d.name AS direction, e.size, e.bandwidth
+      FROM entries e JOIN ops o ON o.id = e.op_id JOIN types t ON t.id = e.type_id
+      LEFT JOIN directions d ON d.id = e.direction;
+CREATE VIEW v_layers AS
+    SELECT l.core, l.entry_id, o.name AS op, t.name AS type, l.start, l."end", l.cost,
+           l.file_line, l.op_info_id, l.is_sl, l.bd_count, l.gdma_count, l.bytes
+      FROM layers l JOIN ops o ON o.id = l.op_id JOIN types t ON t.id = l.type_id;
+'''
+# 数据写完后再建（比边插边维护索引快得多）
+INDEXES = '''
+CREATE INDEX ix_entries_core_start ON entries (core, start);
+CREATE INDEX ix_entries_op         ON entries (op_id);
+CREATE INDEX ix_entries_bd         ON entries (core, bd_id);
+CREATE INDEX ix_entries_gdma       ON entries (core, gdma_id);
+CREATE INDEX ix_layers_core_start  ON layers (core, start);
+CREATE INDEX ix_layers_op          ON layers (op_id);
+CREATE INDEX ix_layers_file_line   ON layers (file_line);
+CREATE INDEX ix_lmem_group_ts      ON lmem_allocs (group_idx, timestep_start);
+CREATE INDEX ix_lmem_op            ON lmem_allocs (op_id);
+CREATE INDEX ix_ts_group_cyc       ON timesteps (group_idx, cyc_start);
+CREATE INDEX ix_ts_op              ON timesteps (op_id);
+CREATE INDEX ix_ops_key            ON ops (key);
+'''
+
+
+class NameTable:
+    """名称 -> 自增 id；新名称先记在 pending，随所在事务一起写入"""
+
+    def __init__(self, table: str, with_key: bool = False):
+        self.table, self.with_key = table, with_key
+        self.ids: Dict[str, int] = {}
+        self.pending: List[str] = []
+
+    def __call__(self, name: Any) -> Optional[int]:
+        if name is None:
+            return None
+        i = self.ids.get(name)
+        if i is None:
+            i = self.ids[name] = len(self.ids)
+            self.pending.append(name)
+        return i
+
+    def flush(self, conn: sqlite3.Connection):
+        if not self.pending:
+            return
+        base = len(self.ids) - len(self.pending)
+        if self.with_key:
+            conn.executemany(f'INSERT INTO {self.table} VALUES (?, ?, ?)',
+                             ((base + k, n, op_key(n)) for k, n in enumerate(self.pending)))
+        else:
+            conn.executemany(f'INSERT INTO {self.table} VALUES (?, ?)',
+                             ((base + k, n) for k, n in enumerate(self.pending)))
+        self.pending = []
+
+
+def _entry_rows(core: int, entries: List[Dict[str, Any]], ops: NameTable, types: NameTable):
+    for i, e in enumerate(entries):
+        if e.get('engine') == 'LAYER':
+            continue
+        g = e.get
+        yield (core, i, g('engine'), ops(g('op')), types(g('type')), g('start'), g('end'), g('cost'),
+               g('bd_id'), g('gdma_id'), g('direction'), g('size'), g('bandwidth'))
+
+
+def _layer_rows(core: int, entries: List[Dict[str, Any]], ops: NameTable, types: NameTable):
+    for i, e in enumerate(entries):
+        if e.get('engine') != 'LAYER':
+            continue
+        g = e.get
+        yield (core, i, ops(g('op')), types(g('type')), g('start'), g('end'), g('cost'),
+               g('file_line'), g('opInfo'), g('isSL'), g('bdCount'), g('gdmaCount'), g('bytes'))
+
+
+def _lmem_rows(groups: Iterable[Dict[str, Any]], ops: NameTable, types: NameTable):
+    for gi, group in enumerate(groups):
+        for ai, a in enumerate(group.get('allocations') or ()):
+            g = a.get
+            yield (gi, ai, g('tag'), ops(g('op_name')), types(g('op_type')), g('addr'), g('size'),
+                   g('timestep_start'), g('timestep_end'), g('lmem_type'), g('hold_in_lmem'),
+                   g('status'), g('bank_id'))
+
+
+def _timestep_rows(groups: Iterable[Dict[str, Any]], ops: NameTable):
+    for gi, group in enumerate(groups):
+        for ei, t in enumerate(group.get('entries') or ()):
+            g = t.get
+            yield (gi, ei, g('timestep'), g('timestep_type'), ops(g('op')), g('tensor_name'),
+                   g('concerning_op'), g('concerning_op_name'), g('cycle'), g('_cycStart'), g('_cycEnd'))
+
+
+def export_sqlite(result: Dict[str, Any], out_dir: Path, name: str = DB_NAME) -> Path:
+    """写入 out_dir/result.sqlite（先写临时文件，完成后替换）"""
+    path = out_dir / name
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp)
+    try:
+        # 一次性构建的库：关闭日志与同步，失败时直接丢弃临时文件
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.executescript(SCHEMA)
+        ops, types = NameTable('ops', with_key=True), NameTable('types')
+
+        with conn:
+            meta = {'chip': result.get('chip'), 'valid': result.get('valid'),
+                    'selection': result.get('selection')}
+            conn.executemany('INSERT INTO meta VALUES (?, ?)',
+                             ((k, json.dumps(v, ensure_ascii=False)) for k, v in meta.items()))
+            conn.executemany('INSERT INTO directions VALUES (?, ?)', enumerate(DIRECTION_NAMES))
+            conn.executemany('INSERT INTO op_info VALUES (?, ?, ?, ?, ?)', (
+                (i, m.get('op'), m.get('local'), json.dumps(m.get('ins')), json.dumps(m.get('outs')))
+                for i, m in enumerate(result.get('opInfo') or ())))
+
+        # 每个 core 一个事务
+        n_entries = 0
+        for core, prof in enumerate(result.get('profile') or ()):
+            entries = prof.get('entries') or []
+            if not entries:
+                continue
+            settings = prof.get('settings') or {}
+            with conn:
+                conn.executemany('INSERT INTO entries VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)',
+                                 _entry_rows(core, entries, ops, types))
+                conn.executemany('INSERT INTO layers VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)',
+                                 _layer_rows(core, entries, ops, types))
+                conn.execute('INSERT INTO cores VALUES (?, ?, ?, ?)',
+                             (core, len(entries), settings.get('totalCycle'),
+                              json.dumps(settings, ensure_ascii=False)))
+                ops.flush(conn)
+                types.flush(conn)
+            n_entries += len(entries)
+
+        with conn:
+            conn.executemany('INSERT INTO lmem_allocs VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)',
+                             _lmem_rows(result.get('lmem') or (), ops, types))
+            conn.executemany('INSERT INTO timesteps VALUES (?,?,?,?,?,?,?,?,?,?,?)',
+                             _timestep_rows(result.get('timestep') or (), ops))
+            ops.flush(conn)
+            types.flush(conn)
+
+        conn.executescript(INDEXES)
+        conn.execute('ANALYZE')
+        conn.commit()
+    except BaseException:
+        conn.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    conn.close()
+    tmp.replace(path)
+    print(f'[sqlite] 已导出 -> {path}（{n_entries} 条 profile 条目）')
+    return path
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分阶段耗时 / 内存埋点（log_parser.py --trace-stages）
+  with trace('LmemParser') as rec:
+      ...
+      rec['items'] = n
+  - 未 enable 时 trace 为空操作，解析代码无需判断开关
+  - 每个阶段记录 wall / cpu 时间、进程 maxrss 及本阶段内的增长、条目数，可选 tracemalloc 峰值
+    （嵌套阶段各自统计峰值，子阶段的峰值同时计入父阶段）
+  - 输出 JSON 报告，或 Chrome trace-event 格式（chrome://tracing / Perfetto 直接打开）
+"""
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:      # Windows
+    HAS_RESOURCE = False
+
+
+def maxrss_kb() -> Optional[int]:
+    """进程常驻内存高水位（KB）"""
+    if not HAS_RESOURCE:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss   # macOS 单位为字节
+
+
+class StageTracer:
+    def __init__(self, malloc: bool = False):
+        self.malloc = malloc
+        self.records: List[Dict[str, Any]] = []
+        self.stack: List[Dict[str, Any]] = []
+        self.t0 = time.perf_counter()
+        if malloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _peak(self) -> int:
+        return tracemalloc.get_traced_memory()[1]
+
+    @contextmanager
+    def stage(self, name: str, core: Optional[int] = None, **args):
+        rec = {'name': name, 'core': core, 'depth': len(self.stack), **args}
+        if self.malloc:
+            if self.stack:
+                parent = self.stack[-1]
+                parent['_peak'] = max(parent['_peak'], self._peak())
+            tracemalloc.reset_peak()
+            rec['_peak'] = 0
+        rss0 = maxrss_kb()
+        self.stack.append(rec)
+        w0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield rec
+        finally:
+            rec['start'] = round(w0 - self.t0, 6)
+            rec['wall'] = round(time.perf_counter() - w0, 6)
+            rec['cpu'] = round(time.process_time() - c0, 6)
+            rss1 = maxrss_kb()
+            rec['maxrssKB'] = rss1
+            rec['rssGrowKB'] = rss1 - rss0 if rss1 is not None else None
+            self.stack.pop()
+            if self.malloc:
+                peak = max(rec.pop('_peak'), self._peak())
+                rec['mallocPeakMB'] = round(peak / 2**20, 3)
+                if self.stack:
+                    self.stack[-1]['_peak'] = max(self.stack[-1]['_peak'], peak)
+                tracemalloc.reset_peak()
+            self.records.append(rec)
+
+    # ---- 输出 ----
+    def report(self) -> Dict[str, Any]:
+        """records 按开始时间排序；totals 按阶段名汇总（多 core 的同名阶段相加）"""
+        records = sorted(self.records, key=lambda r: r['start'])
+        totals: Dict[str, Dict[str, Any]] = {}
+        for r in records:
+            t = totals.setdefault(r['name'], {'count': 0, 'wall': 0.0, 'cpu': 0.0, 'items': 0})
+            t['count'] += 1
+            t['wall'] = round(t['wall'] + r['wall'], 6)
+            t['cpu'] = round(t['cpu'] + r['cpu'], 6)
+            t['items'] += r.get('items') or 0
+            if 'mallocPeakMB' in r:
+                t['mallocPeakMB'] = max(t.get('mallocPeakMB', 0), r['mallocPeakMB'])
+        return {'elapsed': round(time.perf_counter() - self.t0, 6), 'maxrssKB': maxrss_kb(),
+                'stages': records, 'totals': totals}
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Chrome trace-event：每个阶段一个 'X' 事件，core 阶段放在各自的 tid 上"""
+        events = [{'ph': 'M', 'name': 'thread_name', 'pid': 0, 'tid': 0, 'args': {'name': 'main'}}]
+        for core in sorted({r['core'] for r in self.records if r['core'] is not None}):
+            events.append({'ph': 'M', 'name': 'thread_name', 'pid': 0, 'tid': core + 1,
+                           'args': {'name': f'core {core}'}})
+        for r in self.records:
+            args = {k: v for k, v in r.items() if k not in ('name', 'start', 'wall', 'depth', 'core')}
+            events.append({'ph': 'X', 'name': r['name'], 'pid': 0,
+                           'tid': 0 if r['core'] is None else r['core'] + 1,
+                           'ts': round(r['start'] * 1e6, 1), 'dur': round(r['wall'] * 1e6, 1),
+                           'args': args})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, path: Path, chrome: Optional[Path] = None):
+        path.write_text(json.dumps(self.report(), ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f'[trace] 阶段报告 -> {path}')
+        if chrome:
+            chrome.write_text(json.dumps(self.chrome_trace()), encoding='utf-8')
+            print(f'[trace] Chrome trace -> {chrome}')
+
+
+class _NullRecord(dict):
+    def __setitem__(self, key, value):
+        pass
+
+
+@contextmanager
+def _null_stage(name, core=None, **args):
+    yield _NullRecord()
+
+
+_tracer: Optional[StageTracer] = None
+
+
+def enable(malloc: bool = False) -> StageTracer:
+    global _tracer
+    _tracer = StageTracer(malloc)
+    return _tracer
+
+
+def disable():
+    global _tracer
+    if _tracer and _tracer.malloc:
+        tracemalloc.stop()
+    _tracer = None
+
+
+def trace(name: str, core: Optional[int] = None, **args):
+    """当前 tracer 的阶段上下文；未启用时为空操作"""
+    return _tracer.stage(name, core, **args) if _tracer else _null_stage(name)
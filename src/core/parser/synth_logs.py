@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成测试日志（基准测试 / 回归数据）
+  - LayerGroup.log      ：lmem_spec 芯片行 + 按 shape_secs 分组的 lmem_assign / timestep_cycle 段
+  - compiler_profile_<n>：BD / GDMA 双列指令 + API_END / TCYC / GDMA SUMMARY / DDR BW USAGE / flops 尾部
+  - model.bmodel.json   ：与 profile 指令 id 区间一一对应的算子
+按 cores / instructions / allocations / timesteps / groups 参数化，同一 seed 输出完全一致
+usage:
+    python synth_logs.py out_dir/ [--cores 2] [--instructions 20000] [--allocations 500]
+                                  [--timesteps 32] [--groups 4] [--seed 0] [--compress gz|zst]
+"""
+import argparse
+import json
+import random
+from itertools import zip_longest
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from log_parser import open_output, check_compress_arg, COMPRESS_SUFFIX
+
+LMEM_BYTES = 256 * 1024
+LMEM_BANKS = 16
+LMEM_BANK_BYTES = LMEM_BYTES // LMEM_BANKS
+TIU_MHZ = 1000
+
+# 算子 -> BD 指令类型；Load / Store 只有 GDMA 指令
+OP_KINDS = {
+    'Conv2D': ('CONV', 'AR'),
+    'MatMul': ('MM2', 'AR'),
+    'Add': ('AR',),
+    'Relu': ('AR',),
+    'Pool2D': ('PorD',),
+    'Softmax': ('SFU', 'AR'),
+    'LayerNorm': ('AR', 'SFU'),
+    'Load': (),
+    'Store': (),
+}
+GDMA_TYPES = ('GDMA_TENSOR', 'GDMA_MATRIX', 'GDMA_GENERAL')
+LMEM_TYPES = ('LMEM_ACTIVATION', 'LMEM_WEIGHT', 'LMEM_OPERATION')
+DTYPES = ('f32', 'f16', 'bf16', 'si8')
+COL_WIDTH = 72   # 左列（BD）宽度，与右列（GDMA）之间至少 2 个空格
+
+
+# ---------- 1. LayerGroup 主日志 ----------
+def _shape_secs(g: int) -> str:
+    return f'1,{1 << (g % 4)},1,{1 + g // 4},1'
+
+
+def gen_layergroup_log(path: Path, allocations: int, timesteps: int, groups: int,
+                       rng: random.Random, compress: Optional[str] = None) -> Path:
+    """allocations / timesteps 为每组的数量"""
+    f, out = open_output(path, compress)
+    with f:
+        f.write('; action = lmem_assign; step = lmem_spec; '
+                f'lmem_bytes = {LMEM_BYTES}; lmem_banks = {LMEM_BANKS}; lmem_bank_bytes = {LMEM_BANK_BYTES};\n')
+        for g in range(groups):
+            secs = _shape_secs(g)
+            f.write(f'; action = layer_group; step = search; group_idx = {g}; shape_secs = {secs};\n')
+            for a in range(allocations):
+                size = rng.randint(1, 64) * 256
+                addr = rng.randrange(0, LMEM_BYTES - size, 64)
+                st = rng.randrange(timesteps)
+                en = min(timesteps - 1, st + rng.randint(0, 6))
+                ok = rng.random() > 0.05
+                f.write(f'; action = lmem_assign; tag = iteration_result; op_name = op{g}_{a}; '
+                        f'op_type = {rng.choice(list(OP_KINDS))}; addr = {hex(addr)}; size = {size}; '
+                        f'timestep_start = {st}; timestep_end = {en}; lmem_type = {rng.choice(LMEM_TYPES)}; '
+                        f'hold_in_lmem = {int(rng.random() < 0.1)}; status = {"success" if ok else "failed"}; '
+                        f'shape_secs = {secs}; allow_bank_conflict = {g % 2};\n')
+        f.write('; action = timestep_cycle; debug_range = given;\n')
+        for g in range(groups):
+            secs = _shape_secs(g)
+            for ts in range(timesteps):
+                # gdma 为下一 timestep 的 layer 预取（最后一步为本步），concerning_op_name 指向其 tensor_name
+                consumer = f't{g}_{min(ts + 1, timesteps - 1)}'
+                for kind, op, other, name in (('gdma', 'load', 'conv', consumer),
+                                              ('layer', 'conv', 'load', f'load{g}_{ts}')):
+                    f.write(f'; action = timestep_cycle; step = timestep_cycle; tag = result; timestep = {ts}; '
+                            f'timestep_type = {kind}; op = {op}; tensor_name = t{g}_{ts}; concerning_op = {other}; '
+                            f'concerning_op_name = {name}; cycle = {rng.randint(50, 5000)}; '
+                            f'shape_secs = {secs};\n')
+    return out
+
+
+# ---------- 2. compiler_profile_<n> + bmodel 算子 ----------
+def _tensor(rng: random.Random) -> Dict[str, Any]:
+    shape = [1, rng.choice((3, 16, 32, 64, 128)), rng.choice((7, 14, 28, 56)), rng.choice((7, 14, 28, 56))]
+    dtype = rng.choice(DTYPES)
+    return {'shape': shape, 'memory_type': f"tensor<{'x'.join(map(str, shape))}x{dtype}>"}
+
+
+def gen_profile(path: Path, core_id: int, instructions: int, rng: random.Random,
+                compress: Optional[str] = None) -> tuple:
+    """
+    写单 core 的 profile，返回 (输出路径, 该 core 的 bmodel 算子列表)
+    GDMA 预取与上一算子的 BD 计算重叠；算子的 BD 在其首条 GDMA 完成后开始
+    """
+    bd_lines, gdma_lines, ops = [], [], []
+    bd_id = gdma_id = 0
+    bd_t = gdma_t = 0
+    dr_bytes = [0, 0, 0, 0]
+    k = 0
+    while bd_id + gdma_id < instructions:
+        name = rng.choice(list(OP_KINDS))
+        bd_types = OP_KINDS[name]
+        n_bd = rng.randint(4, 24) if bd_types else 0
+        n_gdma = rng.randint(1, 8) if bd_types else rng.randint(2, 12)
+        before = [bd_id, gdma_id]
+
+        first_load_end = None
+        for _ in range(n_gdma):
+            gdma_id += 1
+            size = rng.randint(1, 128) * 256
+            dr = 1 if name == 'Store' else rng.choices((0, 1, 2, 3), (6, 1, 1, 2))[0]
+            dur = max(1, size // rng.randint(64, 256))
+            s, e = gdma_t, gdma_t + dur
+            gdma_t = e + rng.randint(0, 8)
+            first_load_end = first_load_end or e
+            dr_bytes[dr] += size
+            gdma_lines.append(f'{name}_{k}|{rng.choice(GDMA_TYPES)}|s:{s}|b:{bd_id}|g:{gdma_id}|'
+                              f'e:{e}|t:{dur}|dr:{dr}|sz:{size}|bw:{size / dur:.2f}')
+        bd_t = max(bd_t, first_load_end or 0)
+        for _ in range(n_bd):
+            bd_id += 1
+            dur = rng.randint(5, 300)
+            s, e = bd_t, bd_t + dur
+            bd_t = e + rng.randint(0, 4)
+            bd_lines.append(f'{name}_{k}|{rng.choice(bd_types)}|s:{s}|b:{bd_id}|g:{gdma_id}|e:{e}|t:{dur}')
+
+        ops.append({
+            'opcode': f'tpu.{name}', 'file-line': 1000 + k, 'core_id': core_id,
+            'tiu_dma_id(before)': before, 'tiu_dma_id(after)': [bd_id, gdma_id],
+            'operands': [_tensor(rng) for _ in range(rng.randint(1, 2))],
+            'results': [_tensor(rng)], 'is_local': rng.random() < 0.6,
+        })
+        k += 1
+
+    total = max(bd_t, gdma_t)
+    ddr = sum(dr_bytes[:3])
+    f, out = open_output(path, compress)
+    with f:
+        f.write(f"{'ENGINE_BD':<{COL_WIDTH}}  ENGINE_GDMA\n{'-' * (COL_WIDTH + 40)}\n")
+        for left, right in zip_longest(bd_lines, gdma_lines, fillvalue=''):
+            f.write(f'{left:<{COL_WIDTH}}  {right}'.rstrip() + '\n')
+        f.write(f'API_END total_cycle:{total}|b:{bd_id}|g:{gdma_id}\n')
+        f.write(f'TCYC : {total}\n')
+        f.write('GDMA SUMMARY : total:{}|dr[0] S2L:{} |dr[1] L2S:{} |dr[2] S2S:{} |dr[3] L2L:{}\n'
+                .format(sum(dr_bytes), *dr_bytes))
+        f.write(f'DDR BW USAGE : {min(100.0, ddr / max(total, 1) / 34.132 * 100):.2f}%\n')
+        f.write(f'flops: {bd_id * 2.0e5:.3e}, runtime: {total / TIU_MHZ / 1000:.3f}ms, '
+                f'ComputationAbility: {rng.uniform(1, 32):.2f}T\n')
+    return out, ops
+
+
+# ---------- 3. 整个输入文件夹 ----------
+def generate(out_dir: Path, cores: int = 2, instructions: int = 20000, allocations: int = 500,
+             timesteps: int = 32, groups: int = 4, seed: int = 0,
+             compress: Optional[str] = None) -> Dict[str, Any]:
+    """生成 log_parser.py / convert.py 可直接读取的输入文件夹，返回文件清单"""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    log = gen_layergroup_log(out_dir / 'LayerGroup.log', allocations, timesteps, groups, rng, compress)
+    profiles, all_ops = [], []
+    for c in range(cores):
+        p, ops = gen_profile(out_dir / f'compiler_profile_{c}', c, instructions, rng, compress)
+        profiles.append(p)
+        all_ops.extend(ops)
+    bmodel = out_dir / 'model.bmodel.json'
+    bmodel.write_text(json.dumps(all_ops), encoding='utf-8')
+    return {'log': log, 'profiles': profiles, 'bmodel': bmodel, 'ops': len(all_ops)}
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description='生成合成 LayerGroup / profile / bmodel 日志')
+    ap.add_argument('output', type=Path, help='输出文件夹')
+    ap.add_argument('--cores', type=int, default=2)
+    ap.add_argument('--instructions', type=int, default=20000, help='每个 core 的 BD + GDMA 指令数')
+    ap.add_argument('--allocations', type=int, default=500, help='每个 shape_secs 分组的 lmem 分配数')
+    ap.add_argument('--timesteps', type=int, default=32, help='每个分组的 timestep 数')
+    ap.add_argument('--groups', type=int, default=4, help='shape_secs 分组数')
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--compress', choices=sorted(COMPRESS_SUFFIX), help='压缩日志与 profile')
+    args = ap.parse_args(argv)
+    check_compress_arg(ap, args.compress)
+    files = generate(args.output, args.cores, args.instructions, args.allocations,
+                     args.timesteps, args.groups, args.seed, args.compress)
+    print(f"✅ 已生成 {args.output}: {len(files['profiles'])} 个 profile, {files['ops']} 个算子")
+
+
+if __name__ == '__main__':
+    main()
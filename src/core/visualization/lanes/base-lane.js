@@ -1,7 +1,10 @@
 import * as echarts from 'echarts';
 
 const MIN_VISUAL_WIDTH = 2;          // px
+const MIN_LABEL_WIDTH = 24;          // px，窄于此的矩形不画标签
 const HIT_Z = 35;                    // 透明层 z 值
+// 预排版 dataset 维度，顺序与 series_layout.COLUMNS 一致（renderItem 按下标取值）
+export const LAYOUT_DIMS = ['laneIndex', 'x0', 'x1', 'colorIndex', 'entryIndex', 'height'];
 
 /**
  * BaseLane 泳道抽象基类
@@ -135,6 +138,14 @@ export default class BaseLane {
    */
   getLabel(segment) {return '';}   // 默认空，子类决定
 
+  /**
+   * 可覆写函数，预排版模式下直接由原始 entry 生成标签文字（不创建段对象）
+   * @param {Object} entry     原始 entry
+   * @param {number} duration  矩形持续 cycle 数（x1 - x0）
+   * @returns {string} 标签文字
+   */
+  layoutLabel(entry, duration) {return '';}
+
 
   /**
    * 可覆写函数，控制矩形占据泳道高度比例，默认40%
@@ -144,6 +155,14 @@ export default class BaseLane {
   getHeightRatio(segment) { return 0.4; }
 
 
+  /**
+   * 可覆写函数，预排版模式下按 colorIndex 取色
+   * @param {number} colorIndex 
+   * @returns {string} 颜色字符串
+   */
+  layoutColor(colorIndex) { return '#7b9ce1'; }
+
+
   /* ========= 公共模板：吐出 ECharts custom-series ========= */
   /**
    * 将多个 entry 转为 ECharts series option
@@ -158,6 +177,7 @@ export default class BaseLane {
     for (let i = 0; i < segs.length; i++) segments.push(segs[i])
   })
   this._segments = segments; 
+  this._layout = null;
   /* ---------- 空保护 ---------- */
   if (!segments.length) {
     return { type: 'custom', coordinateSystem: 'cartesian2d', name: this.laneName, data: [] };
@@ -188,6 +208,46 @@ export default class BaseLane {
   };
 }
 
+  /* ========= 预排版：parser 输出的数值列直接作为 dataset ========= */
+  /**
+   * 由 result.seriesLayout 中本泳道的数值列生成 series（不逐条创建段对象）
+   * @param {Object} laneLayout  {count, columns: {laneIndex, x0, x1, colorIndex, entryIndex, height}}
+   * @param {Array<Object>} entries  原始 entries（tooltip / 标签按需回查）
+   * @param {number} datasetIndex  columns 所在的 dataset 下标
+   * @returns {Object} ECharts series option
+   */
+  toLayoutSeriesOption(laneLayout, entries, datasetIndex) {
+    this._layout = laneLayout.columns;
+    this._entries = entries;
+    this._segments = [];             // 懒生成缓存，下标同 dataIndex
+    return {
+      type: 'custom',
+      coordinateSystem: 'cartesian2d',
+      name: this.laneName,
+      datasetIndex,
+      dimensions: LAYOUT_DIMS,
+      encode: { x: ['x0', 'x1'], y: 'laneIndex' },
+      large: true,
+      largeThreshold: 2000,
+      animation: false,
+      progressive: 0,
+      hoverLayerThreshold: 1,
+      silent: true,
+      renderItem: this.#renderItem.bind(this),
+    };
+  }
+
+  /**
+   * 第 i 个矩形对应的段对象；预排版模式下首次访问时才由原始 entry 生成（仅供 tooltip 回查）
+   * @param {number} i  dataIndex
+   * @returns {Object|undefined}
+   */
+  segmentAt(i) {
+    if (!this._layout || this._segments[i]) return this._segments[i];
+    const entry = this._entries[this._layout.entryIndex[i]];
+    return (this._segments[i] = entry && this.parseSegments(entry)[0]);
+  }
+
   /* ========= 私有：矩形绘制 ========= */
   /**
    * 公用 Echarts custom-series 绘制函数，绘制泳道矩形
@@ -229,7 +289,7 @@ export default class BaseLane {
     // 在裁剪后的矩形上加圆角 
     rectShape.r = 3;          // 圆角 3 px
 
-    const color = api.style().fill;             
+    const color = this._layout ? this.layoutColor(api.value(3)) : api.style().fill;
     const gradient = new echarts.graphic.LinearGradient(0, 0, 0, 1, [
       { offset: 0, color: color.replace(/[\d.]+\)$/,'0.9)') },  // 顶 更亮
       { offset: 1, color: color.replace(/[\d.]+\)$/,'0.5)') }   // 底 更暗
@@ -243,9 +303,13 @@ export default class BaseLane {
     const centerY = rectShape.y;
 
 
-    const idx       = api.value(4);          // 当前数据在数组里的下标
-    const segment   = this._segments[idx];    // 回查原始对象
-    const label     = this.getLabel(segment); // 调子类钩子
+    // 窄矩形放不下文字，直接跳过；预排版模式按 entryIndex 取原始 entry，不逐条生成段对象
+    let label = '';
+    if (rectShape.width >= MIN_LABEL_WIDTH) {
+      label = this._layout
+        ? this.layoutLabel(this._entries[api.value(4)], api.value(2) - api.value(1))
+        : this.getLabel(this._segments[params.dataIndex]);   // 调子类钩子
+    }
     const textShape = {
       type: 'text',
       style: {
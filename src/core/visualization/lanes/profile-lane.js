@@ -3,6 +3,30 @@ import BaseLane from './base-lane.js';
 const CYCLE_TO_MS = 1e-6; 
 const CYCLE_TO_US = 1e-3;
 
+/* 柔和色盘（可自由增删）；parser 预排版的 colorIndex 对其长度取模 */
+const PALETTE = [
+  'rgba(120, 180, 200, 0.75)', // 薄荷蓝
+  'rgba(140, 200, 160, 0.75)', // 薄荷绿
+  'rgba(160, 160, 210, 0.75)', // 淡紫
+  'rgba(200, 180, 160, 0.75)', // 淡棕灰
+  'rgba(190, 140, 150, 0.75)', // 淡玫瑰
+  'rgba(130, 190, 220, 0.75)', // 清水蓝
+  'rgba(150, 210, 180, 0.75)', // 嫩芽绿
+  'rgba(170, 150, 200, 0.75)', // 薰衣紫
+  'rgba(180, 170, 140, 0.75)', // 米灰
+  'rgba(170, 170, 170, 0.75)', // 灰色
+  'rgba(255, 180, 120, 0.75)', // 杏橙
+  'rgba(180, 220, 240, 0.75)', // 天空蓝
+  'rgba(220, 180, 200, 0.75)', // 淡粉
+  'rgba(180, 210, 150, 0.75)', // 春芽
+  'rgba(150, 180, 220, 0.75)', // 淡钴蓝
+  'rgba(240, 200, 160, 0.75)', // 浅驼
+  'rgba(160, 200, 220, 0.75)', // 淡湖蓝
+  'rgba(200, 160, 180, 0.75)', // 淡玫
+  'rgba(220, 220, 180, 0.75)', // 浅米黄
+  'rgba(180, 180, 220, 0.75)'  // 淡蓝紫
+];
+
 /**
  * Profile 涉及泳道子类
  * @extends BaseLane
@@ -54,52 +78,37 @@ parseSegments(entry) {
    * 颜色池：20 个柔和半透明色，用完循环
    */
   getColor = (() => {
-    /* 1. 柔和色盘（可自由增删） */
-    const palette = [
-      'rgba(120, 180, 200, 0.75)', // 薄荷蓝
-      'rgba(140, 200, 160, 0.75)', // 薄荷绿
-      'rgba(160, 160, 210, 0.75)', // 淡紫
-      'rgba(200, 180, 160, 0.75)', // 淡棕灰
-      'rgba(190, 140, 150, 0.75)', // 淡玫瑰
-      'rgba(130, 190, 220, 0.75)', // 清水蓝
-      'rgba(150, 210, 180, 0.75)', // 嫩芽绿
-      'rgba(170, 150, 200, 0.75)', // 薰衣紫
-      'rgba(180, 170, 140, 0.75)', // 米灰
-      'rgba(170, 170, 170, 0.75)', // 灰色
-      'rgba(255, 180, 120, 0.75)', // 杏橙
-      'rgba(180, 220, 240, 0.75)', // 天空蓝
-      'rgba(220, 180, 200, 0.75)', // 淡粉
-      'rgba(180, 210, 150, 0.75)', // 春芽
-      'rgba(150, 180, 220, 0.75)', // 淡钴蓝
-      'rgba(240, 200, 160, 0.75)', // 浅驼
-      'rgba(160, 200, 220, 0.75)', // 淡湖蓝
-      'rgba(200, 160, 180, 0.75)', // 淡玫
-      'rgba(220, 220, 180, 0.75)', // 浅米黄
-      'rgba(180, 180, 220, 0.75)'  // 淡蓝紫
-    ];
-
-    /* 2. 运行期缓存：type -> colorIndex */
+    /* 1. 运行期缓存：type -> colorIndex */
     const typeMap = new Map();
     let nextIdx = 0;
 
-    /* 3. 返回真正的 getColor 函数 */
+    /* 2. 返回真正的 getColor 函数 */
     return function (segment) {
       if (!segment || !segment.type) return 'rgba(123, 156, 225, 0.7)'; // 默认兜底
 
       const { type } = segment;
       if (typeMap.has(type)) {
         // 已绑定过，直接复用
-        return palette[typeMap.get(type)];
+        return PALETTE[typeMap.get(type)];
       }
 
       // 新类型：按顺序取色，循环使用
-      const colorIndex = nextIdx % palette.length;
+      const colorIndex = nextIdx % PALETTE.length;
       typeMap.set(type, colorIndex);
       nextIdx += 1;
-      return palette[colorIndex];
+      return PALETTE[colorIndex];
     };
   })();
 
+  /**
+   * 预排版模式下的颜色：colorIndex 为泳道内 type 首次出现顺序（与 getColor 的分配顺序一致）
+   * @param {number} colorIndex
+   * @returns {string}
+   */
+  layoutColor(colorIndex) {
+    return PALETTE[colorIndex % PALETTE.length];
+  }
+
   /**
    * 控制矩形上需显示的标签文字
    * @param {Object} segment 
@@ -107,19 +116,31 @@ parseSegments(entry) {
    */
   getLabel(segment) {
     // return segment.op + ',  ' + (segment.duration * CYCLE_TO_US).toFixed(3) + 'us';
+    return this.layoutLabel(segment, segment.duration);
+  }
 
+  /**
+   * 预排版模式下的标签文字：直接读原始 entry 字段
+   * @param {Object} entry     原始 entry（或段对象，字段同 entry）
+   * @param {number} duration  持续 cycle 数
+   * @returns {string} 标签文字
+   */
+  layoutLabel(entry, duration) {
+    if (!entry) return '';
+    const ms = (duration * CYCLE_TO_MS).toFixed(5) + 'ms';
     if(this.engine == 'BD'){
-      return 'bd_id=' + segment.bd_id + '\n' + (segment.duration * CYCLE_TO_MS).toFixed(5) + 'ms';
+      return 'bd_id=' + entry.bd_id + '\n' + ms;
     }
     else if(this.engine == 'GDMA'){
-      return 'gdma_id=' + segment.gdma_id + '\n' + (segment.duration * CYCLE_TO_MS).toFixed(5) + 'ms';
+      return 'gdma_id=' + entry.gdma_id + '\n' + ms;
     }
     else{
-      return segment.type + '\n' + (segment.duration * CYCLE_TO_MS).toFixed(5) + 'ms';
+      return entry.type + '\n' + ms;
     }
   }
 
 
+
   /**
    * 可覆写函数，控制矩形占据泳道高度比例，默认40%
    * @param {Object} segment 
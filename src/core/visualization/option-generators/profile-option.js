@@ -1,9 +1,35 @@
 import * as echarts from 'echarts';
 import { createLane } from '../lanes/lane-factory';
+import { LAYOUT_DIMS } from '../lanes/base-lane';
 
 /* ---------- 单位转换 ---------- */
 const CYCLE_TO_MS = 1e-6; // 1 cycle = 1 μs = 0.001 ms
 const CYCLE_TO_US = 1e-3;
+// 与 series_layout.DTYPES 一致
+const LAYOUT_DTYPES = { laneIndex: 'Uint8', x0: 'Float64', x1: 'Float64', colorIndex: 'Uint16', entryIndex: 'Uint32', height: 'Float32' };
+
+/* ---------- 算子信息（opInfo 下标 -> HTML，首次悬停时格式化并缓存） ---------- */
+const opInfoCache = new WeakMap()
+
+/**
+ * 与 log_parser.format_op_info 一致
+ * @param {Array<Object>|null} table result.opInfo 算子元数据表 {op, local, ins: [[shape, dtype]], outs}
+ * @param {number} idx 条目的 opInfo 下标
+ * @returns {string|null}
+ */
+export function formatOpInfo(table, idx) {
+  const meta = table?.[idx]
+  if (!meta) return null
+  let cache = opInfoCache.get(table)
+  if (!cache) opInfoCache.set(table, (cache = new Map()))
+  if (!cache.has(idx)) {
+    const fmt = ([shape, dtype]) => `tensor_id=NaN [${shape}] ${dtype}`
+    const ins = meta.ins.length ? '<br>==ins==<br>' + meta.ins.map(fmt).join('<br>') : ''
+    const outs = meta.outs.length ? '<br>==outs==<br>' + meta.outs.map(fmt).join('<br>') : ''
+    cache.set(idx, `<br>${meta.local ? 'local_layer' : 'global_layer'}${ins}${outs}<br>`)
+  }
+  return cache.get(idx)
+}
 
 /* ---------- 主函数 ---------- */
 /**
@@ -13,13 +39,17 @@ const CYCLE_TO_US = 1e-3;
  * @param {Array<string>} params.laneOrder 泳道顺序
  * @param {Set<string>|null} [params.visibleKeys=null] 可见的条目 key 集合（用于过滤）// 当前未使用
  * @param {echarts.ECharts|null} [params.chartInst=null] 图表实例（用于获取 zoom 范围）// 当前未使用
+ * @param {Array<Object>|null} [params.opInfo=null] 算子元数据表（layer 条目的 opInfo 为其下标）
+ * @param {Object|null} [params.layout=null] 当前 core 的预排版数值列（result.seriesLayout.cores[i]）
  * @returns {Object} 可视化选项对象
  */
 export function genProfileOption({
   profileData,
   laneOrder,
   visibleKeys = null,
-  chartInst
+  chartInst,
+  opInfo = null,
+  layout = null
 }) {
   if (!profileData?.length) {
     return { title: { text: 'No Profile Data', left: 'center' } }
@@ -70,17 +100,27 @@ export function genProfileOption({
   
 
   /* 3. 生成 series + 动态 legend */
+  // 全部可见且 parser 已预排版时，数值列直接作为 dataset，不逐条解析 entry
+  const layoutLanes = drawingRows.length === rawEntries.length ? matchLayout(layout, lanes, rawEntries) : null
+  const datasets = []
   let seriesArr = []
   // const legendData = []
-  lanes.forEach(lane => {
-    const seriesOpt = lane.toSeriesOption(drawingRows)
+  lanes.forEach((lane, i) => {
+    let seriesOpt
+    if (layoutLanes) {
+      datasets.push({ dimensions: LAYOUT_DIMS, source: toTypedColumns(layoutLanes[i].columns) })
+      seriesOpt = lane.toLayoutSeriesOption(layoutLanes[i], rawEntries, datasets.length - 1)
+      seriesOpt.laneCount = layoutLanes[i].count
+    } else {
+      seriesOpt = lane.toSeriesOption(drawingRows)
+      seriesOpt.laneCount = seriesOpt.data.length
+    }
     seriesOpt.id = `profile-custom-click-${lane.laneName}`;  // 与监听同名
     seriesOpt.silent = false;                 // 关键：允许事件
     seriesArr.push(seriesOpt)
   })
-  seriesArr = seriesArr.filter(
-  s => !(s.type === 'custom' && (!s.data || s.data.length === 0))
-  )
+  seriesArr = seriesArr.filter(s => !(s.type === 'custom' && !s.laneCount))
+  const laneById = new Map(lanes.map(l => [`profile-custom-click-${l.laneName}`, l]))
 
 
 
@@ -109,6 +149,7 @@ export function genProfileOption({
       stats[laneName].totalCycles = s.data.reduce((sum, d) => sum + (d.raw?.duration || 0), 0)
     }
   })
+  layoutLanes?.forEach(l => { stats[l.lane] = { count: l.count, totalCycles: l.totalCycles } })
 
   /* 8. 构造 option */
   const gridHeight = yCategories.length * 80 + 60;
@@ -147,8 +188,9 @@ export function genProfileOption({
         },
         appendToBody: true,
         formatter(p) {
-        const s = p.data?.raw;
+        const s = p.data?.raw ?? laneById.get(p.seriesId)?.segmentAt(p.dataIndex);
         if (!s) return '';
+        const info = s.info ?? (s.opInfo != null ? formatOpInfo(opInfo, s.opInfo) : null);
         const startMs = (s.cycStart * CYCLE_TO_MS);//.toFixed(3);
         const endMs = (s.cycEnd * CYCLE_TO_MS);//.toFixed(3);
         const durMs = (s.duration * CYCLE_TO_MS).toFixed(6);
@@ -167,7 +209,7 @@ export function genProfileOption({
             ${s.size != null ? `size: ${s.size}<br/>` : ''}
             ${s.bandwidth != null ? `bandwidth: ${s.bandwidth.toFixed(2)}<br/>` : ''}
             ${s.file_line != null ? `file_line: ${s.file_line}<br/>` : ''}
-            ${s.info != null ? `info: ${s.info}` : ''}
+            ${info != null ? `info: ${info}` : ''}
            
         `;
         }
@@ -245,6 +287,42 @@ export function genProfileOption({
         borderRadius: 3
       },
     },
+    dataset: datasets,
     series: seriesArr
   };
+}
+
+/* ---------- 预排版数值列 ---------- */
+/**
+ * 按泳道名取出与 laneOrder 对应的预排版列；条目数或泳道序号对不上时返回 null（回退逐条解析）
+ * @param {Object|null} layout  result.seriesLayout.cores[i]
+ * @param {Array<BaseLane>} lanes
+ * @param {Array<Object>} entries
+ * @returns {Array<Object>|null}
+ */
+function matchLayout(layout, lanes, entries) {
+  if (!layout?.lanes || layout.entryCount !== entries.length) return null
+  const byName = new Map(layout.lanes.map(l => [l.lane, l]))
+  const picked = lanes.map(lane => byName.get(lane.laneName))
+  const ok = picked.every((l, i) => l && (!l.count || l.columns.laneIndex[0] === lanes[i].categoryIdx))
+  return ok ? picked : null
+}
+
+const TYPED = { Uint8: Uint8Array, Uint16: Uint16Array, Uint32: Uint32Array, Float32: Float32Array, Float64: Float64Array }
+const typedCache = new WeakMap()
+
+/**
+ * 数值列 -> TypedArray（同一份列只转换一次，切换 core / 复位时复用）
+ * @param {Object} columns  {laneIndex: number[], x0: number[], ...}
+ * @param {Object} [dtypes] result.seriesLayout.dtypes
+ * @returns {Object} {laneIndex: Uint8Array, x0: Float64Array, ...}
+ */
+export function toTypedColumns(columns, dtypes = LAYOUT_DTYPES) {
+  let typed = typedCache.get(columns)
+  if (!typed) {
+    typed = {}
+    for (const dim of LAYOUT_DIMS) typed[dim] = TYPED[dtypes[dim]].from(columns[dim])
+    typedCache.set(columns, typed)
+  }
+  return typed
 }
\ No newline at end of file
@@ -1,19 +1,21 @@
 import * as echarts from 'echarts';
 import { createLane } from '../lanes/lane-factory';
 import  BaseLane  from '../lanes/base-lane'
-import { buildDeps } from '@/core/parser/dep-collector';
+import { buildDeps, depsFromIndex } from '@/core/parser/dep-collector';
 
 /**
  * @param {Object} opts
  * @param {Array<Object>} opts.logRows          输入日志行
  * @param {string[]}        opts.laneOrder      要出现的泳道 key，按上下顺序
  * @param {string}          opts.themeName      已在 echarts-manager 里注册的主题名
+ * @param {Object|null}     opts.deps           parser 预建依赖 {from: [], to: []}（logRows 下标），可缺省
  */
 export function buildTimeStepOption({
   logRows,
   laneOrder,
   themeName = 'light',
   visibleKeys = null,  // 新增
+  deps: depIndex = null,
 }) {
   
   /* ---------- 全局预扫描，生成静态蓝图 ---------- */
@@ -146,7 +148,10 @@ export function buildTimeStepOption({
    /* ---------- 构造依赖箭头 ---------- */
   const allEntries = drawingRows;
   //console.log('allEntries', allEntries);
-  const deps = buildDeps(allEntries, laneOrder); // [{from, to}]
+  // 全部可见时直接用 parser 预建的下标数组，否则按可见条目现场配对
+  const deps = depIndex && drawingRows.length === logRows.length
+    ? depsFromIndex(logRows, depIndex, laneOrder)
+    : buildDeps(allEntries, laneOrder); // [{from, to}]
   // console.log('deps', deps);
 
   // 转成 markLine data
@@ -0,0 +1,244 @@
+/**
+ * Profile entries 查询索引（与 src/core/parser/profile_index.py 同构）
+ * - 区间索引：按 start 升序数组上的隐式平衡二叉树，节点记录子树最大 end，重叠查询 O(log n + k)
+ * - 倒排索引：op / type / bd_id / gdma_id -> entry 下标（升序）
+ * 优先使用解析器写入 result.json 的 profile[i].index，缺失时在前端现建
+ */
+
+const INVERTED_FIELDS = {
+  op: 'byOp',
+  type: 'byType',
+  bd_id: 'byBdId',
+  gdma_id: 'byGdmaId'
+}
+
+const SCAN_LEVEL = 3
+
+/* 与绘制一致：矩形右边界 = start + cost */
+const entryEnd = e => e.start + e.cost
+
+/**
+ * 构建隐式树的子树最大 end
+ * @param {Array<number>} ends 按 start 排序后的 end 数组
+ * @returns {{maxEnd: Array<number>, rootLevel: number}}
+ */
+function buildMaxEnd(ends) {
+  const n = ends.length
+  const maxEnd = ends.slice()
+  if (n === 0) return { maxEnd, rootLevel: -1 }
+  let lastI = 0
+  let last = ends[0]
+  for (let i = 0; i < n; i += 2) { lastI = i; last = ends[i] }
+  let k = 1
+  for (; (1 << k) <= n; k++) {
+    const x = 1 << (k - 1)
+    for (let i = (x << 1) - 1; i < n; i += x << 2) {
+      const el = maxEnd[i - x]
+      const er = i + x < n ? maxEnd[i + x] : last
+      maxEnd[i] = Math.max(ends[i], el, er)
+    }
+    lastI = (lastI >> k) & 1 ? lastI - x : lastI + x
+    if (lastI < n && maxEnd[lastI] > last) last = maxEnd[lastI]
+  }
+  return { maxEnd, rootLevel: k - 1 }
+}
+
+/* 二分：第一个 >= target 的位置 */
+function lowerBound(arr, target) {
+  let l = 0, r = arr.length
+  while (l < r) {
+    const m = (l + r) >> 1
+    if (arr[m] < target) l = m + 1
+    else r = m
+  }
+  return l
+}
+
+/* 二分：第一个 > target 的位置 */
+function upperBound(arr, target) {
+  let l = 0, r = arr.length
+  while (l < r) {
+    const m = (l + r) >> 1
+    if (arr[m] <= target) l = m + 1
+    else r = m
+  }
+  return l
+}
+
+/* 多个升序下标表合并（去重不需要：同一字段的不同取值互斥） */
+function mergeSorted(lists) {
+  if (lists.length === 1) return lists[0]
+  const out = []
+  lists.forEach(l => { for (let i = 0; i < l.length; i++) out.push(l[i]) })
+  return out.sort((a, b) => a - b)
+}
+
+/**
+ * 单 core profile 查询索引, entries 需已按 start 升序
+ */
+export class ProfileIndex {
+  /**
+   * @param {Array<Object>} entries  当前 core 的 entries
+   * @param {Object|null} index      解析器导出的 index（可选）
+   */
+  constructor(entries, index = null) {
+    this.entries = entries
+    const n = entries.length
+    this.starts = new Float64Array(n)
+    this.ends = new Float64Array(n)
+    for (let i = 0; i < n; i++) {
+      this.starts[i] = entries[i].start
+      this.ends[i] = entryEnd(entries[i])
+    }
+
+    if (index?.maxEnd?.length === n) {
+      this.maxEnd = index.maxEnd
+      this.rootLevel = index.rootLevel ?? Math.floor(Math.log2(n))
+      this.inverted = {}
+      Object.values(INVERTED_FIELDS).forEach(k => { this.inverted[k] = index[k] || {} })
+      this.opBounds = index.opBounds || {}
+    } else {
+      const built = buildMaxEnd(Array.from(this.ends))
+      this.maxEnd = built.maxEnd
+      this.rootLevel = built.rootLevel
+      this.#buildInverted()
+    }
+  }
+
+  #buildInverted() {
+    this.inverted = {}
+    Object.values(INVERTED_FIELDS).forEach(k => { this.inverted[k] = {} })
+    this.opBounds = {}
+    this.entries.forEach((e, pos) => {
+      for (const [field, key] of Object.entries(INVERTED_FIELDS)) {
+        const v = e[field]
+        if (v == null) continue
+        ;(this.inverted[key][String(v)] ??= []).push(pos)
+      }
+      const b = this.opBounds[e.op]
+      const end = entryEnd(e)
+      if (!b) this.opBounds[e.op] = [e.start, end]
+      else if (end > b[1]) b[1] = end
+    })
+  }
+
+  /**
+   * 倒排表：field 取值为 value 的 entry 下标（升序）
+   * @param {string} field  op | type | bd_id | gdma_id
+   * @param {*} value
+   * @returns {Array<number>}
+   */
+  postings(field, value) {
+    return this.inverted[INVERTED_FIELDS[field]]?.[String(value)] || []
+  }
+
+  /**
+   * op 覆盖的最左 start 与最右 end
+   * @param {string} op
+   * @returns {{left: number, right: number}|undefined}
+   */
+  opBoundary(op) {
+    const b = this.opBounds[op]
+    return b ? { left: b[0], right: b[1] } : undefined
+  }
+
+  /**
+   * 与闭区间 [lo, hi] 有交集的 entry 下标（升序）
+   * @param {number} lo
+   * @param {number} hi
+   * @returns {Array<number>}
+   */
+  overlap(lo, hi) {
+    const n = this.entries.length
+    const out = []
+    if (n === 0) return out
+    const { starts, ends, maxEnd } = this
+    const stack = [[this.rootLevel, (1 << this.rootLevel) - 1, false]]
+    while (stack.length) {
+      const [k, x, leftDone] = stack.pop()
+      if (k <= SCAN_LEVEL) {
+        const i0 = (x >> k) << k
+        const i1 = Math.min(i0 + (1 << (k + 1)) - 1, n)
+        for (let i = i0; i < i1 && starts[i] <= hi; i++) {
+          if (ends[i] >= lo) out.push(i)
+        }
+      } else if (!leftDone) {
+        const y = x - (1 << (k - 1))
+        stack.push([k, x, true])
+        if (y >= n || maxEnd[y] >= lo) stack.push([k - 1, y, false])
+      } else if (x < n && starts[x] <= hi) {
+        if (ends[x] >= lo) out.push(x)
+        stack.push([k - 1, x + (1 << (k - 1)), false])
+      }
+    }
+    return out
+  }
+
+  /**
+   * 组合筛选（单位均为 cycle），返回 entry 下标（升序）
+   * @param {Object} q
+   * @param {number|null} [q.startMin]   start 下界
+   * @param {number|null} [q.startMax]   start 上界
+   * @param {Array<number|null>|null} [q.window] 重叠窗口 [lo, hi]
+   * @param {string} [q.engine='all']
+   * @param {Array<string>} [q.op=[]]
+   * @param {Array<string>} [q.type=[]]
+   * @param {number|null} [q.bdId]
+   * @param {number|null} [q.gdmaId]
+   * @param {number|null} [q.durationMin]
+   * @param {number|null} [q.durationMax]
+   * @param {string|number} [q.direction='all']
+   * @returns {Array<number>}
+   */
+  query({
+    startMin = null, startMax = null, window = null, engine = 'all',
+    op = [], type = [], bdId = null, gdmaId = null,
+    durationMin = null, durationMax = null, direction = 'all'
+  } = {}) {
+    const loPos = startMin != null ? lowerBound(this.starts, startMin) : 0
+    const hiPos = startMax != null ? upperBound(this.starts, startMax) : this.entries.length
+    const opSet = new Set(op)
+    const typeSet = new Set(type)
+    const wLo = window?.[0] ?? null
+    const wHi = window?.[1] ?? null
+
+    /* 1. 选最短的候选来源 */
+    const sources = []
+    if (opSet.size) sources.push([...opSet].map(v => this.postings('op', v)))
+    if (typeSet.size) sources.push([...typeSet].map(v => this.postings('type', v)))
+    if (bdId != null) sources.push([this.postings('bd_id', bdId)])
+    if (gdmaId != null) sources.push([this.postings('gdma_id', gdmaId)])
+
+    let cand
+    if (sources.length) {
+      const size = ls => ls.reduce((s, l) => s + l.length, 0)
+      const lists = sources.reduce((best, ls) => (size(ls) < size(best) ? ls : best))
+      const merged = mergeSorted(lists)
+      cand = merged.slice(lowerBound(merged, loPos), lowerBound(merged, hiPos))
+    } else if (window) {
+      cand = this.overlap(wLo ?? -Infinity, wHi ?? Infinity).filter(i => i >= loPos && i < hiPos)
+    } else {
+      cand = { length: hiPos - loPos, at: i => loPos + i }
+    }
+
+    /* 2. 其余条件逐条校验 */
+    const out = []
+    const pick = Array.isArray(cand) ? i => cand[i] : cand.at
+    for (let j = 0; j < cand.length; j++) {
+      const i = pick(j)
+      const e = this.entries[i]
+      if (wLo != null && this.ends[i] < wLo) continue
+      if (wHi != null && this.starts[i] > wHi) continue
+      if (engine !== 'all' && e.engine !== engine) continue
+      if (opSet.size && !opSet.has(e.op)) continue
+      if (typeSet.size && !typeSet.has(e.type)) continue
+      if (bdId != null && e.bd_id !== bdId) continue
+      if (gdmaId != null && e.gdma_id !== gdmaId) continue
+      if (durationMin != null && e.cost < durationMin) continue
+      if (durationMax != null && e.cost > durationMax) continue
+      if (direction !== 'all' && e.direction !== direction) continue
+      out.push(i)
+    }
+    return out
+  }
+}
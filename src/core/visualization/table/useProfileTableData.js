@@ -1,4 +1,5 @@
-import { computed, ref } from 'vue'
+import { computed, ref, unref } from 'vue'
+import { ProfileIndex } from './profile-index.js'
 
 const CYCLE_TO_MS = 1e-6; // 1 cycle = 1 μs = 0.001 ms
 const CYCLE_TO_US = 1e-3;
@@ -7,9 +8,10 @@ const CYCLE_TO_US = 1e-3;
  * 处理 Profile 表格数据筛选逻辑 API
  * @param {Array<Object>} rawEntries 
  * @param {*} externalFilter 
+ * @param {Object|null} rawIndex 解析器导出的 profile 索引（可为 ref），缺省时前端现建
  * @returns {Object} { filter, filteredRows, opOptions, concerningOpOptions } {表格筛选条件, 筛选后数据, op 候选项, type 候选项 }
  */
-export function useProfileTableData(rawEntries, externalFilter = null) {
+export function useProfileTableData(rawEntries, externalFilter = null, rawIndex = null) {
   /* ----- 计算列 ----- */
 const rows = computed(() =>
   (rawEntries.value ?? []).map(r => ({
@@ -26,20 +28,8 @@ const rows = computed(() =>
 )
 
 
-// 建立 op → 矩形边界的索引
-const opBoundaries = computed(() => {
-  const map = new Map()
-  for (const r of (rawEntries.value ?? [])) {
-    if (!map.has(r.op)) {
-      map.set(r.op, { left: r.start, right: r.start + r.cost })
-    } else {
-      const b = map.get(r.op)
-      b.left  = Math.min(b.left,  r.start)
-      b.right = Math.max(b.right, r.start + r.cost)
-    }
-  }
-  return map
-})
+// 区间 + 倒排索引（op 边界、窗口、op/type/bd_id/gdma_id 筛选均走索引）
+const index = computed(() => new ProfileIndex(rawEntries.value ?? [], unref(rawIndex)))
 
   /* ----- 筛选条件 ----- */
   const filter = externalFilter || ref({
@@ -58,41 +48,39 @@ const opBoundaries = computed(() => {
   })
 
   /* ----- 候选项 ----- */
-  const opOptions = computed(() => [...new Set(rows.value.map(r => r.op))])  // .sort() // 保留原始顺序
-  const typeOptions = computed(() => [...new Set(rows.value.map(r => r.type))].sort())
+  const opOptions = computed(() => Object.keys(index.value.opBounds))  // 保留首次出现顺序
+  const typeOptions = computed(() => Object.keys(index.value.inverted.byType).sort())
 
   /* ----- 过滤函数 ----- */
 const filteredRows = computed(() => {
-  const { startOpMin, startOpMax } = filter.value
+  const f = filter.value
   let minCycle = null
   let maxCycle = null
 
-  if (startOpMin) {
-    const b = opBoundaries.value.get(startOpMin)
+  if (f.startOpMin) {
+    const b = index.value.opBoundary(f.startOpMin)
     if (b) minCycle = b.left          // 最左矩形
   }
-  if (startOpMax) {
-    const b = opBoundaries.value.get(startOpMax)
+  if (f.startOpMax) {
+    const b = index.value.opBoundary(f.startOpMax)
     if (b) maxCycle = b.right         // 最右矩形
   }
 
-  return rows.value.filter(r => {
-    const f = filter.value
-    if (minCycle != null && r.start + r.cost < minCycle) return false   // 完全在左边界左侧
-    if (maxCycle != null && r.start > maxCycle) return false            // 完全在右边界右侧
-    if (f.startMax != null && r.start > f.startMax) return false
-    if (f.engine !== 'all' && r.engine !== f.engine) return false
-    if (f.op.length && !f.op.includes(r.op)) return false
-    if (f.type.length && !f.type.includes(r.type)) return false
-    if (f.bdId != null && r.bd_id !== f.bdId) return false
-    if (f.gdmaId != null && r.gdma_id !== f.gdmaId) return false
-    const minCyc = f.durationMin != null ? f.durationMin * 1e6 : null
-    const maxCyc = f.durationMax != null ? f.durationMax * 1e6 : null
-    if (minCyc != null && r.duration < minCyc) return false
-    if (maxCyc != null && r.duration > maxCyc) return false
-    if (f.direction !== 'all' && r.direction !== f.direction) return false
-    return true
+  const positions = index.value.query({
+    startMin: f.startMin,
+    startMax: f.startMax,
+    window: minCycle != null || maxCycle != null ? [minCycle, maxCycle] : null,
+    engine: f.engine,
+    op: f.op,
+    type: f.type,
+    bdId: f.bdId,
+    gdmaId: f.gdmaId,
+    durationMin: f.durationMin != null ? f.durationMin * 1e6 : null,   // ms -> cycle
+    durationMax: f.durationMax != null ? f.durationMax * 1e6 : null,
+    direction: f.direction ?? 'all'
   })
+  const all = rows.value
+  return positions.map(i => all[i])
 })
 
   return {
@@ -0,0 +1,47 @@
+/**
+ * 解析结果文件读取：支持 result.json 及其 .gz / .zst 压缩版本
+ * 压缩文件使用浏览器原生 DecompressionStream 流式解压
+ */
+
+const GZIP_MAGIC = [0x1f, 0x8b]
+const ZSTD_MAGIC = [0x28, 0xb5, 0x2f, 0xfd]
+
+/**
+ * 按文件头魔数判断压缩格式
+ * @param {Uint8Array} head 文件前 4 字节
+ * @returns {'gzip'|'zstd'|null}
+ */
+function detectCodec(head) {
+  const match = magic => magic.every((b, i) => head[i] === b)
+  if (match(GZIP_MAGIC)) return 'gzip'
+  if (match(ZSTD_MAGIC)) return 'zstd'
+  return null
+}
+
+/**
+ * 读取 File/Blob 为文本，压缩文件边读边解压
+ * @param {Blob} file 用户选择的文件
+ * @returns {Promise<string>} 解压后的文本
+ */
+export async function readTextMaybeCompressed(file) {
+  const head = new Uint8Array(await file.slice(0, 4).arrayBuffer())
+  const codec = detectCodec(head)
+  if (!codec) return file.text()
+
+  let ds
+  try {
+    ds = new DecompressionStream(codec)
+  } catch (err) {
+    throw new Error(`当前浏览器不支持 ${codec} 解压，请先解压或改用 gzip 格式`)
+  }
+  return new Response(file.stream().pipeThrough(ds)).text()
+}
+
+/**
+ * 读取并解析 result.json（可压缩）
+ * @param {Blob} file 用户选择的文件
+ * @returns {Promise<Object>} 解析结果
+ */
+export async function readParseResult(file) {
+  return JSON.parse(await readTextMaybeCompressed(file))
+}
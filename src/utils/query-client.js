@@ -0,0 +1,85 @@
+/**
+ * 本地查询服务客户端（配合 `python log_parser.py serve <dir>`）
+ * 视图只拉取当前需要的数据：概况、时间窗口切片、LOD 瓦片、LMEM 分组/step、Layer 查询
+ * profile-view 在页面 URL 带 ?serve[=http://host:port] 时使用：先取 manifest，切换到某个 core 时才拉取其 entries
+ */
+
+const DEFAULT_BASE = 'http://127.0.0.1:8765'
+
+/**
+ * 拼接查询串，忽略 null/undefined/空数组
+ * @param {Object} params
+ * @returns {string}
+ */
+function toQuery(params = {}) {
+  const q = new URLSearchParams()
+  Object.entries(params).forEach(([k, v]) => {
+    if (v == null) return
+    if (Array.isArray(v)) {
+      if (v.length) q.set(k, v.join(','))
+      return
+    }
+    q.set(k, String(v))
+  })
+  const s = q.toString()
+  return s ? `?${s}` : ''
+}
+
+/**
+ * 查询服务客户端
+ */
+export class QueryClient {
+  /**
+   * @param {string} base 服务地址，如 http://127.0.0.1:8765
+   */
+  constructor(base = DEFAULT_BASE) {
+    this.base = base.replace(/\/$/, '')
+  }
+
+  async #get(path, params) {
+    const res = await fetch(`${this.base}/api/${path}${toQuery(params)}`)
+    const data = await res.json()
+    if (!res.ok) throw new Error(data?.error || `HTTP ${res.status}`)
+    return data
+  }
+
+  /** 运行概况 */
+  manifest() { return this.#get('manifest') }
+
+  /**
+   * 时间窗口切片
+   * @param {number} core
+   * @param {Object} q { start, end, engine, op, type, bd_id, gdma_id, limit }
+   */
+  profileWindow(core, q = {}) { return this.#get(`profile/${core}`, q) }
+
+  /**
+   * LOD 瓦片：level 级别下第 tile 块，每块固定桶数
+   * @param {number} core
+   * @param {number} level
+   * @param {number} tile
+   */
+  tile(core, level, tile) { return this.#get(`tiles/${core}`, { level, tile }) }
+
+  /** LMEM 分组列表 */
+  lmemGroups() { return this.#get('lmem') }
+
+  /** LMEM 分组逐 step 统计 */
+  lmemSteps(group) { return this.#get(`lmem/${group}/steps`) }
+
+  /** 单 step 统计 + 活跃 allocations */
+  lmemStep(group, step) { return this.#get(`lmem/${group}/steps/${step}`) }
+
+  /** Timestep 分组概况 */
+  timestepGroups() { return this.#get('timestep') }
+
+  /** Timestep 分组 entries */
+  timestepGroup(group) { return this.#get(`timestep/${group}`) }
+
+  /**
+   * Layer 查询
+   * @param {number} core
+   * @param {Object} q { file_line } 或 { op }
+   */
+  layers(core, q = {}) { return this.#get(`layers/${core}`, q) }
+}